@@ -85,6 +85,43 @@ DATABASES = {
     }
 }
 
+# Read replica made by `manage.py refresh_replica` (production profile only)
+REPLICA_PATH = BASE_DIR / 'db-replica.sqlite3'
+
+# Production SQLite profile, enabled with TYREMASTER_DB_PROFILE=production:
+# WAL so readers don't wait for writers, pragmas applied on every new
+# connection, persistent connections, and - once a replica file exists -
+# read-only requests served from the replica (tyres.replica). Those lag
+# edits until the next `manage.py refresh_replica`; run it from cron.
+if os.environ.get('TYREMASTER_DB_PROFILE') == 'production':
+    SQLITE_PRAGMAS = [
+        'PRAGMA synchronous=NORMAL',    # safe with WAL; fsync at checkpoints only
+        'PRAGMA mmap_size=268435456',   # 256 MB memory-mapped reads
+        'PRAGMA cache_size=-65536',     # 64 MB page cache per connection
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA busy_timeout=5000',
+    ]
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(['PRAGMA journal_mode=WAL', *SQLITE_PRAGMAS]),
+            # Take the write lock up front instead of failing on upgrade mid-transaction
+            'transaction_mode': 'IMMEDIATE',
+        },
+    })
+    if REPLICA_PATH.exists():
+        DATABASES['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': f'file:{REPLICA_PATH}?mode=ro',
+            # ReplicaMiddleware also reopens it as soon as the replica is refreshed
+            'CONN_MAX_AGE': 60,
+            'OPTIONS': {'init_command': ';'.join(['PRAGMA query_only=ON', *SQLITE_PRAGMAS])},
+            'TEST': {'MIRROR': 'default'},
+        }
+        DATABASE_ROUTERS = ['tyres.replica.ReplicaRouter']
+        MIDDLEWARE.insert(0, 'tyres.replica.ReplicaMiddleware')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -125,3 +162,47 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 
 # For production (add later)
 # STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Caches. Rendered pages go to their own cache ('pages'); swap its backend for
+# 'django.core.cache.backends.filebased.FileBasedCache' (LOCATION a directory),
+# 'django.core.cache.backends.redis.RedisCache' in production, or the
+# in-process Redis stand-in 'tyres.cache_backends.LocalRedisCache'
+# (LOCATION 'redis://local/0') to exercise the Redis code path locally.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pages',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+PAGE_CACHE_ALIAS = 'pages'
+
+# Bearer token for machine access to /export/catalogue.csv|.ndjson (staff users need none)
+EXPORT_TOKEN = os.environ.get('TYREMASTER_EXPORT_TOKEN', '')
+
+# Vehicle submissions: moderator emails and enrichment run on this many
+# background threads after the request (0 runs them inline, after commit)
+SUBMISSION_WORKERS = int(os.environ.get('TYREMASTER_SUBMISSION_WORKERS', 4))
+
+# Moderators emailed about new submissions
+MANAGERS = [('TyreMaster moderators', os.environ['TYREMASTER_MODERATOR_EMAIL'])] \
+    if os.environ.get('TYREMASTER_MODERATOR_EMAIL') else []
+
+# Outgoing mail. Printed to the console unless a backend is configured; for a
+# local SMTP stand-in run `python -m aiosmtpd -n -l localhost:1025` (or any
+# debugging SMTP server) and set TYREMASTER_EMAIL_BACKEND to
+# 'django.core.mail.backends.smtp.EmailBackend'.
+EMAIL_BACKEND = os.environ.get('TYREMASTER_EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('TYREMASTER_EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('TYREMASTER_EMAIL_PORT', 1025))
+DEFAULT_FROM_EMAIL = SERVER_EMAIL = 'TyreMaster <noreply@yourdomain.com>'
+
+# Sitemaps pre-generated by `manage.py generate_sitemaps`; served from here when present
+SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+# Vehicle and listing pages rendered by `manage.py prerender_static`, for the front-end server
+PRERENDER_ROOT = BASE_DIR / 'prerendered'
+# Absolute URL used in pre-generated sitemaps and pages
+SITE_URL = 'https://yourdomain.com'
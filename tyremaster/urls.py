@@ -16,17 +16,14 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path,include
-from django.contrib.sitemaps.views import sitemap
-from tyres.sitemap import VehicleSitemap
+from tyres import sitemap
 from django.views.generic import TemplateView
 
-sitemaps = {
-    'vehicles': VehicleSitemap,
-}
-
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('tyres.urls')),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', sitemap.sitemap_index, name='sitemap_index'),
+    path('sitemap-pages.xml', sitemap.sitemap_pages, name='sitemap_pages'),
+    path('sitemap-vehicles-<int:shard>.xml', sitemap.sitemap_vehicles, name='sitemap_vehicles'),
     path('robots.txt', TemplateView.as_view(template_name='robots.txt', content_type='text/plain')),
 ]
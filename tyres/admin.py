@@ -1,17 +1,21 @@
 # tyres/admin.py
 from django.contrib import admin
 from .models import Vehicle, TyreSize
+from .tyre_sizes import parse_tyre_size
 
 class TyreSizeInline(admin.StackedInline):
     model = TyreSize
     can_delete = False
     verbose_name_plural = 'Tyre Sizes'
+    readonly_fields = ('front_size_key', 'rear_size_key', 'front_pressure_psi', 'rear_pressure_psi')
     fieldsets = (
         ('Front Tyre', {
-            'fields': ('front_size', 'front_width', 'front_aspect_ratio', 'front_rim', 'front_pressure')
+            'fields': ('front_size', 'front_width', 'front_aspect_ratio', 'front_rim', 'front_construction',
+                       'front_pressure', 'front_pressure_psi', 'front_size_key')
         }),
         ('Rear Tyre', {
-            'fields': ('rear_size', 'rear_width', 'rear_aspect_ratio', 'rear_rim', 'rear_pressure')
+            'fields': ('rear_size', 'rear_width', 'rear_aspect_ratio', 'rear_rim', 'rear_construction',
+                       'rear_pressure', 'rear_pressure_psi', 'rear_size_key')
         }),
         ('Same Tyres (if applicable)', {
             'fields': ('tyre_size',)
@@ -43,4 +47,12 @@ class VehicleAdmin(admin.ModelAdmin):
 class TyreSizeAdmin(admin.ModelAdmin):
     list_display = ['vehicle', 'get_front_display', 'get_rear_display']
     list_filter = ['vehicle__category']
-    search_fields = ['vehicle__brand', 'vehicle__model']
\ No newline at end of file
+    search_fields = ['vehicle__brand', 'vehicle__model']
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Tyre sizes are matched on their canonical key instead of a text scan
+        spec = parse_tyre_size(search_term)
+        if spec:
+            queryset = queryset.filter(front_size_key=spec.key) | queryset.filter(rear_size_key=spec.key)
+            return queryset, False
+        return super().get_search_results(request, queryset, search_term)
\ No newline at end of file
@@ -0,0 +1,177 @@
+# tyres/alternatives.py
+import itertools
+import time
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .tyre_sizes import parse_tyre_size, tyre_dimensions
+
+VERSION_KEY = 'alternatives:version'
+
+# How long a process trusts its index before re-checking the shared version
+LOCAL_TTL = 5
+
+DEFAULT_TOLERANCE = 3
+
+# Common sizes offered as alternatives even when no vehicle in the catalogue
+# uses them yet. Override with the TYRE_REFERENCE_SIZES setting.
+REFERENCE_SIZES = [
+    # Cars
+    '145/80R13', '155/65R13', '155/80R13', '165/65R14', '165/80R14', '175/65R14', '175/70R14',
+    '185/65R14', '185/70R14', '175/65R15', '185/60R15', '185/65R15', '195/55R15', '195/60R15',
+    '195/65R15', '205/65R15', '195/55R16', '205/55R16', '205/60R16', '215/60R16', '215/65R16',
+    '235/70R16', '205/50R17', '215/55R17', '215/60R17', '225/45R17', '225/50R17', '225/55R17',
+    '235/65R17', '265/65R17', '225/40R18', '235/60R18', '245/45R18', '255/55R18', '255/60R18',
+    # Bikes and scooters
+    '90/100-10', '100/90-10', '90/90-12', '100/90-12', '110/70-12', '120/70-12', '80/100-17',
+    '90/90-17', '100/80-17', '100/90-17', '110/70-17', '110/80-17', '120/70-17', '120/80-17',
+    '130/70-17', '140/60-17', '140/70-17', '150/60-17', '80/100-18', '90/90-18', '100/90-18',
+    '110/80-18', '90/90-19', '100/90-19', '90/90-21',
+]
+
+# A real size that can stand in for another; `source` is 'catalogue' or 'reference'
+Alternative = namedtuple('Alternative', ['size', 'width', 'aspect_ratio', 'rim', 'diameter', 'source'])
+
+_local = {'index': None, 'version': None, 'checked': 0.0}
+
+_generations = itertools.count(1)
+
+
+def reference_sizes():
+    return getattr(settings, 'TYRE_REFERENCE_SIZES', REFERENCE_SIZES)
+
+
+def display_size(width, aspect_ratio, construction, rim):
+    """'185/65R15' or '90/90-12'; sizes entered without a construction are shown as radial"""
+    return f"{width}/{aspect_ratio}{construction or 'R'}{rim:g}"
+
+
+class SizeIndex:
+    """
+    Distinct metric sizes grouped by rim diameter, each group sorted by
+    overall diameter, so every size within ±X% of a diameter is found with
+    two binary searches.
+    """
+
+    def __init__(self, sizes):
+        """`sizes`: (width, aspect_ratio, construction, rim, source) tuples; the first of a duplicate wins"""
+        # Distinguishes this build from earlier ones, e.g. in memo keys
+        self.generation = next(_generations)
+        seen = {}
+        for width, aspect_ratio, construction, rim, source in sizes:
+            if width and aspect_ratio and rim and (width, aspect_ratio, rim) not in seen:
+                _, diameter = tyre_dimensions(width, aspect_ratio, rim)
+                seen[(width, aspect_ratio, rim)] = Alternative(
+                    display_size(width, aspect_ratio, construction, rim),
+                    width, aspect_ratio, rim, diameter, source,
+                )
+
+        self.rims = {}
+        for alternative in sorted(seen.values(), key=lambda a: (a.rim, a.diameter, a.width)):
+            self.rims.setdefault(alternative.rim, []).append(alternative)
+        self.diameters = {rim: [a.diameter for a in group] for rim, group in self.rims.items()}
+
+    def __len__(self):
+        return sum(len(group) for group in self.rims.values())
+
+    def within(self, diameter, rim, tolerance=DEFAULT_TOLERANCE):
+        """Sizes on `rim` whose diameter is within ±tolerance percent of `diameter`, smallest first"""
+        diameters = self.diameters.get(rim)
+        if not diameters:
+            return []
+        low = bisect_left(diameters, diameter * (1 - tolerance / 100))
+        high = bisect_right(diameters, diameter * (1 + tolerance / 100))
+        return self.rims[rim][low:high]
+
+    def alternatives(self, width, aspect_ratio, rim, tolerance=DEFAULT_TOLERANCE, limit=None, rims=None):
+        """
+        Real sizes that can replace width/aspect_ratio/rim, closest diameter
+        first. Only the same rim is searched unless `rims` lists others.
+        """
+        _, diameter = tyre_dimensions(width, aspect_ratio, rim)
+        found = [
+            alternative
+            for candidate_rim in (rims or [rim])
+            for alternative in self.within(diameter, candidate_rim, tolerance)
+            if (alternative.width, alternative.aspect_ratio, alternative.rim) != (width, aspect_ratio, rim)
+        ]
+        found.sort(key=lambda a: (abs(a.diameter - diameter), a.width, a.aspect_ratio))
+        return found[:limit] if limit else found
+
+
+def catalogue_sizes():
+    """(width, aspect_ratio, construction, rim, 'catalogue') for every distinct size in TyreSize"""
+    from .models import TyreSize
+
+    rows = TyreSize.objects.values_list(
+        'front_width', 'front_aspect_ratio', 'front_construction', 'front_rim',
+        'rear_width', 'rear_aspect_ratio', 'rear_construction', 'rear_rim',
+    ).distinct().iterator(chunk_size=5000)
+    for row in rows:
+        yield (*row[:4], 'catalogue')
+        yield (*row[4:], 'catalogue')
+
+
+def parsed_reference_sizes():
+    for text in reference_sizes():
+        spec = parse_tyre_size(text)
+        if spec and spec.width is not None:
+            yield spec.width, spec.aspect_ratio, spec.construction, spec.rim, 'reference'
+
+
+def build_index():
+    return SizeIndex([*catalogue_sizes(), *parsed_reference_sizes()])
+
+
+def get_index():
+    """
+    The process-local index, built on first use and rebuilt when the shared
+    version shows the catalogue's sizes have changed (checked every LOCAL_TTL seconds).
+    """
+    now = time.monotonic()
+    if _local['index'] is not None and now - _local['checked'] < LOCAL_TTL:
+        return _local['index']
+
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+
+    if _local['index'] is None or version != _local['version']:
+        _local['index'] = build_index()
+        _local['version'] = version
+    _local['checked'] = now
+    return _local['index']
+
+
+def clear_local():
+    _local.update(index=None, version=None, checked=0.0)
+
+
+def sizes_changed():
+    """Rebuild the index (here and, via the shared version, elsewhere) after this transaction commits"""
+    transaction.on_commit(_bump_version)
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+    clear_local()
+
+
+def tyre_dimension_values(tyres):
+    """The (width, aspect_ratio, rim) pairs of a TyreSize, for spotting size changes"""
+    return {
+        (tyres.front_width, tyres.front_aspect_ratio, tyres.front_rim),
+        (tyres.rear_width, tyres.rear_aspect_ratio, tyres.rear_rim),
+    }
+
+
+def find_alternatives(width, aspect_ratio, rim, tolerance=DEFAULT_TOLERANCE, limit=None):
+    return get_index().alternatives(width, aspect_ratio, rim, tolerance, limit)
@@ -0,0 +1,205 @@
+# tyres/api.py
+"""
+Read-only JSON API, version 1.
+
+    GET  /api/v1/vehicles/                 ?category= &brand= &fields= &limit= &cursor=
+    GET  /api/v1/vehicles/<slug>/          ?fields=
+    GET  /api/v1/vehicles/lookup/?slugs=a,b,c   (or POST {"slugs": [...]})
+
+`fields` picks what each vehicle includes: vehicle columns by name,
+`tyres` or `tyres.<column>`, `pressure_data` or `pressure_data.<column>`.
+Rows are read with values(), never as model instances; a response costs
+one query, plus one for pressure data when it is asked for, whatever the
+page size.
+"""
+import json
+
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.csrf import csrf_exempt
+
+from .models import Vehicle, TyrePressureData
+from .pagination import KeysetPaginator
+
+VEHICLE_FIELDS = ['slug', 'brand', 'model', 'year', 'category']
+TYRE_FIELDS = [
+    'front_size', 'front_width', 'front_aspect_ratio', 'front_rim', 'front_construction',
+    'front_pressure', 'front_pressure_psi',
+    'rear_size', 'rear_width', 'rear_aspect_ratio', 'rear_rim', 'rear_construction',
+    'rear_pressure', 'rear_pressure_psi',
+    'tyre_size', 'alt_size_1', 'alt_size_2', 'alt_size_3', 'load_index', 'speed_rating', 'tube_type',
+    'last_updated',
+]
+PRESSURE_FIELDS = [
+    'standard_front', 'standard_rear', 'cold_front', 'cold_rear', 'hot_front', 'hot_rear',
+    'light_load_front', 'light_load_rear', 'full_load_front', 'full_load_rear',
+    'max_front', 'max_rear', 'summer_adjustment', 'winter_adjustment', 'notes', 'last_updated',
+]
+DEFAULT_FIELDS = VEHICLE_FIELDS + ['tyres']
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_LOOKUP = 500
+
+CACHE_SECONDS = 5 * 60
+
+# Listing order; ends in a unique column as keyset pagination requires
+ORDERING = ('brand', 'model', 'year', 'id')
+
+
+class ApiError(ValueError):
+    pass
+
+
+def error_response(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def api_response(data):
+    response = JsonResponse(data)
+    patch_cache_control(response, public=True, max_age=CACHE_SECONDS)
+    return response
+
+
+class FieldSet:
+    """Which vehicle, tyre and pressure columns a response includes, from `?fields=`"""
+
+    def __init__(self, fields=None):
+        self.vehicle, self.tyres, self.pressure = [], [], []
+        for name in fields or DEFAULT_FIELDS:
+            group, _, column = name.partition('.')
+            if not column and group in VEHICLE_FIELDS:
+                self.vehicle.append(group)
+            elif group == 'tyres':
+                self._add(self.tyres, TYRE_FIELDS, column, name)
+            elif group == 'pressure_data':
+                self._add(self.pressure, PRESSURE_FIELDS, column, name)
+            else:
+                raise ApiError(f"Unknown field: {name}")
+
+    @staticmethod
+    def _add(selected, allowed, column, name):
+        if column and column not in allowed:
+            raise ApiError(f"Unknown field: {name}")
+        for field in [column] if column else allowed:
+            if field not in selected:
+                selected.append(field)
+
+    @classmethod
+    def from_request(cls, request):
+        fields = [name.strip() for name in request.GET.get('fields', '').split(',') if name.strip()]
+        return cls(fields)
+
+    def columns(self):
+        """values() arguments for the vehicle query; always includes the id"""
+        return ['id', *self.vehicle, *(f'tyres__{field}' for field in self.tyres)]
+
+
+def serialize(rows, fieldset):
+    """Turn values() rows (plus their pressure data, in one query) into API objects"""
+    pressure = {}
+    if fieldset.pressure:
+        ids = [row['id'] for row in rows]
+        for entry in TyrePressureData.objects.filter(vehicle_id__in=ids).order_by('id').values(
+                'vehicle_id', *fieldset.pressure):
+            pressure.setdefault(entry.pop('vehicle_id'), []).append(entry)
+
+    results = []
+    for row in rows:
+        item = {field: row[field] for field in fieldset.vehicle}
+        if fieldset.tyres:
+            tyres = {field: row[f'tyres__{field}'] for field in fieldset.tyres}
+            # A vehicle without tyre data joins to all-NULL columns
+            item['tyres'] = tyres if any(value is not None for value in tyres.values()) else None
+        if fieldset.pressure:
+            item['pressure_data'] = pressure.get(row['id'], [])
+        results.append(item)
+    return results
+
+
+def page_size(request):
+    try:
+        return min(max(int(request.GET.get('limit', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ApiError("limit must be a number")
+
+
+def vehicles(request):
+    """Vehicles in brand/model/year order, a cursor page at a time"""
+    try:
+        fieldset = FieldSet.from_request(request)
+        limit = page_size(request)
+    except ApiError as e:
+        return error_response(str(e))
+
+    queryset = Vehicle.objects.all()
+    if request.GET.get('category'):
+        queryset = queryset.filter(category=request.GET['category'])
+    if request.GET.get('brand'):
+        queryset = queryset.filter(brand=request.GET['brand'])
+
+    # Sort columns are selected too, for the cursors
+    columns = list(dict.fromkeys([*fieldset.columns(), *ORDERING]))
+    paginator = KeysetPaginator(queryset.values(*columns), ORDERING, per_page=limit)
+    page = paginator.page(request.GET.get('cursor'))
+    return api_response({
+        'results': serialize(page.object_list, fieldset),
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+def vehicle(request, slug):
+    """One vehicle by slug"""
+    try:
+        fieldset = FieldSet.from_request(request)
+    except ApiError as e:
+        return error_response(str(e))
+
+    rows = list(Vehicle.objects.filter(slug=slug).values(*fieldset.columns()))
+    if not rows:
+        return error_response("Vehicle not found", status=404)
+    return api_response(serialize(rows, fieldset)[0])
+
+
+def requested_slugs(request):
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            raise ApiError("Request body must be JSON")
+        slugs = data.get('slugs') if isinstance(data, dict) else data
+        if not isinstance(slugs, list) or not all(isinstance(slug, str) for slug in slugs):
+            raise ApiError("slugs must be a list of strings")
+    else:
+        slugs = request.GET.get('slugs', '').split(',')
+
+    slugs = list(dict.fromkeys(slug.strip() for slug in slugs if slug.strip()))
+    if not slugs:
+        raise ApiError("No slugs given")
+    if len(slugs) > MAX_LOOKUP:
+        raise ApiError(f"At most {MAX_LOOKUP} slugs per request")
+    return slugs
+
+
+@csrf_exempt
+def vehicle_lookup(request):
+    """Many vehicles by slug in one call, in the order asked for"""
+    if request.method not in ('GET', 'POST'):
+        return error_response("Invalid request", status=405)
+    try:
+        fieldset = FieldSet.from_request(request)
+        slugs = requested_slugs(request)
+    except ApiError as e:
+        return error_response(str(e))
+
+    columns = fieldset.columns() + ([] if 'slug' in fieldset.vehicle else ['slug'])
+    rows = {row['slug']: row for row in Vehicle.objects.filter(slug__in=slugs).values(*columns)}
+    found = [rows[slug] for slug in slugs if slug in rows]
+    response = JsonResponse({
+        'results': dict(zip([row['slug'] for row in found], serialize(found, fieldset))),
+        'missing': [slug for slug in slugs if slug not in rows],
+    })
+    if request.method == 'GET':
+        patch_cache_control(response, public=True, max_age=CACHE_SECONDS)
+    return response
@@ -0,0 +1,110 @@
+# tyres/approvals.py
+from django.db import transaction
+from django.utils import timezone
+
+from .importing import BulkVehicleImporter
+from .models import Vehicle, VehicleSubmission
+from .signals import vehicles_bulk_created
+
+# Submission fields handed to the importer's row validation
+SUBMISSION_FIELDS = [
+    'brand', 'model', 'year', 'category',
+    'front_size', 'rear_size', 'tyre_size', 'front_pressure', 'rear_pressure',
+]
+
+
+class ApprovalStats:
+    """Counters collected while approving"""
+
+    def __init__(self):
+        self.approved = 0
+        self.already_listed = 0  # rejected: the vehicle is already in the catalogue
+        self.duplicates = 0      # rejected: an earlier submission in the run has the same vehicle
+        self.invalid = []        # (submission id, message); left pending
+
+    @property
+    def rejected(self):
+        return self.already_listed + self.duplicates
+
+
+def approve_submissions(submissions, batch_size=1000):
+    """
+    Approve the pending submissions in `submissions` (a queryset), oldest
+    first, in batches of `batch_size`, each batch in one transaction:
+
+    - submissions for a vehicle already in the catalogue, or for the same
+      vehicle as an earlier submission, are rejected with a note
+    - the rest become Vehicle + TyreSize rows via bulk_create; one that
+      still hits an IntegrityError is left pending, like an invalid one
+    - every status change is written with one bulk_update
+
+    Already approved or rejected submissions are skipped, so approving twice
+    is harmless. Returns ApprovalStats.
+    """
+    stats = ApprovalStats()
+    ids = list(
+        submissions.filter(status='PENDING').order_by('created_at', 'id').values_list('id', flat=True)
+    )
+    for start in range(0, len(ids), batch_size):
+        approve_batch(ids[start:start + batch_size], stats)
+    return stats
+
+
+def approve_batch(ids, stats):
+    importer = BulkVehicleImporter()
+    now = timezone.now()
+    created = []
+
+    with transaction.atomic():
+        # Re-read inside the transaction; another moderator may have got there first
+        submissions = list(
+            VehicleSubmission.objects.filter(pk__in=ids, status='PENDING').order_by('created_at', 'id')
+        )
+        candidates = []
+        for submission in submissions:
+            try:
+                vehicle, tyres = importer.build({field: getattr(submission, field) for field in SUBMISSION_FIELDS})
+            except ValueError as e:
+                stats.invalid.append((submission.pk, str(e)))
+                submission.admin_notes = f"Not approved: {e}"
+                continue
+            candidates.append((submission, vehicle, tyres))
+
+        slugs = {vehicle.slug for _, vehicle, _ in candidates}
+        listed = set(Vehicle.objects.filter(slug__in=slugs).values_list('slug', flat=True))
+
+        first = {}
+        for submission, vehicle, tyres in candidates:
+            if vehicle.slug in listed:
+                submission.status = 'REJECTED'
+                submission.admin_notes = f"Already in the catalogue as {vehicle.slug}"
+                stats.already_listed += 1
+            elif vehicle.slug in first:
+                submission.status = 'REJECTED'
+                submission.admin_notes = f"Duplicate of submission #{first[vehicle.slug].pk}"
+                stats.duplicates += 1
+            else:
+                first[vehicle.slug] = submission
+                submission.status = 'APPROVED'
+                submission.admin_notes = f'Approved and added to database on {now.date()}'
+                created.append((submission, vehicle, tyres))
+
+        # A row that still collides (e.g. imported since the check above) is
+        # left pending; the rest of the batch is approved
+        created, failed = importer.insert(created)
+        for submission, error in failed:
+            stats.invalid.append((submission.pk, error))
+            submission.status = 'PENDING'
+            submission.admin_notes = f"Not approved: {error}"
+
+        for submission in submissions:
+            submission.updated_at = now
+        VehicleSubmission.objects.bulk_update(submissions, ['status', 'admin_notes', 'updated_at'])
+
+    stats.approved += len(created)
+    if created:
+        vehicles_bulk_created.send(
+            sender=VehicleSubmission,
+            vehicles=[vehicle for _, vehicle, _ in created],
+            tyre_sizes=[tyres for _, _, tyres in created],
+        )
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class TyresConfig(AppConfig):
     name = 'tyres'
+
+    def ready(self):
+        from . import signals  # noqa: F401 - connects the signal receivers
@@ -0,0 +1,383 @@
+# tyres/benchmark.py
+"""
+In-process load driver. Replays a weighted mix of requests covering every
+URL in tyres/urls.py against the current database, through the Django test
+client or a local threaded HTTP server, and reports latency percentiles,
+queries per request and peak memory as a JSON-serializable dict, so runs
+before and after a change can be compared.
+"""
+import http.client
+import json
+import platform
+import random
+import secrets
+import subprocess
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from urllib.parse import urlencode
+
+import django
+import numpy as np
+from django.conf import settings
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from .models import Vehicle
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
+# Relative request frequency per URL name; roughly a day of production traffic
+DEFAULT_MIX = {
+    'vehicle_detail': 300,
+    'pressure_chart': 120,
+    'home': 100,
+    'vehicle_list': 100,
+    'search_by_tyre': 80,
+    'suggest': 80,
+    'api_vehicle': 50,
+    'search_by_size_range': 30,
+    'search_by_pressure': 30,
+    'calculate_tyre_size': 30,
+    'tyre_calculator': 15,
+    'api_vehicles': 15,
+    'api_vehicle_lookup': 10,
+    'compare_tyres': 10,
+    'about': 10,
+    'submit_vehicle': 10,
+    'calculate_tyre_size_batch': 5,
+    'submission_success': 2,
+    'export_catalogue': 1,
+}
+
+CALCULATOR_SIZES = [(145, 80, 12), (165, 80, 14), (185, 65, 15), (195, 55, 16), (205, 55, 16), (225, 45, 18)]
+
+
+class Samples:
+    """Real vehicles, brands, sizes and pressures from the catalogue to build requests from"""
+
+    def __init__(self, rng, size=500):
+        bounds = Vehicle.objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            raise ValueError("The catalogue is empty; run generate_catalogue first")
+        # Random ids rather than ORDER BY RANDOM(), which scans the whole table
+        span = range(bounds['low'], bounds['high'] + 1)
+        ids = rng.sample(span, min(size, len(span)))
+        rows = list(Vehicle.objects.filter(id__in=ids).values(
+            'slug', 'brand', 'category', 'tyres__front_size', 'tyres__front_width', 'tyres__front_pressure_psi',
+        ))
+        self.slugs = [row['slug'] for row in rows]
+        self.brands = sorted({row['brand'] for row in rows})
+        self.categories = sorted({row['category'] for row in rows})
+        self.sizes = [row['tyres__front_size'] for row in rows if row['tyres__front_size']] or ['90/90-12']
+        self.widths = [row['tyres__front_width'] for row in rows if row['tyres__front_width']] or [90]
+        self.pressures = [row['tyres__front_pressure_psi'] for row in rows if row['tyres__front_pressure_psi']] or [29]
+
+
+def _calculator_query(rng):
+    width, aspect_ratio, rim = rng.choice(CALCULATOR_SIZES)
+    # Field order of the canonical query string, so the view doesn't redirect
+    return {'width': width, 'aspect_ratio': aspect_ratio, 'rim_diameter': rim}
+
+
+def _vehicle_list_query(samples, rng):
+    return rng.choice([
+        {},
+        {'brand': rng.choice(samples.brands)},
+        {'category': rng.choice(samples.categories)},
+        {'sort_by': 'year_desc'},
+        {'tyre_width': rng.choice(samples.widths)},
+    ])
+
+
+# URL name -> function(samples, rng) returning (method, path, query or body)
+# A str body is sent as JSON
+REQUESTS = {
+    'home': lambda s, rng: ('GET', reverse('home'), {'q': rng.choice(s.brands)}),
+    'vehicle_list': lambda s, rng: ('GET', reverse('vehicle_list'), _vehicle_list_query(s, rng)),
+    'vehicle_detail': lambda s, rng: ('GET', reverse('vehicle_detail', args=[rng.choice(s.slugs)]), {}),
+    'search_by_tyre': lambda s, rng: ('GET', reverse('search_by_tyre'), {'front': rng.choice(s.sizes)}),
+    'about': lambda s, rng: ('GET', reverse('about'), {}),
+    'submit_vehicle': lambda s, rng: ('GET', reverse('submit_vehicle'), {}),
+    'submission_success': lambda s, rng: ('GET', reverse('submission_success'), {}),
+    'tyre_calculator': lambda s, rng: ('GET', reverse('tyre_calculator'), {}),
+    'compare_tyres': lambda s, rng: ('GET', reverse('compare_tyres'), {}),
+    'calculate_tyre_size': lambda s, rng: ('GET', reverse('calculate_tyre_size'), _calculator_query(rng)),
+    'calculate_tyre_size_batch': lambda s, rng: (
+        'POST', reverse('calculate_tyre_size_batch'),
+        json.dumps([f'{w}/{a}R{r}' for w, a, r in rng.sample(CALCULATOR_SIZES, len(CALCULATOR_SIZES))]),
+    ),
+    'search_by_size_range': lambda s, rng: ('GET', reverse('search_by_size_range'), {
+        'min_width': (width := rng.choice(s.widths)) - 10, 'max_width': width + 10,
+    }),
+    'search_by_pressure': lambda s, rng: ('GET', reverse('search_by_pressure'), {
+        'min_pressure': (psi := rng.choice(s.pressures)) - 2, 'max_pressure': psi + 2,
+    }),
+    'pressure_chart': lambda s, rng: ('GET', reverse('pressure_chart', args=[rng.choice(s.slugs)]), {}),
+    'suggest': lambda s, rng: ('GET', reverse('suggest'), {'q': rng.choice(s.brands)[:3]}),
+    'api_vehicles': lambda s, rng: ('GET', reverse('api_vehicles'), {'limit': 100}),
+    'api_vehicle': lambda s, rng: ('GET', reverse('api_vehicle', args=[rng.choice(s.slugs)]), {}),
+    'api_vehicle_lookup': lambda s, rng: ('GET', reverse('api_vehicle_lookup'), {
+        'slugs': ','.join(rng.sample(s.slugs, min(20, len(s.slugs)))),
+    }),
+    'export_catalogue': lambda s, rng: ('GET', reverse('export_catalogue', args=['ndjson']), {}),
+}
+
+
+def parse_mix(text):
+    """'vehicle_detail=50,home=0' -> DEFAULT_MIX with those weights replaced"""
+    mix = dict(DEFAULT_MIX)
+    for item in filter(None, (part.strip() for part in (text or '').split(','))):
+        name, _, weight = item.partition('=')
+        if name not in REQUESTS:
+            raise ValueError(f"Unknown URL name {name!r}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid weight in {item!r}")
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def plan(mix, count, samples, rng):
+    """`count` (url name, method, path, data) requests drawn from the weighted mix"""
+    names, weights = zip(*mix.items())
+    return [(name, *REQUESTS[name](samples, rng)) for name in rng.choices(names, weights, k=count)]
+
+
+class QueryCounter:
+    """connection.execute_wrapper counting queries"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class ClientDriver:
+    """Requests through the Django test client, one at a time in this thread"""
+
+    def __init__(self, token):
+        self.client = Client(HTTP_HOST='localhost', raise_request_exception=False)
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def __call__(self, name, method, path, data):
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            if method == 'GET':
+                response = self.client.get(path, data, headers=self.headers)
+            else:
+                response = self.client.post(path, data, content_type='application/json', headers=self.headers)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+        return time.perf_counter() - started, response.status_code, counter.count
+
+    def close(self):
+        pass
+
+
+class _QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+class ServerDriver:
+    """
+    Requests over HTTP to a threaded WSGI server on a free localhost port.
+    Queries are counted in the server threads and reported per URL name.
+    """
+
+    def __init__(self, token):
+        self.headers = {'Authorization': f'Bearer {token}', 'Host': 'localhost'}
+        self.queries = defaultdict(list)
+        self.lock = threading.Lock()
+        application = get_internal_wsgi_application()
+
+        def counted(environ, start_response):
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                result = application(environ, start_response)
+                try:
+                    yield from result
+                finally:
+                    result.close()
+            with self.lock:
+                self.queries[environ.get('HTTP_X_BENCHMARK_URL')].append(counter.count)
+
+        self.server = ThreadedWSGIServer(('127.0.0.1', 0), _QuietHandler, allow_reuse_address=False)
+        self.server.set_app(counted)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def __call__(self, name, method, path, data):
+        if method == 'GET':
+            body = None
+            if data:
+                path = f'{path}?{urlencode(data)}'
+            headers = self.headers
+        else:
+            body = data.encode()
+            headers = {**self.headers, 'Content-Type': 'application/json'}
+
+        started = time.perf_counter()
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=600)
+        try:
+            conn.request(method, path, body, {**headers, 'X-Benchmark-Url': name})
+            response = conn.getresponse()
+            response.read()
+        finally:
+            conn.close()
+        return time.perf_counter() - started, response.status, None
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _summary(latencies, statuses, queries):
+    latencies = np.array(latencies) * 1000
+    summary = {
+        'requests': len(latencies),
+        'errors': sum(1 for status in statuses if status >= 400),
+        'statuses': {str(status): statuses.count(status) for status in sorted(set(statuses))},
+        'mean_ms': round(float(latencies.mean()), 2),
+        'max_ms': round(float(latencies.max()), 2),
+    }
+    for percentile in (50, 95, 99):
+        summary[f'p{percentile}_ms'] = round(float(np.percentile(latencies, percentile)), 2)
+    if queries:
+        summary['queries_mean'] = round(sum(queries) / len(queries), 2)
+        summary['queries_max'] = max(queries)
+    return summary
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_benchmark(requests=1000, warmup=100, mix=None, server=False, concurrency=1, seed=0, trace_memory=False):
+    """
+    Run the benchmark and return the results dict: 'meta', 'overall' and
+    per-URL-name 'urls' (latency percentiles in ms, status counts, queries
+    per request). With `server`, `concurrency` client threads share the
+    load. `trace_memory` adds the peak Python heap (slower).
+    """
+    rng = random.Random(seed)
+    mix = mix or dict(DEFAULT_MIX)
+    samples = Samples(rng)
+    warmup_plan = plan(mix, warmup, samples, rng)
+    measured_plan = plan(mix, requests, samples, rng)
+
+    token = secrets.token_urlsafe(16)
+    with override_settings(EXPORT_TOKEN=token, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'localhost']):
+        driver = ServerDriver(token) if server else ClientDriver(token)
+        try:
+            for request in warmup_plan:
+                driver(*request)
+            if server:
+                driver.queries.clear()
+
+            if trace_memory:
+                tracemalloc.start()
+            results = []
+            started = time.perf_counter()
+            if server and concurrency > 1:
+                chunks = [measured_plan[i::concurrency] for i in range(concurrency)]
+                chunk_results = [[] for _ in chunks]
+
+                def work(chunk, found):
+                    found.extend((request[0], driver(*request)) for request in chunk)
+
+                threads = [threading.Thread(target=work, args=pair) for pair in zip(chunks, chunk_results)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                results = [item for found in chunk_results for item in found]
+            else:
+                results = [(request[0], driver(*request)) for request in measured_plan]
+            duration = time.perf_counter() - started
+            peak_traced = None
+            if trace_memory:
+                peak_traced = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+                tracemalloc.stop()
+        finally:
+            driver.close()
+
+    by_url = defaultdict(lambda: ([], [], []))
+    for name, (elapsed, status, queries) in results:
+        latencies, statuses, counts = by_url[name]
+        latencies.append(elapsed)
+        statuses.append(status)
+        if queries is not None:
+            counts.append(queries)
+    if server:
+        for name, counts in driver.queries.items():
+            if name in by_url:
+                by_url[name][2].extend(counts)
+
+    urls = {name: _summary(*by_url[name]) for name in sorted(by_url)}
+    overall = _summary(
+        [elapsed for _, (elapsed, _, _) in results],
+        [status for _, (_, status, _) in results],
+        [count for latencies, statuses, counts in by_url.values() for count in counts],
+    )
+    overall['requests_per_second'] = round(len(results) / duration, 1) if duration else None
+    overall['peak_rss_mb'] = _peak_rss_mb()
+    overall['peak_traced_mb'] = peak_traced
+
+    return {
+        'meta': {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'revision': _git_revision(),
+            'mode': 'server' if server else 'client',
+            'concurrency': concurrency if server else 1,
+            'requests': requests,
+            'warmup': warmup,
+            'seed': seed,
+            'mix': mix,
+            'vehicles': Vehicle.objects.count(),
+            'database': connection.vendor,
+            'debug': settings.DEBUG,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'duration_s': round(duration, 2),
+        },
+        'overall': overall,
+        'urls': urls,
+    }
+
+
+def compare(before, after):
+    """Rows of (url name, p95 before, p95 after, change %, queries before, queries after)"""
+    rows = []
+    for name in sorted(set(before['urls']) | set(after['urls'])):
+        old, new = before['urls'].get(name, {}), after['urls'].get(name, {})
+        old_p95, new_p95 = old.get('p95_ms'), new.get('p95_ms')
+        change = round((new_p95 - old_p95) / old_p95 * 100, 1) if old_p95 and new_p95 is not None else None
+        rows.append((name, old_p95, new_p95, change, old.get('queries_mean'), new.get('queries_mean')))
+    return rows
@@ -0,0 +1,147 @@
+# tyres/cache_backends.py
+"""
+In-process stand-in for Redis, for development and tests.
+
+LocalRedisCache is Django's RedisCache with the redis-py connection swapped
+for LocalRedis, which implements the handful of Redis commands the backend
+uses with Redis semantics (bytes values, atomic INCR, per-key expiry). Code
+that works against it works unchanged against a real Redis server:
+
+    'BACKEND': 'tyres.cache_backends.LocalRedisCache',
+    'LOCATION': 'redis://local/0',
+"""
+import threading
+import time
+
+from django.core.cache.backends.redis import RedisCache, RedisCacheClient, RedisSerializer
+
+# One LocalRedis per LOCATION, shared by every cache alias pointing at it (like one server)
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+def _encode(value):
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+class LocalRedis:
+    """Thread-safe dict with the subset of the Redis command set RedisCacheClient calls"""
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+
+    def _alive(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def get(self, key):
+        with self._lock:
+            return self._data[key] if self._alive(key) else None
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            self._data[key] = _encode(value)
+            self._expires.pop(key, None)
+            if ex is not None:
+                self._expires[key] = time.monotonic() + ex
+            return True
+
+    def mget(self, keys):
+        with self._lock:
+            return [self.get(key) for key in keys]
+
+    def mset(self, mapping):
+        with self._lock:
+            for key, value in mapping.items():
+                self.set(key, value)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            deleted = 0
+            for key in keys:
+                if self._alive(key):
+                    del self._data[key]
+                    self._expires.pop(key, None)
+                    deleted += 1
+            return deleted
+
+    def exists(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._alive(key))
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._expires[key] = time.monotonic() + seconds
+            return True
+
+    def persist(self, key):
+        with self._lock:
+            return self._alive(key) and self._expires.pop(key, None) is not None
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            current = self.get(key)
+            try:
+                value = int(current or 0) + amount
+            except ValueError:
+                raise ValueError("value is not an integer or out of range")
+            self._data[key] = _encode(value)
+            return value
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+            return True
+
+    def pipeline(self):
+        return LocalPipeline(self)
+
+
+class LocalPipeline:
+    """Buffers commands and runs them under the server lock on execute()"""
+
+    def __init__(self, server):
+        self._server = server
+        self._commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        with self._server._lock:
+            results = [getattr(self._server, name)(*args, **kwargs) for name, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+
+class LocalRedisCacheClient(RedisCacheClient):
+    def __init__(self, servers, serializer=None, **options):
+        self._servers = servers
+        self._serializer = serializer or RedisSerializer()
+
+    def get_client(self, key=None, *, write=False):
+        location = self._servers[0]
+        with _servers_lock:
+            return _servers.setdefault(location, LocalRedis())
+
+
+class LocalRedisCache(RedisCache):
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self._class = LocalRedisCacheClient
@@ -0,0 +1,227 @@
+# tyres/calculator.py
+import csv
+import functools
+import hashlib
+import io
+import json
+
+import numpy as np
+from django.core.exceptions import ValidationError
+
+from . import alternatives
+from .tyre_sizes import MM_PER_INCH, parse_tyre_size, tyre_dimensions
+
+MM_PER_KM = 1000000
+MM_PER_MILE = 1609344
+
+MAX_DIAMETER_DIFF = 3
+MAX_ALTERNATIVES = 6
+
+MAX_BATCH_SIZE = 1000
+
+# Accepted (min, max) of each dimension, enforced by TyreCalculatorForm
+WIDTH_RANGE = (50, 400)
+ASPECT_RATIO_RANGE = (20, 120)
+RIM_RANGE = (8, 30)
+
+# Distinct sizes whose responses are memoized per process
+MEMO_SIZE = 4096
+
+
+class BatchError(ValueError):
+    """A batch request that cannot be calculated; `errors` lists the bad rows"""
+
+    def __init__(self, message, errors=()):
+        super().__init__(message)
+        self.errors = list(errors)
+
+
+def percent_diff(diameter, reference):
+    return ((diameter - reference) / reference) * 100
+
+
+def speedo_error(diff):
+    return f"{'+' if diff > 0 else ''}{round(diff, 1)}%"
+
+
+def alternative_sizes(index, width, aspect_ratio, rim, diameter):
+    """Closest real sizes on the same rim, from the catalogue-wide size index"""
+    found = []
+    for alternative in index.alternatives(width, aspect_ratio, rim, MAX_DIAMETER_DIFF, MAX_ALTERNATIVES):
+        diff = percent_diff(alternative.diameter, diameter)
+        found.append({
+            'size': alternative.size,
+            'width': alternative.width,
+            'aspect_ratio': alternative.aspect_ratio,
+            'diameter_diff': round(diff, 1),
+            'speedo_error': speedo_error(diff),
+        })
+    return found
+
+
+def calculate_sizes(sizes, reference=None):
+    """
+    Calculate every (width, aspect_ratio, rim_diameter) in `sizes` at once.
+
+    Returns one dict per size in the same shape as the single-size calculator
+    response. With a `reference` size each result also gets its diameter
+    difference and speedometer error against it.
+    """
+    if not sizes:
+        return []
+    index = alternatives.get_index()
+    widths = np.array([size[0] for size in sizes], dtype=np.int64)
+    aspect_ratios = np.array([size[1] for size in sizes], dtype=np.int64)
+    rims = np.array([size[2] for size in sizes], dtype=np.float64)
+
+    sidewalls, diameters = tyre_dimensions(widths, aspect_ratios, rims)
+    circumferences = np.pi * diameters
+    revs_per_km = MM_PER_KM / circumferences
+    revs_per_mile = MM_PER_MILE / circumferences
+    width_inches = widths / MM_PER_INCH
+
+    if reference is not None:
+        _, reference_diameter = tyre_dimensions(*reference)
+        reference_diffs = percent_diff(diameters, reference_diameter).tolist()
+
+    # Building the response dicts is the only per-size Python work left;
+    # convert to lists once so it runs on plain floats
+    sidewalls, diameters, circumferences = sidewalls.tolist(), diameters.tolist(), circumferences.tolist()
+    revs_per_km, revs_per_mile, width_inches = revs_per_km.tolist(), revs_per_mile.tolist(), width_inches.tolist()
+
+    results = []
+    for i, (width, aspect_ratio, rim) in enumerate(sizes):
+        result = {
+            'metric_size': f"{width}/{aspect_ratio}R{rim:g}",
+            'imperial_size': f"{round(width_inches[i], 1)}-{rim:g}",
+            'diameter_mm': round(diameters[i], 1),
+            'diameter_inches': round(diameters[i] / MM_PER_INCH, 1),
+            'circumference_mm': round(circumferences[i], 1),
+            'circumference_inches': round(circumferences[i] / MM_PER_INCH, 1),
+            'sidewall_height': round(sidewalls[i], 1),
+            'revolutions_per_km': round(revs_per_km[i], 1),
+            'revolutions_per_mile': round(revs_per_mile[i], 1),
+            'alternative_sizes': alternative_sizes(index, width, aspect_ratio, rim, diameters[i]),
+        }
+        if reference is not None:
+            result['diameter_diff'] = round(reference_diffs[i], 1)
+            result['speedo_error'] = speedo_error(reference_diffs[i])
+        results.append(result)
+    return results
+
+
+def calculate_size(width, aspect_ratio, rim_diameter):
+    return calculate_sizes([(width, aspect_ratio, rim_diameter)])[0]
+
+
+@functools.lru_cache(maxsize=MEMO_SIZE)
+def _memoized_response(width, aspect_ratio, rim_diameter, generation):
+    body = json.dumps(calculate_size(width, aspect_ratio, rim_diameter)).encode()
+    return body, '"%s"' % hashlib.md5(body).hexdigest()
+
+
+def calculated_response(width, aspect_ratio, rim_diameter):
+    """
+    (JSON body, strong ETag) for a validated size, memoized per process.
+    Results include alternatives from the size index, so the memo is keyed
+    on the index generation as well and a rebuilt index starts afresh.
+    """
+    generation = alternatives.get_index().generation
+    return _memoized_response(width, aspect_ratio, rim_diameter, generation)
+
+
+def memo_stats():
+    """Hit/miss counters of the response memo"""
+    info = _memoized_response.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize}
+
+
+def clear_memo():
+    _memoized_response.cache_clear()
+
+
+def checked_size(width, aspect_ratio, rim_diameter):
+    """
+    The size as TyreCalculatorForm's fields clean it, so a batch accepts
+    exactly what the single-size calculator does. Raises ValueError.
+    """
+    from .forms import TyreCalculatorForm
+
+    size = []
+    for (name, field), value in zip(TyreCalculatorForm.base_fields.items(), (width, aspect_ratio, rim_diameter)):
+        try:
+            size.append(field.clean(value))
+        except ValidationError as e:
+            raise ValueError(f"{name}: {' '.join(e.messages)}")
+    return tuple(size)
+
+
+def read_size(item):
+    """
+    (width, aspect_ratio, rim_diameter) from a size string such as
+    '185/65R15' or a mapping with those three keys, each within the
+    calculator's ranges. Raises ValueError.
+    """
+    if isinstance(item, str):
+        spec = parse_tyre_size(item)
+        if spec is None or spec.width is None:
+            raise ValueError(f"'{item}' is not a metric tyre size")
+        return checked_size(spec.width, spec.aspect_ratio, spec.rim)
+    if isinstance(item, dict):
+        if item.get('size'):
+            return read_size(item['size'])
+        try:
+            return checked_size(item['width'], item['aspect_ratio'], item['rim_diameter'])
+        except KeyError as e:
+            raise ValueError(f"missing {e.args[0]}")
+    raise ValueError("expected a size string or an object")
+
+
+def read_sizes(items):
+    """Validate a batch of size items; raises BatchError listing every bad row"""
+    if not isinstance(items, list):
+        raise BatchError("Expected a list of sizes")
+    if not items:
+        raise BatchError("No sizes given")
+    if len(items) > MAX_BATCH_SIZE:
+        raise BatchError(f"At most {MAX_BATCH_SIZE} sizes per request")
+
+    sizes, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            sizes.append(read_size(item))
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+    if errors:
+        raise BatchError("Invalid sizes", errors)
+    return sizes
+
+
+def parse_json_batch(body):
+    """
+    A JSON batch is either a list of sizes or {"sizes": [...], "reference": ...}.
+    Returns (sizes, reference item or None).
+    """
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise BatchError("Invalid JSON")
+    if isinstance(data, dict):
+        return data.get('sizes'), data.get('reference')
+    return data, None
+
+
+def parse_csv_batch(text):
+    """
+    A CSV batch has a header row and either a `size` column or
+    width, aspect_ratio and rim_diameter columns.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    fields = {name.strip() for name in reader.fieldnames or []}
+    if 'size' not in fields and not {'width', 'aspect_ratio', 'rim_diameter'} <= fields:
+        raise BatchError("CSV needs a 'size' column or width, aspect_ratio and rim_diameter columns")
+    return [
+        {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        for row in reader
+        if any((value or '').strip() for value in row.values() if isinstance(value, str))
+    ]
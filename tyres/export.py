@@ -0,0 +1,140 @@
+# tyres/export.py
+"""
+Full-catalogue export as CSV or NDJSON, generated row by row so memory stays
+flat whatever the catalogue size. Vehicles (with their tyres) and pressure
+data are read with two chunked iterators ordered by vehicle id and merged.
+"""
+import csv
+import hmac
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .api import PRESSURE_FIELDS, TYRE_FIELDS, VEHICLE_FIELDS
+from .models import Vehicle, TyrePressureData
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Rows fetched from the database at a time
+CHUNK_SIZE = 2000
+# Rows serialized into one piece of output
+ROWS_PER_WRITE = 500
+
+# CSV has one row per pressure record (or one for a vehicle without any)
+CSV_COLUMNS = VEHICLE_FIELDS + TYRE_FIELDS + [f'pressure_{field}' for field in PRESSURE_FIELDS]
+
+
+def catalogue_rows(chunk_size=CHUNK_SIZE):
+    """(vehicle dict with its tyres, [pressure dicts]) for every vehicle, in id order"""
+    vehicles = Vehicle.objects.order_by('id').values(
+        'id', *VEHICLE_FIELDS, *(f'tyres__{field}' for field in TYRE_FIELDS)
+    ).iterator(chunk_size=chunk_size)
+    pressures = TyrePressureData.objects.order_by('vehicle_id', 'id').values(
+        'vehicle_id', *PRESSURE_FIELDS
+    ).iterator(chunk_size=chunk_size)
+
+    pending = next(pressures, None)
+    for row in vehicles:
+        found = []
+        while pending is not None and pending['vehicle_id'] <= row['id']:
+            if pending['vehicle_id'] == row['id']:
+                found.append({field: pending[field] for field in PRESSURE_FIELDS})
+            pending = next(pressures, None)
+
+        item = {field: row[field] for field in VEHICLE_FIELDS}
+        tyres = {field: row[f'tyres__{field}'] for field in TYRE_FIELDS}
+        item['tyres'] = tyres if any(value is not None for value in tyres.values()) else None
+        yield item, found
+
+
+class _Buffer:
+    """File-like object csv.writer writes into; collects output until taken"""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, value):
+        self.parts.append(value)
+
+    def take(self):
+        data, self.parts = ''.join(self.parts), []
+        return data
+
+
+def csv_chunks(rows):
+    buffer = _Buffer()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    empty_tyres = dict.fromkeys(TYRE_FIELDS)
+    for count, (item, pressures) in enumerate(rows, start=1):
+        base = [item[field] for field in VEHICLE_FIELDS]
+        base += [(item['tyres'] or empty_tyres)[field] for field in TYRE_FIELDS]
+        for pressure in pressures or [dict.fromkeys(PRESSURE_FIELDS)]:
+            writer.writerow(base + [pressure[field] for field in PRESSURE_FIELDS])
+        if count % ROWS_PER_WRITE == 0:
+            yield buffer.take()
+    yield buffer.take()
+
+
+def ndjson_chunks(rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    lines = []
+    for item, pressures in rows:
+        item['pressure_data'] = pressures
+        lines.append(encoder.encode(item) + '\n')
+        if len(lines) >= ROWS_PER_WRITE:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines)
+
+
+def export_chunks(format):
+    """The export as a stream of text chunks"""
+    chunks = csv_chunks if format == 'csv' else ndjson_chunks
+    return chunks(catalogue_rows())
+
+
+def gzip_chunks(chunks):
+    """Encode and gzip a stream of text chunks as it is produced"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def authorized(request):
+    """Staff users, or machines sending `Authorization: Bearer <EXPORT_TOKEN>`"""
+    token = getattr(settings, 'EXPORT_TOKEN', '')
+    header = request.headers.get('Authorization', '')
+    if token and header.startswith('Bearer ') and hmac.compare_digest(header[7:], token):
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_active and user.is_staff)
+
+
+def export_catalogue(request, format):
+    """Stream the whole catalogue, gzipped when the client accepts it"""
+    if not authorized(request):
+        response = HttpResponse('Authentication required', status=401, content_type='text/plain')
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    if format not in FORMATS:
+        return HttpResponse('Unknown format', status=404, content_type='text/plain')
+
+    chunks = export_chunks(format)
+    compress = 'gzip' in request.headers.get('Accept-Encoding', '')
+    response = StreamingHttpResponse(gzip_chunks(chunks) if compress else chunks, content_type=FORMATS[format])
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ['Accept-Encoding', 'Authorization'])
+    response['Content-Disposition'] = f'attachment; filename="catalogue.{format}"'
+    response['Cache-Control'] = 'private, no-store'
+    return response
@@ -0,0 +1,149 @@
+# tyres/facets.py
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+VERSION_KEY = 'facets:version'
+DATA_KEY = 'facets:data:{}'
+
+DATA_TIMEOUT = 24 * 60 * 60
+
+# How long a process trusts its local copy before re-checking the shared version
+LOCAL_TTL = 5
+
+_local = {'version': None, 'data': None, 'checked': 0.0}
+
+
+def vehicle_facet_values(vehicle):
+    return {
+        ('category', vehicle.category),
+        ('brand', vehicle.brand),
+        ('year', str(vehicle.year)),
+    }
+
+
+def tyre_facet_values(tyres):
+    values = set()
+    for width in (tyres.front_width, tyres.rear_width):
+        if width:
+            values.add(('width', str(width)))
+    for rim in (tyres.front_rim, tyres.rear_rim):
+        if rim:
+            values.add(('rim', str(rim)))
+    return values
+
+
+def compute_facet_counts(vehicles, tyre_sizes):
+    """
+    Count facet values over Vehicle and TyreSize querysets (one streamed query
+    each). Takes querysets so migrations can pass historical models.
+    """
+    counts = Counter()
+    for category, brand, year in vehicles.values_list('category', 'brand', 'year').iterator(chunk_size=5000):
+        counts.update({('category', category), ('brand', brand), ('year', str(year))})
+
+    rows = tyre_sizes.values_list('front_width', 'rear_width', 'front_rim', 'rear_rim').iterator(chunk_size=5000)
+    for front_width, rear_width, front_rim, rear_rim in rows:
+        counts.update({('width', str(w)) for w in (front_width, rear_width) if w})
+        counts.update({('rim', str(r)) for r in (front_rim, rear_rim) if r})
+    return counts
+
+
+def rebuild_facets():
+    """Recompute every facet count from the catalogue"""
+    from .models import Vehicle, TyreSize, FacetCount
+
+    counts = compute_facet_counts(Vehicle.objects.all(), TyreSize.objects.all())
+    with transaction.atomic():
+        FacetCount.objects.all().delete()
+        FacetCount.objects.bulk_create(
+            [FacetCount(facet=facet, value=value, count=count) for (facet, value), count in counts.items()],
+            batch_size=1000,
+        )
+        transaction.on_commit(bump_version)
+    return counts
+
+
+def apply_changes(removed=(), added=()):
+    """
+    Incrementally update counts: every (facet, value) pair in `removed` loses
+    one vehicle, every pair in `added` gains one. Pairs may repeat.
+    """
+    from .models import FacetCount
+
+    delta = Counter(added)
+    delta.subtract(Counter(removed))
+    delta = {pair: change for pair, change in delta.items() if change}
+    if not delta:
+        return
+
+    with transaction.atomic():
+        for (facet, value), change in delta.items():
+            updated = FacetCount.objects.filter(facet=facet, value=value).update(count=F('count') + change)
+            if not updated and change > 0:
+                FacetCount.objects.create(facet=facet, value=value, count=change)
+        FacetCount.objects.filter(count__lte=0).delete()
+        transaction.on_commit(bump_version)
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+    _local['checked'] = 0.0
+
+
+def clear_local():
+    _local.update(version=None, data=None, checked=0.0)
+
+
+def load_facets():
+    """Read facet counts from the database, shaped for the filter dropdowns"""
+    from .models import FacetCount
+
+    facets = {facet: [] for facet, _ in FacetCount.FACET_CHOICES}
+    for facet, value, count in FacetCount.objects.filter(count__gt=0).values_list('facet', 'value', 'count'):
+        if facet in ('year', 'width', 'rim'):
+            value = int(value)
+        facets.setdefault(facet, []).append((value, count))
+
+    facets['category'].sort()
+    facets['brand'].sort()
+    facets['year'].sort(reverse=True)
+    facets['width'].sort()
+    facets['rim'].sort()
+    return facets
+
+
+def get_facets():
+    """
+    Facet values and counts: {'brand': [('Honda', 12), ...], 'year': ..., ...}.
+
+    Served from a process-local copy that is re-validated against the shared
+    cache's version every LOCAL_TTL seconds; the database is only read when
+    the shared cache has no data for the current version.
+    """
+    now = time.monotonic()
+    if _local['data'] is not None and now - _local['checked'] < LOCAL_TTL:
+        return _local['data']
+
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from a fresh value so a cleared cache never matches a stale local copy
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+
+    if version != _local['version'] or _local['data'] is None:
+        data = cache.get(DATA_KEY.format(version))
+        if data is None:
+            data = load_facets()
+            cache.set(DATA_KEY.format(version), data, DATA_TIMEOUT)
+        _local['data'] = data
+        _local['version'] = version
+
+    _local['checked'] = now
+    return _local['data']
@@ -1,5 +1,7 @@
 from django import forms
+from .calculator import ASPECT_RATIO_RANGE, RIM_RANGE, WIDTH_RANGE
 from .models import VehicleSubmission
+from .pressures import to_psi
 
 class VehicleSubmissionForm(forms.ModelForm):
     class Meta:
@@ -29,4 +31,36 @@ class VehicleSubmissionForm(forms.ModelForm):
         if not (front or rear or tyre):
             raise forms.ValidationError("Please provide at least one tyre size")
         
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+
+class TyreCalculatorForm(forms.Form):
+    """Validates calculator input so bad values get a 400 instead of reaching the memo"""
+    width = forms.IntegerField(min_value=WIDTH_RANGE[0], max_value=WIDTH_RANGE[1])
+    aspect_ratio = forms.IntegerField(min_value=ASPECT_RATIO_RANGE[0], max_value=ASPECT_RATIO_RANGE[1])
+    rim_diameter = forms.IntegerField(min_value=RIM_RANGE[0], max_value=RIM_RANGE[1])
+
+    def canonical_query(self):
+        """The one query string a size is cached under, e.g. 'width=185&aspect_ratio=65&rim_diameter=15'"""
+        return '&'.join(f"{name}={self.cleaned_data[name]}" for name in self.fields)
+
+class PressureSearchForm(forms.Form):
+    """Pressure range in any unit; cleaned_data gains the bounds in PSI"""
+    UNIT_CHOICES = [('psi', 'PSI'), ('bar', 'bar'), ('kpa', 'kPa')]
+    AXLE_CHOICES = [('front', 'Front'), ('rear', 'Rear')]
+
+    min_pressure = forms.FloatField(required=False, min_value=0)
+    max_pressure = forms.FloatField(required=False, min_value=0)
+    unit = forms.ChoiceField(choices=UNIT_CHOICES, required=False)
+    axle = forms.ChoiceField(choices=AXLE_CHOICES, required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        unit = cleaned_data.get('unit') or 'psi'
+        for bound in ('min', 'max'):
+            value = cleaned_data.get(f'{bound}_pressure')
+            cleaned_data[f'{bound}_psi'] = None if value is None else to_psi(value, unit)
+        if None not in (cleaned_data['min_psi'], cleaned_data['max_psi']) and cleaned_data['min_psi'] > cleaned_data['max_psi']:
+            raise forms.ValidationError("Minimum pressure is above the maximum")
+        cleaned_data['axle'] = cleaned_data.get('axle') or 'front'
+        return cleaned_data
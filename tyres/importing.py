@@ -0,0 +1,165 @@
+# tyres/importing.py
+import time
+
+from django.db import IntegrityError, transaction
+
+from .models import Vehicle, TyreSize, vehicle_key
+from .signals import vehicles_bulk_created
+
+CATEGORIES = {code for code, _ in Vehicle.CATEGORY_CHOICES}
+
+TYRE_FIELDS = ['front_size', 'rear_size', 'tyre_size', 'front_pressure', 'rear_pressure']
+
+
+def identity_key(brand, model, year):
+    """Normalised (brand, model, year) identity used for duplicate detection"""
+    return (
+        ' '.join((brand or '').split()).casefold(),
+        ' '.join((model or '').split()).casefold(),
+        int(year),
+    )
+
+
+class ImportStats:
+    """Counters collected while importing"""
+
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+        self.errors = []  # (line number, message)
+        self.started = time.monotonic()
+
+    @property
+    def processed(self):
+        return self.created + self.skipped + len(self.errors)
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.processed / elapsed if elapsed else 0.0
+
+
+class BulkVehicleImporter:
+    """
+    Import vehicle rows (dicts shaped like the import CSV) with bulk_create.
+
+    Existing slugs are loaded once up front; rows are validated in Python and
+    written in batches of `batch_size`, each batch in its own transaction.
+    Invalid rows are recorded in `stats.errors` and never abort a batch.
+    """
+
+    def __init__(self, batch_size=1000, on_batch=None):
+        self.batch_size = batch_size
+        self.on_batch = on_batch
+        self.stats = ImportStats()
+        self.existing_slugs = None
+
+    def load_existing_slugs(self):
+        self.existing_slugs = set(
+            Vehicle.objects.values_list('slug', flat=True).iterator(chunk_size=10000)
+        )
+
+    def build(self, row):
+        """Validate a row and return unsaved (Vehicle, TyreSize) instances"""
+        brand = (row.get('brand') or '').strip()
+        model = (row.get('model') or '').strip()
+        category = (row.get('category') or '').strip().upper()
+
+        if not brand or not model:
+            raise ValueError("brand and model are required")
+        try:
+            year = int(row.get('year'))
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid year {row.get('year')!r}")
+        if category not in CATEGORIES:
+            raise ValueError(f"invalid category {row.get('category')!r}")
+
+        vehicle = Vehicle(
+            brand=brand,
+            model=model,
+            year=year,
+            category=category,
+            slug=vehicle_key(brand, model, year),
+        )
+        tyres = TyreSize(**{field: (row.get(field) or '').strip() for field in TYRE_FIELDS})
+        tyres.normalize_sizes()
+        tyres.normalize_pressures()
+        return vehicle, tyres
+
+    def run(self, rows):
+        """Import an iterable of rows; returns ImportStats"""
+        if self.existing_slugs is None:
+            self.load_existing_slugs()
+
+        batch = []
+        # Line numbers match the CSV file (line 1 is the header)
+        for line_no, row in enumerate(rows, start=2):
+            try:
+                vehicle, tyres = self.build(row)
+            except ValueError as e:
+                self.stats.errors.append((line_no, str(e)))
+                continue
+
+            if vehicle.slug in self.existing_slugs:
+                self.stats.skipped += 1
+                continue
+            self.existing_slugs.add(vehicle.slug)
+
+            batch.append((line_no, vehicle, tyres))
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+
+        if batch:
+            self.flush(batch)
+        return self.stats
+
+    def flush(self, batch):
+        saved, failed = self.insert(batch)
+        self.stats.errors.extend(failed)
+        self.stats.created += len(saved)
+        if saved:
+            vehicles_bulk_created.send(
+                sender=self.__class__,
+                vehicles=[vehicle for _, vehicle, _ in saved],
+                tyre_sizes=[tyres for _, _, tyres in saved],
+            )
+        if self.on_batch:
+            self.on_batch(self.stats)
+
+    def insert(self, batch):
+        """
+        Insert (key, Vehicle, TyreSize) items with bulk_create in one
+        transaction, or one by one if that hits an IntegrityError, so the
+        rest of the batch still lands. Returns (saved items, [(key, error)]).
+        """
+        try:
+            with transaction.atomic():
+                self._write(batch)
+            return batch, []
+        except IntegrityError:
+            # Isolate the offending rows
+            saved, failed = [], []
+            for item in batch:
+                key, vehicle, tyres = item
+                vehicle.pk = tyres.pk = None
+                try:
+                    with transaction.atomic():
+                        self._write([item])
+                    saved.append(item)
+                except IntegrityError as e:
+                    failed.append((key, str(e)))
+            return saved, failed
+
+    def _write(self, batch):
+        vehicles = Vehicle.objects.bulk_create([vehicle for _, vehicle, _ in batch])
+        tyre_sizes = []
+        for vehicle, (_, _, tyres) in zip(vehicles, batch):
+            tyres.vehicle = vehicle
+            tyre_sizes.append(tyres)
+        TyreSize.objects.bulk_create(tyre_sizes)
+        return list(zip(vehicles, tyre_sizes))
@@ -0,0 +1,154 @@
+# tyres/intake.py
+"""
+Intake for user vehicle submissions. The request only does the cheap part:
+match the submission against the catalogue and the pending submissions by
+its normalized key (one indexed lookup each), fold repeats into a vote, or
+insert it. Emailing the moderators and enriching the submission run on a
+small thread pool once the transaction has committed.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import mail_managers
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Vehicle, VehicleSubmission, vehicle_key
+from .pressures import parse_pressure
+from .tyre_sizes import parse_tyre_size
+
+logger = logging.getLogger(__name__)
+
+# receive_submission() outcomes
+LISTED = 'listed'    # the catalogue already has the vehicle
+VOTED = 'voted'      # folded into a pending submission for the same vehicle
+CREATED = 'created'  # new pending submission
+
+SIZE_FIELDS = ['front_size', 'rear_size', 'tyre_size']
+PRESSURE_FIELDS = ['front_pressure', 'rear_pressure']
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.SUBMISSION_WORKERS, thread_name_prefix='submission-intake'
+            )
+    return _executor
+
+
+def shutdown(wait=True):
+    """Stop the pool (waiting for queued tasks); the next task starts a new one"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+def _run(func, args, close_connections):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Submission task %s%r failed", func.__name__, args)
+    finally:
+        if close_connections:
+            # Worker threads get their own connections; don't leave them open
+            connections.close_all()
+
+
+def run_in_background(func, *args):
+    """
+    Run func(*args) on the intake pool once the current transaction commits.
+    With SUBMISSION_WORKERS = 0 it runs inline instead (still after commit).
+    """
+    if settings.SUBMISSION_WORKERS:
+        transaction.on_commit(lambda: get_executor().submit(_run, func, args, True))
+    else:
+        transaction.on_commit(lambda: _run(func, args, False))
+
+
+def receive_submission(form):
+    """
+    File a valid VehicleSubmissionForm. Returns (outcome, object):
+    (LISTED, vehicle), (VOTED, pending submission) or (CREATED, submission).
+    """
+    data = form.cleaned_data
+    key = vehicle_key(data['brand'], data['model'], data['year'])
+
+    vehicle = Vehicle.objects.filter(slug=key).first()
+    if vehicle is not None:
+        return LISTED, vehicle
+
+    with transaction.atomic():
+        pending = VehicleSubmission.objects.filter(
+            dedup_key=key, status='PENDING'
+        ).order_by('created_at', 'id').first()
+        if pending is not None:
+            # Count the vote, and take any tyre details the first submitter left out
+            changes = {
+                field: data[field] for field in SIZE_FIELDS + PRESSURE_FIELDS
+                if data.get(field) and not getattr(pending, field)
+            }
+            VehicleSubmission.objects.filter(pk=pending.pk).update(
+                vote_count=F('vote_count') + 1, updated_at=timezone.now(), **changes
+            )
+            pending.refresh_from_db(fields=['vote_count'])
+            return VOTED, pending
+
+        submission = form.save()
+        run_in_background(notify_moderators, submission.pk)
+        run_in_background(enrich_submission, submission.pk)
+    return CREATED, submission
+
+
+def notify_moderators(submission_id):
+    """Email the site managers about a new submission"""
+    submission = VehicleSubmission.objects.filter(pk=submission_id).first()
+    if submission is None:
+        return
+    sizes = ', '.join(getattr(submission, field) for field in SIZE_FIELDS if getattr(submission, field))
+    mail_managers(
+        f"New vehicle submission: {submission.brand} {submission.model} ({submission.year})",
+        f"Submitted by {submission.user_name} <{submission.user_email}>\n"
+        f"Category: {submission.get_category_display()}\n"
+        f"Tyre sizes: {sizes or '-'}\n"
+        f"Pressures: {submission.front_pressure or '-'} / {submission.rear_pressure or '-'}\n"
+        f"Source: {submission.source or '-'}\n\n"
+        f"{submission.comments}",
+    )
+
+
+def enrich_submission(submission_id):
+    """Add notes for the moderator: unreadable sizes or pressures, years already listed"""
+    submission = VehicleSubmission.objects.filter(pk=submission_id, status='PENDING').first()
+    if submission is None:
+        return
+
+    notes = []
+    for field in SIZE_FIELDS:
+        value = getattr(submission, field)
+        if value and parse_tyre_size(value) is None:
+            notes.append(f"Unrecognised {field.replace('_', ' ')} {value!r}")
+    for field in PRESSURE_FIELDS:
+        value = getattr(submission, field)
+        if value and parse_pressure(value) is None:
+            notes.append(f"Unrecognised {field.replace('_', ' ')} {value!r}")
+
+    years = list(
+        Vehicle.objects.filter(brand__iexact=submission.brand, model__iexact=submission.model)
+        .order_by('year').values_list('year', flat=True)
+    )
+    if years:
+        notes.append(f"Listed for {', '.join(map(str, years))}")
+
+    if notes:
+        admin_notes = '\n'.join(filter(None, [submission.admin_notes, *notes]))
+        VehicleSubmission.objects.filter(pk=submission.pk).update(admin_notes=admin_notes)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from tyres.approvals import approve_submissions
+from tyres.models import VehicleSubmission
+
+
+class Command(BaseCommand):
+    help = 'Approve pending vehicle submissions in bulk, rejecting ones already listed or duplicated'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help='Submission ids (default: every pending submission)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Submissions per transaction')
+
+    def handle(self, *args, **options):
+        submissions = VehicleSubmission.objects.all()
+        if options['ids']:
+            submissions = submissions.filter(pk__in=options['ids'])
+
+        stats = approve_submissions(submissions, batch_size=options['batch_size'])
+        for submission_id, message in stats.invalid:
+            self.stdout.write(self.style.WARNING(f"Submission #{submission_id} left pending: {message}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Approved {stats.approved} submissions; rejected {stats.already_listed} already listed "
+            f"and {stats.duplicates} duplicates"
+        ))
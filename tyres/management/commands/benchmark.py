@@ -0,0 +1,63 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from tyres.benchmark import compare, parse_mix, run_benchmark
+
+
+class Command(BaseCommand):
+    help = ('Replay a weighted traffic mix over every URL and report latency percentiles, '
+            'queries per request and peak memory')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help='Measured requests (default: 1000)')
+        parser.add_argument('--warmup', type=int, default=100, help='Unmeasured requests first, to fill caches')
+        parser.add_argument('--mix', default='',
+                            help="Weight overrides, e.g. 'vehicle_detail=500,export_catalogue=0'")
+        parser.add_argument('--server', action='store_true',
+                            help='Go over HTTP to a local threaded server instead of the test client')
+        parser.add_argument('--concurrency', type=int, default=4, help='Client threads with --server')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the request plan')
+        parser.add_argument('--trace-memory', action='store_true', help='Also report peak Python heap (slower)')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--compare', help='Earlier results file to compare p95 latency and queries with')
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+            if settings.DEBUG:
+                self.stdout.write(self.style.WARNING("DEBUG is on; numbers won't match production"))
+            results = run_benchmark(
+                requests=options['requests'], warmup=options['warmup'], mix=mix, server=options['server'],
+                concurrency=options['concurrency'], seed=options['seed'], trace_memory=options['trace_memory'],
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        self.stdout.write(f"{'URL':<28}{'n':>6}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}")
+        for name, summary in [*results['urls'].items(), ('overall', results['overall'])]:
+            self.stdout.write(
+                f"{name:<28}{summary['requests']:>6}{summary['errors']:>5}{summary['p50_ms']:>9}"
+                f"{summary['p95_ms']:>9}{summary['p99_ms']:>9}{summary.get('queries_mean', '-'):>9}"
+            )
+        overall = results['overall']
+        self.stdout.write(
+            f"{overall['requests_per_second']} requests/s over {results['meta']['vehicles']} vehicles; "
+            f"peak RSS {overall['peak_rss_mb']} MB"
+            + (f", peak traced heap {overall['peak_traced_mb']} MB" if overall['peak_traced_mb'] is not None else '')
+        )
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                before = json.load(f)
+            self.stdout.write(f"\n{'URL':<28}{'p95 before':>11}{'p95 after':>11}{'change':>9}{'queries':>14}")
+            for name, old_p95, new_p95, change, old_queries, new_queries in compare(before, results):
+                self.stdout.write(
+                    f"{name:<28}{str(old_p95):>11}{str(new_p95):>11}"
+                    f"{'' if change is None else f'{change:+.1f}%':>9}{f'{old_queries} -> {new_queries}':>14}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -1,36 +1,115 @@
-
 import csv
-from django.core.management.base import BaseCommand
+import json
+from django.core.management.base import BaseCommand, OutputWrapper
 from tyres.models import Vehicle
+from tyres.importing import identity_key
+from tyres.tyre_sizes import normalize_tyre_size
+
+REPORT_FIELDS = ['type', 'file', 'line', 'brand', 'model', 'year', 'detail']
+
 
 class Command(BaseCommand):
-    help = 'Check for duplicates in CSV before importing'
-    
+    help = 'Check CSV files for duplicates against the database and each other before importing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_files', nargs='*', default=['additional_vehicles.csv'],
+                            help='CSV files to check (default: additional_vehicles.csv)')
+        parser.add_argument('--format', choices=['text', 'csv', 'json'], default='text',
+                            help='Report format (default: text)')
+        parser.add_argument('--output', help='Write the report to this file instead of stdout')
+
     def handle(self, *args, **options):
-        csv_file = 'additional_vehicles.csv'
-        duplicates = []
-        
-        with open(csv_file, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            
-            for row in reader:
-                brand = row['brand'].strip()
-                model = row['model'].strip()
-                year = int(row['year'])
-                
-                # Check if exists
-                exists = Vehicle.objects.filter(
-                    brand__iexact=brand,
-                    model__iexact=model,
-                    year=year
-                ).exists()
-                
-                if exists:
-                    duplicates.append(f"{brand} {model} ({year})")
-        
-        if duplicates:
-            self.stdout.write(self.style.WARNING(f"Found {len(duplicates)} duplicates:"))
-            for dup in duplicates:
-                self.stdout.write(f"  - {dup}")
+        # One streamed query: normalised key -> tyre signature for the whole catalogue
+        existing = {}
+        rows = Vehicle.objects.values_list(
+            'brand', 'model', 'year', 'tyres__front_size_key', 'tyres__rear_size_key'
+        ).iterator(chunk_size=5000)
+        for brand, model, year, front_key, rear_key in rows:
+            existing[identity_key(brand, model, year)] = (front_key or '', rear_key or '')
+
+        findings = []
+        seen = {}  # key -> (file, line, tyre signature) of first occurrence in the inputs
+
+        for csv_file in options['csv_files']:
+            with open(csv_file, 'r', encoding='utf-8', newline='') as file:
+                for line_no, row in enumerate(csv.DictReader(file), start=2):
+                    findings.extend(self.check_row(csv_file, line_no, row, existing, seen))
+
+        self.write_report(findings, options)
+
+    def check_row(self, csv_file, line_no, row, existing, seen):
+        brand = (row.get('brand') or '').strip()
+        model = (row.get('model') or '').strip()
+
+        def finding(kind, detail=''):
+            return {
+                'type': kind, 'file': csv_file, 'line': line_no,
+                'brand': brand, 'model': model, 'year': row.get('year'), 'detail': detail,
+            }
+
+        if not brand or not model:
+            return [finding('invalid', 'missing brand' if not brand else 'missing model')]
+        try:
+            key = identity_key(brand, model, row.get('year'))
+        except (TypeError, ValueError):
+            return [finding('invalid', f"invalid year {row.get('year')!r}")]
+
+        same_size = row.get('tyre_size', '')
+        signature = (
+            normalize_tyre_size(row.get('front_size') or same_size),
+            normalize_tyre_size(row.get('rear_size') or same_size),
+        )
+
+        results = []
+        if key in existing:
+            results.append(finding('existing'))
+            if existing[key] != signature:
+                results.append(finding('conflict', 'tyre sizes differ from database: '
+                                       f"{self.describe(existing[key])} vs {self.describe(signature)}"))
+
+        if key in seen:
+            first_file, first_line, first_signature = seen[key]
+            results.append(finding('duplicate', f'first seen in {first_file} line {first_line}'))
+            if first_signature != signature:
+                results.append(finding('conflict', f'tyre sizes differ from {first_file} line {first_line}: '
+                                       f"{self.describe(first_signature)} vs {self.describe(signature)}"))
         else:
-            self.stdout.write(self.style.SUCCESS("No duplicates found! Safe to import."))
\ No newline at end of file
+            seen[key] = (csv_file, line_no, signature)
+
+        return results
+
+    def describe(self, signature):
+        front, rear = signature
+        return f"{front or '?'} / {rear or '?'}"
+
+    def write_report(self, findings, options):
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else None
+        stream = OutputWrapper(output) if output else self.stdout
+
+        try:
+            if options['format'] == 'json':
+                stream.write(json.dumps(findings, indent=2))
+            elif options['format'] == 'csv':
+                writer = csv.DictWriter(stream, fieldnames=REPORT_FIELDS)
+                writer.writeheader()
+                writer.writerows(findings)
+            else:
+                self.write_text(findings, stream)
+        finally:
+            if output:
+                output.close()
+
+    def write_text(self, findings, stream):
+        if not findings:
+            stream.write("No duplicates found! Safe to import.", self.style.SUCCESS)
+            return
+
+        for kind, title in [('existing', 'already in database'), ('duplicate', 'duplicated within the files'),
+                            ('conflict', 'with conflicting tyre data'), ('invalid', 'invalid rows')]:
+            matches = [f for f in findings if f['type'] == kind]
+            if not matches:
+                continue
+            stream.write(f"Found {len(matches)} {title}:", self.style.WARNING)
+            for f in matches:
+                detail = f" - {f['detail']}" if f['detail'] else ''
+                stream.write(f"  - {f['brand']} {f['model']} ({f['year']}) [{f['file']}:{f['line']}]{detail}")
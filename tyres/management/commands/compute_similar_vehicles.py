@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+from tyres.similarity import TOP_K, compute_similar_vehicles
+
+
+class Command(BaseCommand):
+    help = 'Precompute the most similar vehicles for every vehicle (shown on the detail page)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only recompute vehicles that are new, changed or affected by changes')
+        parser.add_argument('--top-k', type=int, default=TOP_K, help='Neighbours stored per vehicle')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = compute_similar_vehicles(incremental=options['incremental'], k=options['top_k'])
+        elapsed = time.perf_counter() - started
+        if count:
+            self.stdout.write(self.style.SUCCESS(f"Recomputed similar vehicles for {count} vehicles in {elapsed:.1f}s"))
+        else:
+            self.stdout.write(self.style.WARNING("Similar vehicles are up to date"))
@@ -0,0 +1,44 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from tyres.export import FORMATS, export_chunks, gzip_chunks
+
+
+class Command(BaseCommand):
+    help = 'Export every vehicle with its tyre sizes and pressure data as CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', default='-', help="File to write (default '-': standard output)")
+        parser.add_argument('--gzip', action='store_true', help='Gzip the output (needs --output)')
+
+    def handle(self, *args, **options):
+        chunks = export_chunks(options['format'])
+        output = options['output']
+        if output == '-':
+            if options['gzip']:
+                raise CommandError('--gzip needs --output')
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        started = time.perf_counter()
+        # Written next to the target and renamed, so readers never see a partial export
+        temp_path = f"{output}.tmp"
+        try:
+            if options['gzip']:
+                with open(temp_path, 'wb') as f:
+                    for data in gzip_chunks(chunks):
+                        f.write(data)
+            else:
+                with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+            os.replace(temp_path, output)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        elapsed = time.perf_counter() - started
+        self.stderr.write(self.style.SUCCESS(f"Exported the catalogue to {output} in {elapsed:.1f}s"))
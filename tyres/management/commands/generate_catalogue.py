@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from tyres.synthetic import SyntheticCatalogueImporter, synthetic_rows
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with a synthetic catalogue (e.g. 10000, 100000 or 1000000 vehicles) for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('vehicles', type=int, help='Number of vehicles to generate')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same catalogue')
+        parser.add_argument('--pressure-fraction', type=float, default=0.3,
+                            help='Share of vehicles that get a pressure chart (default: 0.3)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create batch/transaction')
+
+    def handle(self, *args, **options):
+        def progress(stats):
+            self.stdout.write(f"  {stats.processed} rows, {stats.rows_per_second:.0f} rows/s")
+
+        importer = SyntheticCatalogueImporter(batch_size=options['batch_size'], on_batch=progress)
+        stats = importer.run(synthetic_rows(
+            options['vehicles'], seed=options['seed'], pressure_fraction=options['pressure_fraction'],
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {stats.created} vehicles ({stats.skipped} already present) in {stats.elapsed:.1f}s"
+        ))
+        self.stdout.write("Run compute_similar_vehicles to fill in similar vehicles")
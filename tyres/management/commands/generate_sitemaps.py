@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from tyres.sitemap import generate_sitemaps, sitemap_root
+
+
+class Command(BaseCommand):
+    help = 'Pre-generate sitemap.xml and its shards to SITEMAP_ROOT, rewriting only shards that changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default=getattr(settings, 'SITE_URL', ''),
+                            help='Absolute site URL used in the sitemaps (default: SITE_URL setting)')
+        parser.add_argument('--force', action='store_true', help='Rewrite every shard')
+
+    def handle(self, *args, **options):
+        written, kept = generate_sitemaps(options['base_url'], force=options['force'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} sitemap shards, kept {kept} unchanged, in {sitemap_root()}"
+        ))
@@ -1,17 +1,26 @@
 import csv
 from django.core.management.base import BaseCommand
-from django.utils.text import slugify
-from tyres.models import Vehicle, TyreSize
+from tyres.models import Vehicle, TyreSize, vehicle_key
+from tyres.importing import BulkVehicleImporter
 
 class Command(BaseCommand):
     help = 'Import 100+ vehicles from CSV file'
     
     def add_arguments(self, parser):
         parser.add_argument('csv_file', type=str, help='Path to CSV file')
+        parser.add_argument('--bulk', action='store_true',
+                            help='Stream the file and write vehicles with bulk_create in batches')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows per bulk_create batch/transaction (default: 1000)')
     
     def handle(self, *args, **kwargs):
         csv_file = kwargs['csv_file']
         
+        if kwargs['bulk']:
+            self.bulk_import(csv_file, kwargs['batch_size'])
+            self.print_summary()
+            return
+        
         with open(csv_file, 'r', encoding='utf-8') as file:
             reader = csv.DictReader(file)
             count = 0
@@ -20,7 +29,7 @@ class Command(BaseCommand):
             for row in reader:
                 try:
                     # Check if vehicle already exists
-                    slug = slugify(f"{row['brand']} {row['model']} {row['year']}")
+                    slug = vehicle_key(row['brand'], row['model'], row['year'])
                     
                     if Vehicle.objects.filter(slug=slug).exists():
                         self.stdout.write(f"Skipping existing: {row['brand']} {row['model']}")
@@ -36,8 +45,8 @@ class Command(BaseCommand):
                         slug=slug
                     )
                     
-                    # Create tyre size
-                    TyreSize.objects.create(
+                    # Create tyre size (canonical keys are derived on save)
+                    tyres = TyreSize.objects.create(
                         vehicle=vehicle,
                         front_size=row.get('front_size', ''),
                         rear_size=row.get('rear_size', ''),
@@ -46,6 +55,12 @@ class Command(BaseCommand):
                         rear_pressure=row.get('rear_pressure', ''),
                     )
                     
+                    if not (tyres.front_size_key or tyres.rear_size_key):
+                        self.stdout.write(self.style.WARNING(
+                            f"Unrecognised tyre size for {row['brand']} {row['model']}: "
+                            f"{row.get('front_size') or row.get('tyre_size') or '(blank)'}"
+                        ))
+                    
                     count += 1
                     self.stdout.write(f"Added: {row['brand']} {row['model']} ({row['year']})")
                     
@@ -56,6 +71,29 @@ class Command(BaseCommand):
         if skipped > 0:
             self.stdout.write(f"⏭️ Skipped {skipped} existing vehicles")
         
+        self.print_summary()
+    
+    def bulk_import(self, csv_file, batch_size):
+        def progress(stats):
+            self.stdout.write(f"  {stats.processed} rows processed ({stats.rows_per_second:.0f} rows/sec)")
+        
+        importer = BulkVehicleImporter(batch_size=batch_size, on_batch=progress)
+        with open(csv_file, 'r', encoding='utf-8', newline='') as file:
+            stats = importer.run(csv.DictReader(file))
+        
+        for line_no, message in stats.errors:
+            self.stdout.write(self.style.ERROR(f"Line {line_no}: {message}"))
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ Successfully imported {stats.created} vehicles "
+            f"in {stats.elapsed:.2f}s ({stats.rows_per_second:.0f} rows/sec)"
+        ))
+        if stats.skipped:
+            self.stdout.write(f"⏭️ Skipped {stats.skipped} existing vehicles")
+        if stats.errors:
+            self.stdout.write(self.style.WARNING(f"⚠️ {len(stats.errors)} rows had errors"))
+    
+    def print_summary(self):
         # Display summary
         total = Vehicle.objects.count()
         cars = Vehicle.objects.filter(category='CAR').count()
@@ -153,8 +153,9 @@ class Command(BaseCommand):
                 category=vehicle_data['category']
             )
             
-            # Create tyre size
-            tyre_size = TyreSize.objects.create(
+            # Create tyre size - widths, aspect ratios and rims are parsed
+            # from the size strings by TyreSize.normalize_sizes() on save
+            TyreSize.objects.create(
                 vehicle=vehicle,
                 front_size=vehicle_data.get('front_size', ''),
                 rear_size=vehicle_data.get('rear_size', ''),
@@ -163,35 +164,6 @@ class Command(BaseCommand):
                 rear_pressure=vehicle_data.get('rear_pressure', '')
             )
             
-            # Parse detailed dimensions if available
-            if 'front_size' in vehicle_data and '/' in vehicle_data['front_size']:
-                try:
-                    parts = vehicle_data['front_size'].split('/')
-                    if len(parts) >= 2:
-                        tyre_size.front_width = int(parts[0])
-                        second_part = parts[1]
-                        if '-' in second_part:
-                            aspect_ratio, rim = second_part.split('-')
-                            tyre_size.front_aspect_ratio = int(aspect_ratio)
-                            tyre_size.front_rim = int(rim.replace('R', '').replace('r', ''))
-                except:
-                    pass
-            
-            if 'rear_size' in vehicle_data and '/' in vehicle_data['rear_size']:
-                try:
-                    parts = vehicle_data['rear_size'].split('/')
-                    if len(parts) >= 2:
-                        tyre_size.rear_width = int(parts[0])
-                        second_part = parts[1]
-                        if '-' in second_part:
-                            aspect_ratio, rim = second_part.split('-')
-                            tyre_size.rear_aspect_ratio = int(aspect_ratio)
-                            tyre_size.rear_rim = int(rim.replace('R', '').replace('r', ''))
-                except:
-                    pass
-            
-            tyre_size.save()
-            
             self.stdout.write(f'Added: {vehicle.brand} {vehicle.model} ({vehicle.year})')
         
         self.stdout.write(self.style.SUCCESS('Successfully added sample data!'))
\ No newline at end of file
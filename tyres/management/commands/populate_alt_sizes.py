@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from tyres.alternatives import build_index
+from tyres.models import TyreSize
+
+FIELDS = ['alt_size_1', 'alt_size_2', 'alt_size_3']
+
+
+class Command(BaseCommand):
+    help = 'Fill TyreSize alternative sizes from the catalogue-wide size index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--overwrite', action='store_true',
+                            help='Replace alternative sizes that are already filled in')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        index = build_index()
+        self.stdout.write(f"Size index: {len(index)} distinct sizes")
+
+        tyre_sizes = TyreSize.objects.only('id', 'front_width', 'front_aspect_ratio', 'front_rim', *FIELDS)
+        if not options['overwrite']:
+            tyre_sizes = tyre_sizes.filter(alt_size_1='', alt_size_2='', alt_size_3='')
+
+        batch, updated = [], 0
+        for tyres in tyre_sizes.iterator(chunk_size=options['batch_size']):
+            if tyres.fill_alternative_sizes(index, overwrite=options['overwrite']):
+                batch.append(tyres)
+            if len(batch) >= options['batch_size']:
+                TyreSize.objects.bulk_update(batch, FIELDS)
+                updated += len(batch)
+                batch = []
+        TyreSize.objects.bulk_update(batch, FIELDS)
+        updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Updated alternative sizes for {updated} vehicles"))
@@ -0,0 +1,33 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from tyres.prerender import CHUNK_SIZE, prerender, prerender_root
+
+
+class Command(BaseCommand):
+    help = 'Render vehicle pages and category/brand listings to PRERENDER_ROOT, only re-rendering what changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default=getattr(settings, 'SITE_URL', ''),
+                            help='Site URL the pages are rendered for (default: SITE_URL setting)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Rendering processes (default: one per CPU)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Pages per worker task')
+        parser.add_argument('--force', action='store_true', help='Re-render every page')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written, unchanged, failed = prerender(
+            options['base_url'], workers=options['workers'],
+            force=options['force'], chunk_size=options['chunk_size'],
+        )
+        elapsed = time.perf_counter() - started
+        for url, error in sorted(failed.items()):
+            self.stdout.write(self.style.WARNING(f"Failed {url}: {error}"))
+        if failed and not written:
+            raise CommandError(f"All {len(failed)} pages failed to render; nothing was written")
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {written} pages ({unchanged} vehicles unchanged) to {prerender_root()} in {elapsed:.1f}s"
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from tyres.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed filter facet counts from the catalogue'
+
+    def handle(self, *args, **options):
+        counts = rebuild_facets()
+        facets = {facet for facet, _ in counts}
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(counts)} facet values across {len(facets)} facets"
+        ))
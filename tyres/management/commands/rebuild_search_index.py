@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand, CommandError
+from tyres import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index (SQLite FTS5) from the catalogue'
+
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            raise CommandError('Full-text search index is only available on SQLite with FTS5')
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} vehicles"))
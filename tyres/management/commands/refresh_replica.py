@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from tyres.replica import refresh_replica
+
+
+class Command(BaseCommand):
+    help = ('Copy the primary database to the read replica file, swap it into place atomically and drop '
+            'the caches built from the old copy. Replica reads lag edits until this runs')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.REPLICA_PATH, help='Replica file (default: settings.REPLICA_PATH)')
+
+    def handle(self, *args, **options):
+        size = refresh_replica(options['output'])
+        self.stdout.write(self.style.SUCCESS(f"Replica {options['output']} refreshed ({size // 1024} KB)"))
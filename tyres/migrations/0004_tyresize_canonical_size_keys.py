@@ -0,0 +1,134 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:35
+
+import re
+
+from django.db import migrations, models
+
+
+# The size parser as of this migration (tyres/tyre_sizes.py), frozen so
+# later changes to it don't change what this migration does.
+METRIC_RE = re.compile(
+    r'^(?:P|LT|T)?(\d{2,3})\s*/\s*(\d{2,3})'
+    r'(?:\s*(ZR|R|B|D|-)\s*|\s+)'
+    r'(\d{1,2}(?:\.\d)?)\b'
+)
+IMPERIAL_RE = re.compile(
+    r'^(\d{1,2}\.\d{1,2})(?:\s*(R|B|D|-)\s*|\s+)(\d{1,2}(?:\.\d)?)\b'
+)
+FLOTATION_RE = re.compile(
+    r'^(\d{2})\s*X\s*(\d{1,2}(?:\.\d{1,2})?)(?:\s*(R|B|D|-)\s*|\s+)(\d{2}(?:\.\d)?)\b'
+)
+
+
+def _number(text):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def _format_number(value):
+    return str(value) if isinstance(value, int) else f"{value:g}"
+
+
+def _construction(text):
+    return text if text in ('ZR', 'R', 'B', 'D', '-') else '-'
+
+
+def make_key(width, aspect_ratio, rim):
+    return f"{width}/{aspect_ratio}-{_format_number(rim)}"
+
+
+def parse_tyre_size(text):
+    """(key, width, aspect ratio, construction, rim), or None"""
+    if not text:
+        return None
+    text = text.strip().upper()
+
+    match = METRIC_RE.match(text)
+    if match:
+        width, aspect_ratio, construction, rim = match.groups()
+        width, aspect_ratio, rim = int(width), int(aspect_ratio), _number(rim)
+        return make_key(width, aspect_ratio, rim), width, aspect_ratio, _construction(construction), rim
+
+    match = IMPERIAL_RE.match(text)
+    if match:
+        width, construction, rim = match.groups()
+        key = f"{float(width):.2f}-{_format_number(_number(rim))}"
+        return key, None, None, _construction(construction), _number(rim)
+
+    match = FLOTATION_RE.match(text)
+    if match:
+        diameter, width, construction, rim = match.groups()
+        key = f"{diameter}X{_format_number(_number(width))}-{_format_number(_number(rim))}"
+        return key, None, None, _construction(construction), _number(rim)
+
+    return None
+
+
+def normalize_tyre_fields(tyres):
+    for prefix in ('front', 'rear'):
+        spec = parse_tyre_size(getattr(tyres, f'{prefix}_size') or tyres.tyre_size)
+
+        if spec is None:
+            width = getattr(tyres, f'{prefix}_width')
+            aspect_ratio = getattr(tyres, f'{prefix}_aspect_ratio')
+            rim = getattr(tyres, f'{prefix}_rim')
+            key = make_key(width, aspect_ratio, rim) if width and aspect_ratio and rim else ''
+            setattr(tyres, f'{prefix}_size_key', key)
+            continue
+
+        key, width, aspect_ratio, construction, rim = spec
+        setattr(tyres, f'{prefix}_size_key', key)
+        setattr(tyres, f'{prefix}_construction', construction)
+        if width is not None:
+            setattr(tyres, f'{prefix}_width', width)
+            setattr(tyres, f'{prefix}_aspect_ratio', aspect_ratio)
+        if isinstance(rim, int):
+            setattr(tyres, f'{prefix}_rim', rim)
+    return tyres
+
+
+def backfill_size_keys(apps, schema_editor):
+    TyreSize = apps.get_model('tyres', 'TyreSize')
+    fields = [
+        'front_size_key', 'front_construction', 'front_width', 'front_aspect_ratio', 'front_rim',
+        'rear_size_key', 'rear_construction', 'rear_width', 'rear_aspect_ratio', 'rear_rim',
+    ]
+    batch = []
+    for tyres in TyreSize.objects.iterator(chunk_size=2000):
+        batch.append(normalize_tyre_fields(tyres))
+        if len(batch) >= 2000:
+            TyreSize.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        TyreSize.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tyres', '0003_tyrepressuredata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tyresize',
+            name='front_construction',
+            field=models.CharField(blank=True, max_length=2, verbose_name='Front Construction'),
+        ),
+        migrations.AddField(
+            model_name='tyresize',
+            name='front_size_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='tyresize',
+            name='rear_construction',
+            field=models.CharField(blank=True, max_length=2, verbose_name='Rear Construction'),
+        ),
+        migrations.AddField(
+            model_name='tyresize',
+            name='rear_size_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(backfill_size_keys, migrations.RunPython.noop),
+    ]
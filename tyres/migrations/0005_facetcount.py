@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:41
+
+from django.db import migrations, models
+
+from tyres.facets import compute_facet_counts
+
+
+def populate_facets(apps, schema_editor):
+    Vehicle = apps.get_model('tyres', 'Vehicle')
+    TyreSize = apps.get_model('tyres', 'TyreSize')
+    FacetCount = apps.get_model('tyres', 'FacetCount')
+    counts = compute_facet_counts(Vehicle.objects.all(), TyreSize.objects.all())
+    FacetCount.objects.bulk_create(
+        [FacetCount(facet=facet, value=value, count=count) for (facet, value), count in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tyres', '0004_tyresize_canonical_size_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('category', 'Category'), ('brand', 'Brand'), ('year', 'Year'), ('width', 'Tyre Width'), ('rim', 'Rim Size')], max_length=20)),
+                ('value', models.CharField(max_length=50)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('facet', 'value')},
+            },
+        ),
+        migrations.RunPython(populate_facets, migrations.RunPython.noop),
+    ]
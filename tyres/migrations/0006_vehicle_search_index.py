@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:02
+
+from django.db import migrations
+
+from tyres import search
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Vehicle = apps.get_model('tyres', 'Vehicle')
+    search.create_tables(schema_editor)
+    search.rebuild_index(Vehicle.objects.all(), using=schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    search.drop_tables(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tyres', '0005_facetcount'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
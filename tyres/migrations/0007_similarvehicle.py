@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tyres', '0006_vehicle_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarVehicle',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('stale', models.BooleanField(default=False)),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to_links', to='tyres.vehicle')),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_links', to='tyres.vehicle')),
+            ],
+            options={
+                'ordering': ['vehicle', 'rank'],
+                'unique_together': {('vehicle', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+from tyres.pressures import PRESSURE_DATA_FIELDS, TYRE_SIZE_FIELDS, backfill_pressures
+
+
+def backfill(apps, schema_editor):
+    backfill_pressures(apps.get_model('tyres', 'TyreSize'), TYRE_SIZE_FIELDS)
+    backfill_pressures(apps.get_model('tyres', 'TyrePressureData'), PRESSURE_DATA_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tyres', '0007_similarvehicle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tyrepressuredata',
+            name='cold_front_psi',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tyrepressuredata',
+            name='cold_rear_psi',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tyrepressuredata',
+            name='full_load_front_psi',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tyrepressuredata',
+            name='full_load_rear_psi',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tyrepressuredata',
+            name='hot_front_psi',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tyrepressuredata',
+            name='hot_rear_psi',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tyrepressuredata',
+            name='light_load_front_psi',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tyrepressuredata',
+            name='light_load_rear_psi',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tyrepressuredata',
+            name='max_front_psi',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tyrepressuredata',
+            name='max_rear_psi',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tyrepressuredata',
+            name='standard_front_psi',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tyrepressuredata',
+            name='standard_rear_psi',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tyresize',
+            name='front_pressure_psi',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tyresize',
+            name='rear_pressure_psi',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:11
+
+from django.db import migrations, models
+
+from tyres.models import vehicle_key
+
+
+def backfill_dedup_keys(apps, schema_editor):
+    VehicleSubmission = apps.get_model('tyres', 'VehicleSubmission')
+    batch = []
+    for submission in VehicleSubmission.objects.only('id', 'brand', 'model', 'year').iterator(chunk_size=2000):
+        submission.dedup_key = vehicle_key(submission.brand, submission.model, submission.year)
+        batch.append(submission)
+        if len(batch) >= 2000:
+            VehicleSubmission.objects.bulk_update(batch, ['dedup_key'])
+            batch = []
+    if batch:
+        VehicleSubmission.objects.bulk_update(batch, ['dedup_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tyres', '0008_numeric_pressures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehiclesubmission',
+            name='dedup_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='vehiclesubmission',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=1, help_text='Submissions folded into this one'),
+        ),
+        migrations.RunPython(backfill_dedup_keys, migrations.RunPython.noop),
+    ]
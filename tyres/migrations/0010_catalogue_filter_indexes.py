@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tyres', '0009_submission_dedup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tyresize',
+            index=models.Index(fields=['front_width', 'front_rim', 'vehicle'], name='tyresize_front_width_rim_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tyresize',
+            index=models.Index(fields=['rear_width', 'rear_rim', 'vehicle'], name='tyresize_rear_width_rim_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tyresize',
+            index=models.Index(fields=['front_rim', 'vehicle'], name='tyresize_front_rim_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tyresize',
+            index=models.Index(fields=['rear_rim', 'vehicle'], name='tyresize_rear_rim_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['brand', 'model', 'year'], name='vehicle_brand_model_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['category', 'brand', 'model', 'year'], name='vehicle_category_brand_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['model'], name='vehicle_model_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['year'], name='vehicle_year_idx'),
+        ),
+    ]
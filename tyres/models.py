@@ -1,5 +1,12 @@
 # tyres/models.py
 from django.db import models
+from django.utils.text import slugify
+from .tyre_sizes import normalize_tyre_fields
+from .pressures import normalize_pressure_fields, PRESSURE_DATA_FIELDS, TYRE_SIZE_FIELDS
+
+def vehicle_key(brand, model, year):
+    """Normalized identity of a vehicle; the slug the importer gives it"""
+    return slugify(f"{brand} {model} {year}")
 
 class Vehicle(models.Model):
     CATEGORY_CHOICES = [
@@ -20,15 +27,23 @@ class Vehicle(models.Model):
         ordering = ['brand', 'model', 'year']
         verbose_name = 'Vehicle'
         verbose_name_plural = 'Vehicles'
+        # The catalogue filters and sort orders (views.VEHICLE_ORDERINGS); an
+        # index also holds the rowid, so it supplies the trailing 'id' of a
+        # keyset ordering too
+        indexes = [
+            models.Index(fields=['brand', 'model', 'year'], name='vehicle_brand_model_year_idx'),
+            models.Index(fields=['category', 'brand', 'model', 'year'], name='vehicle_category_brand_idx'),
+            models.Index(fields=['model'], name='vehicle_model_idx'),
+            models.Index(fields=['year'], name='vehicle_year_idx'),
+        ]
     
     def __str__(self):
         return f"{self.brand} {self.model} ({self.year})"
     
     def save(self, *args, **kwargs):
         if not self.slug:
-            # Create slug from brand, model, year
-            slug_text = f"{self.brand.lower()}-{self.model.lower()}-{self.year}"
-            self.slug = slug_text.replace(' ', '-')
+            # Same slug as the importer and submission dedup give it
+            self.slug = vehicle_key(self.brand, self.model, self.year)
         super().save(*args, **kwargs)
 
 class TyreSize(models.Model):
@@ -40,6 +55,9 @@ class TyreSize(models.Model):
     front_aspect_ratio = models.IntegerField(null=True, blank=True, verbose_name="Front Aspect Ratio (%)")
     front_rim = models.IntegerField(null=True, blank=True, verbose_name="Front Rim Diameter (inches)")
     front_pressure = models.CharField(max_length=20, blank=True, verbose_name="Front Pressure (PSI)")
+    front_pressure_psi = models.FloatField(null=True, blank=True, db_index=True, editable=False)
+    front_construction = models.CharField(max_length=2, blank=True, verbose_name="Front Construction")
+    front_size_key = models.CharField(max_length=20, blank=True, db_index=True, editable=False)
     
     # Rear tyre
     rear_size = models.CharField(max_length=20, blank=True, verbose_name="Rear Tyre Size")
@@ -47,6 +65,9 @@ class TyreSize(models.Model):
     rear_aspect_ratio = models.IntegerField(null=True, blank=True, verbose_name="Rear Aspect Ratio (%)")
     rear_rim = models.IntegerField(null=True, blank=True, verbose_name="Rear Rim Diameter (inches)")
     rear_pressure = models.CharField(max_length=20, blank=True, verbose_name="Rear Pressure (PSI)")
+    rear_pressure_psi = models.FloatField(null=True, blank=True, db_index=True, editable=False)
+    rear_construction = models.CharField(max_length=2, blank=True, verbose_name="Rear Construction")
+    rear_size_key = models.CharField(max_length=20, blank=True, db_index=True, editable=False)
     
     # For vehicles with same tyres front & rear
     tyre_size = models.CharField(max_length=20, blank=True, verbose_name="Tyre Size (if same)")
@@ -54,9 +75,56 @@ class TyreSize(models.Model):
     notes = models.TextField(blank=True, verbose_name="Additional Notes")
     last_updated = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        # Width and rim filters match either axle (front_width = x OR
+        # rear_width = x), which SQLite answers with one index per axle. The
+        # views only want vehicle_id from these rows, so the index has it too
+        indexes = [
+            models.Index(fields=['front_width', 'front_rim', 'vehicle'], name='tyresize_front_width_rim_idx'),
+            models.Index(fields=['rear_width', 'rear_rim', 'vehicle'], name='tyresize_rear_width_rim_idx'),
+            models.Index(fields=['front_rim', 'vehicle'], name='tyresize_front_rim_idx'),
+            models.Index(fields=['rear_rim', 'vehicle'], name='tyresize_rear_rim_idx'),
+        ]
+    
     def __str__(self):
         return f"Tyre sizes for {self.vehicle}"
     
+    def save(self, *args, **kwargs):
+        self.normalize_sizes()
+        self.normalize_pressures()
+        super().save(*args, **kwargs)
+    
+    def normalize_sizes(self):
+        """Derive canonical size keys and dimensions from the size strings"""
+        return normalize_tyre_fields(self)
+    
+    def normalize_pressures(self):
+        """Derive the numeric PSI columns from the pressure strings"""
+        return normalize_pressure_fields(self, TYRE_SIZE_FIELDS)
+    
+    def fill_alternative_sizes(self, index=None, overwrite=False):
+        """
+        Fill alt_size_1..3 with the real sizes closest in diameter to the
+        front tyre. Returns True if any field changed; does not save.
+        """
+        from .alternatives import get_index
+
+        if not (self.front_width and self.front_aspect_ratio and self.front_rim):
+            return False
+        fields = ['alt_size_1', 'alt_size_2', 'alt_size_3']
+        if not overwrite and any(getattr(self, field) for field in fields):
+            return False
+
+        index = index or get_index()
+        found = index.alternatives(self.front_width, self.front_aspect_ratio, self.front_rim, limit=len(fields))
+        sizes = [alternative.size for alternative in found] + [''] * len(fields)
+        changed = False
+        for field, size in zip(fields, sizes):
+            if getattr(self, field) != size:
+                setattr(self, field, size)
+                changed = True
+        return changed
+    
     def get_front_display(self):
         if self.front_size:
             return self.front_size
@@ -131,12 +199,20 @@ class VehicleSubmission(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Dedup: vehicle_key() of brand/model/year, and how many people asked for it
+    dedup_key = models.CharField(max_length=150, db_index=True, editable=False, default='')
+    vote_count = models.PositiveIntegerField(default=1, help_text="Submissions folded into this one")
+    
     class Meta:
         ordering = ['-created_at']
     
     def __str__(self):
         return f"{self.brand} {self.model} ({self.year}) - {self.status}"
     
+    def save(self, *args, **kwargs):
+        self.dedup_key = vehicle_key(self.brand, self.model, self.year)
+        super().save(*args, **kwargs)
+    
 
 class AffiliateLink(models.Model):
     TYPE_CHOICES = [
@@ -183,6 +259,20 @@ class TyrePressureData(models.Model):
     max_front = models.CharField(max_length=10, blank=True, verbose_name="Maximum Front Pressure")
     max_rear = models.CharField(max_length=10, blank=True, verbose_name="Maximum Rear Pressure")
     
+    # The pressures above normalized to PSI, for range queries and unit conversion
+    standard_front_psi = models.FloatField(null=True, blank=True, editable=False)
+    standard_rear_psi = models.FloatField(null=True, blank=True, editable=False)
+    cold_front_psi = models.FloatField(null=True, blank=True, editable=False)
+    cold_rear_psi = models.FloatField(null=True, blank=True, editable=False)
+    hot_front_psi = models.FloatField(null=True, blank=True, editable=False)
+    hot_rear_psi = models.FloatField(null=True, blank=True, editable=False)
+    light_load_front_psi = models.FloatField(null=True, blank=True, editable=False)
+    light_load_rear_psi = models.FloatField(null=True, blank=True, editable=False)
+    full_load_front_psi = models.FloatField(null=True, blank=True, editable=False)
+    full_load_rear_psi = models.FloatField(null=True, blank=True, editable=False)
+    max_front_psi = models.FloatField(null=True, blank=True, editable=False)
+    max_rear_psi = models.FloatField(null=True, blank=True, editable=False)
+    
     # Seasonal adjustments
     summer_adjustment = models.CharField(max_length=10, default="-2 PSI", verbose_name="Summer Adjustment")
     winter_adjustment = models.CharField(max_length=10, default="+2 PSI", verbose_name="Winter Adjustment")
@@ -196,4 +286,49 @@ class TyrePressureData(models.Model):
     
     def __str__(self):
         return f"Pressure data for {self.vehicle}"
-    
\ No newline at end of file
+    
+    def save(self, *args, **kwargs):
+        self.normalize_pressures()
+        super().save(*args, **kwargs)
+    
+    def normalize_pressures(self):
+        """Derive the numeric PSI columns from the pressure strings"""
+        return normalize_pressure_fields(self, PRESSURE_DATA_FIELDS)
+
+
+class FacetCount(models.Model):
+    """Precomputed filter value and the number of vehicles that have it"""
+    FACET_CHOICES = [
+        ('category', 'Category'),
+        ('brand', 'Brand'),
+        ('year', 'Year'),
+        ('width', 'Tyre Width'),
+        ('rim', 'Rim Size'),
+    ]
+    
+    facet = models.CharField(max_length=20, choices=FACET_CHOICES)
+    value = models.CharField(max_length=50)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = [('facet', 'value')]
+    
+    def __str__(self):
+        return f"{self.facet}={self.value} ({self.count})"
+
+
+class SimilarVehicle(models.Model):
+    """Precomputed nearest neighbours of a vehicle, written by compute_similar_vehicles"""
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='similar_links')
+    similar = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='similar_to_links')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    # Set when the vehicle's features change; the next incremental run recomputes it
+    stale = models.BooleanField(default=False)
+    
+    class Meta:
+        ordering = ['vehicle', 'rank']
+        unique_together = [('vehicle', 'rank')]
+    
+    def __str__(self):
+        return f"{self.vehicle} -> {self.similar} (#{self.rank})"
@@ -0,0 +1,220 @@
+# tyres/page_cache.py
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+
+# Generation scopes. A cached page records the generations of the scopes it
+# depends on in its key, so bumping a scope orphans exactly those pages.
+GLOBAL = 'global'            # every page (e.g. after a deploy)
+CATALOGUE = 'catalogue'      # listing pages: any vehicle added, changed or removed
+AFFILIATES = 'affiliates'    # pages with affiliate/ad slots
+SIMILAR = 'similar'          # similar-vehicle lists recomputed
+
+
+def vehicle_scope(slug):
+    """Scope of the pages of one vehicle"""
+    return f'vehicle:{slug}'
+
+
+GENERATION_KEY = 'pages:gen:{}'
+BUMPED_KEY = 'pages:bumped:{}'
+PAGE_KEY = 'pages:page:{}:{}'
+TIMESTAMP_KEY = 'pages:timestamp:{}:{}'
+
+PAGE_TIMEOUT = 24 * 60 * 60
+
+
+def page_cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'default')]
+
+
+def generations(scopes):
+    """Current generation of every scope, as one string; scopes never bumped count as 0"""
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    found = page_cache().get_many(keys)
+    return ':'.join(str(found.get(key, 0)) for key in keys)
+
+
+async def agenerations(scopes):
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    found = await page_cache().aget_many(keys)
+    return ':'.join(str(found.get(key, 0)) for key in keys)
+
+
+def bumped_at(scopes):
+    """When any of `scopes` was last bumped, as an aware datetime, or None"""
+    found = page_cache().get_many([BUMPED_KEY.format(scope) for scope in scopes])
+    return datetime.fromtimestamp(max(found.values()), timezone.utc) if found else None
+
+
+def _bump_now(scopes):
+    cache = page_cache()
+    now = time.time()
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+        cache.set(BUMPED_KEY.format(scope), now, None)
+
+
+def bump(*scopes):
+    """
+    Invalidate every cached page depending on `scopes`. Bumped at once, so
+    the current transaction never reads an old page, and again on commit, so
+    pages other requests rendered from pre-commit data are dropped too.
+    """
+    scopes = [scope for scope in scopes if scope]
+    if scopes:
+        _bump_now(scopes)
+        transaction.on_commit(lambda: _bump_now(scopes))
+
+
+def cached_page(*scopes, vehicle=False, timeout=PAGE_TIMEOUT):
+    """
+    Cache a view's GET responses under the current generation of GLOBAL,
+    `scopes` and, with `vehicle=True`, the vehicle named by the `slug` URL
+    argument. Pages render absolute URLs, so the scheme and host are part of
+    the key. Only plain 200 responses without cookies are stored, with the
+    headers the view set. Works on sync and async views.
+    """
+    def dependencies(kwargs):
+        found = [GLOBAL, *scopes]
+        if vehicle:
+            found.append(vehicle_scope(kwargs['slug']))
+        return found
+
+    def page_key(view, request, current):
+        url = f"{request.scheme}://{request.get_host()}{request.get_full_path()}"
+        digest = hashlib.md5(f"{url}|{current}".encode()).hexdigest()
+        return PAGE_KEY.format(view.__name__, digest)
+
+    def cached_response(cached):
+        content, headers = cached
+        response = HttpResponse(content)
+        for name, value in headers:
+            response[name] = value
+        response['X-Page-Cache'] = 'hit'
+        return response
+
+    def stored(response):
+        return response.content, list(response.items())
+
+    def cacheable(response):
+        return response.status_code == 200 and not response.streaming and not response.cookies
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+
+                cache = page_cache()
+                key = page_key(view, request, await agenerations(dependencies(kwargs)))
+                cached = await cache.aget(key)
+                if cached is not None:
+                    return cached_response(cached)
+
+                response = await view(request, *args, **kwargs)
+                if cacheable(response):
+                    await cache.aset(key, stored(response), timeout)
+                    response['X-Page-Cache'] = 'miss'
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            cache = page_cache()
+            key = page_key(view, request, generations(dependencies(kwargs)))
+            cached = cache.get(key)
+            if cached is not None:
+                return cached_response(cached)
+
+            response = view(request, *args, **kwargs)
+            if cacheable(response):
+                cache.set(key, stored(response), timeout)
+                response['X-Page-Cache'] = 'miss'
+            return response
+        return wrapper
+    return decorator
+
+
+def vehicle_timestamp(request, slug):
+    """
+    Latest update to a vehicle's tyre or pressure data, or None. One indexed
+    lookup, cached until the vehicle's generation (any change to its tyres
+    or pressures bumps it) or GLOBAL moves, and remembered on the request
+    for the ETag.
+    """
+    if not hasattr(request, '_vehicle_timestamp'):
+        cache = page_cache()
+        key = TIMESTAMP_KEY.format(slug, generations([GLOBAL, vehicle_scope(slug)]))
+        timestamp = cache.get(key)
+        if timestamp is None:
+            from .models import Vehicle
+
+            found = Vehicle.objects.filter(slug=slug).aggregate(
+                tyres=Max('tyres__last_updated'), pressure=Max('pressure_data__last_updated'),
+            )
+            stamps = [stamp for stamp in found.values() if stamp]
+            timestamp = max(stamps) if stamps else ''
+            cache.set(key, timestamp, PAGE_TIMEOUT)
+        request._vehicle_timestamp = timestamp or None
+    return request._vehicle_timestamp
+
+
+def vehicle_condition(*scopes):
+    """
+    Conditional GET for a vehicle page. The ETag is the vehicle's timestamp
+    plus the generations of GLOBAL, the vehicle and `scopes`, so edits to
+    the vehicle itself, affiliate links or similar vehicles also change it.
+    Last-Modified is the later of the timestamp and the last bump of any of
+    those scopes, so If-Modified-Since alone sees the same changes (to the
+    second; the ETag is exact). A matching request gets its 304 before the
+    view, or the page cache, runs.
+    """
+    def dependencies(slug):
+        return [GLOBAL, *scopes, vehicle_scope(slug)]
+
+    def etag(request, slug):
+        timestamp = vehicle_timestamp(request, slug)
+        if timestamp is None:
+            return None
+        return hashlib.md5(
+            f"{request.path}|{timestamp.isoformat()}|{generations(dependencies(slug))}".encode()
+        ).hexdigest()
+
+    def last_modified(request, slug):
+        timestamp = vehicle_timestamp(request, slug)
+        if timestamp is None:
+            return None
+        bumped = bumped_at(dependencies(slug))
+        return max(timestamp, bumped) if bumped else timestamp
+
+    def decorator(view):
+        conditional = condition(etag_func=etag, last_modified_func=last_modified)(view)
+        if not iscoroutinefunction(view):
+            return conditional
+
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            # condition() calls its functions synchronously; look the timestamp
+            # up off the event loop first so they find it on the request
+            await sync_to_async(vehicle_timestamp)(request, kwargs['slug'])
+            return await conditional(request, *args, **kwargs)
+        return async_wrapper
+    return decorator
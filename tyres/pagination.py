@@ -0,0 +1,215 @@
+# tyres/pagination.py
+import base64
+import hashlib
+import json
+from functools import reduce
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+COUNT_CACHE_TIMEOUT = 300
+
+# Totals stop counting here; a bigger result set shows as "1000+"
+COUNT_CAP = 1000
+
+
+def encode_cursor(direction, values):
+    data = json.dumps({'d': direction, 'v': values}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (direction, values) or None for a missing/garbled cursor"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction, values = data['d'], data['v']
+    except (ValueError, KeyError, TypeError):
+        return None
+    if direction not in ('n', 'p') or not isinstance(values, list):
+        return None
+    return direction, values
+
+
+class KeysetPage:
+    """One page of results plus cursors for its neighbours"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+class CappedCount:
+    """A row count that stopped at a cap; renders as e.g. "1000+" past it"""
+
+    def __init__(self, rows, cap):
+        self.count = min(rows, cap)
+        self.capped = rows > cap
+
+    def __str__(self):
+        return f"{self.count}+" if self.capped else str(self.count)
+
+
+class KeysetPaginator:
+    """
+    Cursor ("seek") pagination over a fixed ordering.
+
+    Each page is fetched with a WHERE on the last/first row's sort values
+    and a LIMIT, so page N costs the same as page 1 (no OFFSET). The
+    ordering must end in a unique column; 'id' is appended when missing.
+    Sort columns must be non-null. A cursor whose values don't fit the sort
+    fields (made for another ordering, or edited) counts as no cursor.
+    """
+
+    def __init__(self, queryset, ordering, per_page=24):
+        ordering = list(ordering)
+        if ordering[-1].lstrip('-') != 'id':
+            ordering.append('-id' if ordering[-1].startswith('-') else 'id')
+        self.queryset = queryset
+        self.ordering = ordering
+        self.fields = [field.lstrip('-') for field in ordering]
+        self.model_fields = [self._model_field(field) for field in self.fields]
+        self.per_page = per_page
+
+    def page(self, cursor=None):
+        queryset, values, backwards = self._page_query(cursor)
+        # Fetch one extra row to learn whether there is another page
+        return self._make_page(list(queryset[:self.per_page + 1]), values, backwards)
+
+    async def apage(self, cursor=None):
+        queryset, values, backwards = self._page_query(cursor)
+        return self._make_page([obj async for obj in queryset[:self.per_page + 1]], values, backwards)
+
+    def capped_count(self, cap=COUNT_CAP):
+        """
+        Total row count, counted no further than `cap` rows so it costs the
+        same on the biggest listings; cached briefly per distinct query
+        """
+        key = self._count_key(cap)
+        rows = cache.get(key)
+        if rows is None:
+            rows = self.queryset.order_by()[:cap + 1].count()
+            cache.set(key, rows, COUNT_CACHE_TIMEOUT)
+        return CappedCount(rows, cap)
+
+    async def acapped_count(self, cap=COUNT_CAP):
+        key = self._count_key(cap)
+        rows = await cache.aget(key)
+        if rows is None:
+            rows = await self.queryset.order_by()[:cap + 1].acount()
+            await cache.aset(key, rows, COUNT_CACHE_TIMEOUT)
+        return CappedCount(rows, cap)
+
+    def _page_query(self, cursor):
+        decoded = decode_cursor(cursor)
+        direction, values = decoded if decoded else ('n', None)
+        if values is not None:
+            values = self._cursor_values(values)
+            if values is None:
+                direction = 'n'
+
+        backwards = direction == 'p'
+        ordering = [self._flip(field) for field in self.ordering] if backwards else self.ordering
+
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(ordering, values))
+        return queryset, values, backwards
+
+    def _make_page(self, rows, values, backwards):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        if not rows:
+            return KeysetPage(rows)
+
+        next_cursor = previous_cursor = None
+        if has_more or backwards:
+            next_cursor = encode_cursor('n', self._values(rows[-1]))
+        if values is not None and (has_more or not backwards):
+            previous_cursor = encode_cursor('p', self._values(rows[0]))
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def _model_field(self, path):
+        model = self.queryset.model
+        *relations, name = path.split('__')
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        return model._meta.get_field(name)
+
+    def _cursor_values(self, values):
+        """A cursor's values as the sort fields' Python values, or None if they don't fit"""
+        if len(values) != len(self.fields):
+            return None
+        try:
+            values = [field.to_python(value) for field, value in zip(self.model_fields, values)]
+        except (ValidationError, ValueError, TypeError):
+            return None
+        if any(value is None for value in values):
+            return None
+        return values
+
+    def _count_key(self, cap):
+        sql = str(self.queryset.order_by().query)
+        return f'keyset-count:{cap}:' + hashlib.md5(sql.encode()).hexdigest()
+
+    def _values(self, obj):
+        if isinstance(obj, dict):  # values() querysets
+            return [obj[field] for field in self.fields]
+        return [reduce(getattr, field.split('__'), obj) for field in self.fields]
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    def _seek(self, ordering, values):
+        """
+        Build `a >= x AND (a > x OR (a = x AND (b > y OR ...)))` so the
+        leading column is a plain range condition an index can seek on.
+        """
+        condition = None
+        for field, value in reversed(list(zip(ordering, values))):
+            name = field.lstrip('-')
+            op = 'lt' if field.startswith('-') else 'gt'
+            strict = Q(**{f'{name}__{op}': value})
+            condition = strict if condition is None else strict | (Q(**{name: value}) & condition)
+
+        first, value = ordering[0], values[0]
+        op = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{op}': value}) & condition
+
+
+def page_links(request, page, param='cursor'):
+    """Query strings for the previous/next links, keeping the other GET params"""
+    links = {}
+    for name, cursor in (('next_query', page.next_cursor), ('previous_query', page.previous_cursor)):
+        if cursor is None:
+            links[name] = None
+            continue
+        params = request.GET.copy()
+        params[param] = cursor
+        links[name] = params.urlencode()
+    return links
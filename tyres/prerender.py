@@ -0,0 +1,239 @@
+# tyres/prerender.py
+"""
+Render vehicle pages and the category/brand listings to static files, so
+the front-end server can answer them without reaching Django:
+
+    location / {
+        root /srv/tyremaster/prerendered;
+        try_files $uri/index.html @django;
+    }
+
+Listings are written to vehicles/category/<CODE>/index.html and
+vehicles/brand/<brand-slug>/index.html; map `/vehicles/?category=` and
+`/vehicles/?brand=` onto those in the front-end configuration.
+"""
+import hashlib
+import json
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Max
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from django.utils.text import slugify
+
+from . import page_cache
+from .models import AffiliateLink, SimilarVehicle, Vehicle
+from .sitemap import write_atomic
+
+MANIFEST = 'manifest.json'
+
+# Pages handed to a worker at a time
+CHUNK_SIZE = 200
+
+_handler = None
+
+
+def prerender_root():
+    return Path(getattr(settings, 'PRERENDER_ROOT', settings.BASE_DIR / 'prerendered'))
+
+
+def page_file(path):
+    """Relative file a URL path is written to: /vehicle/x/ -> vehicle/x/index.html"""
+    return str(Path(path.strip('/')) / 'index.html')
+
+
+def vehicle_pages(slug):
+    """(url, file) for the detail page and pressure chart of a vehicle"""
+    pages = []
+    for name in ('vehicle_detail', 'pressure_chart'):
+        path = reverse(name, kwargs={'slug': slug})
+        pages.append((path, page_file(path)))
+    return pages
+
+
+def listing_pages(categories, brands):
+    """(url, file) for the first page of every category and brand listing"""
+    path = reverse('vehicle_list')
+    pages = [
+        (f"{path}?{urlencode({'category': code})}", page_file(f"{path}category/{code}"))
+        for code in sorted(categories)
+    ]
+    pages += [
+        (f"{path}?{urlencode({'brand': brand})}", page_file(f"{path}brand/{slugify(brand)}"))
+        for brand in sorted(brands)
+    ]
+    return pages
+
+
+def _init_worker():
+    import django
+    django.setup()
+    # Never share a connection inherited from the parent
+    connections.close_all()
+
+
+def get_handler():
+    global _handler
+    if _handler is None:
+        from django.core.handlers.base import BaseHandler
+
+        _handler = BaseHandler()
+        _handler.load_middleware()
+    return _handler
+
+
+def render_page(url, base_url):
+    """Run `url` through the full middleware stack, like a real request"""
+    parts = urlsplit(base_url)
+    path, _, query = url.partition('?')
+    request = RequestFactory().get(
+        path, QUERY_STRING=query, HTTP_HOST=parts.netloc, secure=parts.scheme == 'https'
+    )
+    return get_handler().get_response(request)
+
+
+def render_chunk(pages, root, base_url):
+    """Render and write `pages`; returns (urls written, {url: failure})"""
+    root = Path(root)
+    written, failed = [], {}
+    # The pages are rendered for the site's host whether or not this
+    # process's ALLOWED_HOSTS lists it (it is often empty outside production)
+    host = urlsplit(base_url).hostname
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, host]):
+        for url, filename in pages:
+            try:
+                response = render_page(url, base_url)
+            except Exception as e:
+                failed[url] = repr(e)
+                continue
+            if response.status_code != 200 or response.streaming:
+                failed[url] = f"HTTP {response.status_code}"
+                continue
+            path = root / filename
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, [response.content.decode(response.charset)])
+            written.append(url)
+    return written, failed
+
+
+def read_manifest(root):
+    try:
+        return json.loads((root / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def remove_page(root, filename):
+    """Delete a page and any directories it leaves empty"""
+    path = root / filename
+    path.unlink(missing_ok=True)
+    for parent in path.parents:
+        if parent == root:
+            break
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+
+
+def shared_stamp():
+    """What every vehicle page shows besides its own data: the affiliate links, and deploys"""
+    links = list(AffiliateLink.objects.order_by('pk').values_list())
+    scopes = page_cache.generations([page_cache.GLOBAL, page_cache.AFFILIATES, page_cache.SIMILAR])
+    return f"{scopes}|{links}"
+
+
+def vehicle_stamps():
+    """
+    {slug: (stamp, category, brand)} for every vehicle. The stamp changes
+    when anything its pages show changes: the vehicle, its tyres, its
+    pressure data (the count catches deletions), its similar vehicles, the
+    affiliate links.
+    """
+    shared = shared_stamp()
+    similar = defaultdict(list)
+    for vehicle_id, slug in SimilarVehicle.objects.order_by('vehicle', 'rank').values_list(
+            'vehicle_id', 'similar__slug').iterator(chunk_size=5000):
+        similar[vehicle_id].append(slug)
+
+    stamps = {}
+    rows = Vehicle.objects.order_by().annotate(
+        pressure_updated=Max('pressure_data__last_updated'), pressure_count=Count('pressure_data'),
+    ).values_list('id', 'slug', 'brand', 'model', 'year', 'category', 'tyres__last_updated',
+                  'pressure_updated', 'pressure_count')
+    for row in rows.iterator(chunk_size=5000):
+        vehicle_id, slug, brand, category = row[0], row[1], row[2], row[5]
+        stamp = hashlib.md5(f"{shared}|{row}|{similar[vehicle_id]}".encode()).hexdigest()
+        stamps[slug] = (stamp, category, brand)
+    return stamps
+
+
+def prerender(base_url, workers=1, force=False, chunk_size=CHUNK_SIZE):
+    """
+    Render the pages of every vehicle whose pages show anything that changed
+    since the last run (or is new; see vehicle_stamps()), plus the listings
+    when anything in the catalogue changed - they all show catalogue-wide
+    filter counts. Pages of deleted vehicles are removed.
+    Returns (pages written, vehicles unchanged, {url: failure}).
+    """
+    root = prerender_root()
+    root.mkdir(parents=True, exist_ok=True)
+    base_url = base_url.rstrip('/')
+
+    manifest = read_manifest(root)
+    if manifest.get('base_url') != base_url or force:
+        manifest = {}
+    previous = manifest.get('vehicles', {})
+
+    stamps, categories, brands = {}, set(), set()
+    for slug, (stamp, category, brand) in vehicle_stamps().items():
+        stamps[slug] = stamp
+        categories.add(category)
+        brands.add(brand)
+
+    changed = [slug for slug, stamp in stamps.items() if previous.get(slug) != stamp]
+    pages = [page for slug in changed for page in vehicle_pages(slug)]
+
+    catalogue = hashlib.md5(json.dumps(stamps, sort_keys=True).encode()).hexdigest()
+    listings = listing_pages(categories, brands)
+    if catalogue != manifest.get('catalogue'):
+        pages += listings
+
+    chunks = [pages[start:start + chunk_size] for start in range(0, len(pages), chunk_size)]
+    written, failed = [], {}
+    if workers > 1 and len(chunks) > 1:
+        # Workers open their own connections; don't hand them this one
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            results = pool.map(render_chunk, chunks, [root] * len(chunks), [base_url] * len(chunks))
+            for chunk_written, chunk_failed in results:
+                written += chunk_written
+                failed.update(chunk_failed)
+    else:
+        for chunk in chunks:
+            chunk_written, chunk_failed = render_chunk(chunk, root, base_url)
+            written += chunk_written
+            failed.update(chunk_failed)
+
+    for slug in set(previous) - set(stamps):
+        for _, filename in vehicle_pages(slug):
+            remove_page(root, filename)
+    for filename in set(manifest.get('listings', [])) - {filename for _, filename in listings}:
+        remove_page(root, filename)
+
+    # A vehicle whose pages failed keeps its old stamp and is retried next run
+    failed_slugs = {slug for slug in changed if any(url in failed for url, _ in vehicle_pages(slug))}
+    vehicles = {slug: previous.get(slug) if slug in failed_slugs else stamp for slug, stamp in stamps.items()}
+    listings_failed = any(url in failed for url, _ in listings)
+    write_atomic(root / MANIFEST, [json.dumps({
+        'base_url': base_url,
+        'catalogue': manifest.get('catalogue') if listings_failed else catalogue,
+        'listings': [filename for _, filename in listings],
+        'vehicles': {slug: stamp for slug, stamp in vehicles.items() if stamp is not None},
+    })])
+    return len(written), len(stamps) - len(changed), failed
@@ -0,0 +1,119 @@
+# tyres/pressures.py
+"""
+Tyre pressures are entered as free text ("29", "29 PSI", "2.2 bar",
+"220 kPa"). They are stored normalized to PSI in `<field>_psi` columns so
+they can be range-queried; bar and kPa are derived from PSI.
+"""
+import re
+
+import numpy as np
+
+PSI_PER_BAR = 14.5038
+PSI_PER_KPA = 0.145038
+
+UNITS = {'psi': 1.0, 'bar': PSI_PER_BAR, 'kpa': PSI_PER_KPA}
+
+# Plausible range for a tyre pressure in PSI; anything else is treated as unparsable
+MIN_PSI = 5
+MAX_PSI = 150
+
+# A bare number this small is bar, this large kPa
+BARE_BAR_MAX = 6
+BARE_KPA_MIN = 150
+
+PRESSURE_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*(psi|bar|kpa|kg)?', re.IGNORECASE)
+
+# TyrePressureData text fields holding absolute pressures (the seasonal
+# adjustments are relative and stay text)
+PRESSURE_DATA_FIELDS = [
+    'standard_front', 'standard_rear', 'cold_front', 'cold_rear', 'hot_front', 'hot_rear',
+    'light_load_front', 'light_load_rear', 'full_load_front', 'full_load_rear', 'max_front', 'max_rear',
+]
+TYRE_SIZE_FIELDS = ['front_pressure', 'rear_pressure']
+
+
+def parse_pressures(texts):
+    """
+    PSI for each text (None where it can't be read), rounded to 0.1. Each
+    distinct text is scanned once for a number and unit; conversion and
+    range checks run over the whole batch at once.
+    """
+    if not len(texts):
+        return []
+    distinct, inverse = np.unique(np.array([text or '' for text in texts], dtype=str), return_inverse=True)
+    values = np.full(len(distinct), np.nan)
+    factors = np.ones(len(distinct))
+    for i, text in enumerate(distinct):
+        match = PRESSURE_RE.search(text)
+        if match is None:
+            continue
+        value = float(match.group(1).replace(',', '.'))
+        unit = (match.group(2) or '').lower()
+        if unit == 'kg':  # kg/cm², close enough to bar
+            unit = 'bar'
+        if not unit:
+            unit = 'bar' if value <= BARE_BAR_MAX else 'kpa' if value >= BARE_KPA_MIN else 'psi'
+        values[i] = value
+        factors[i] = UNITS[unit]
+
+    psi = np.round(values * factors, 1)
+    psi[(psi < MIN_PSI) | (psi > MAX_PSI)] = np.nan
+    return [None if np.isnan(value) else float(value) for value in psi[inverse]]
+
+
+def parse_pressure(text):
+    return parse_pressures([text])[0]
+
+
+def to_psi(value, unit):
+    return round(value * UNITS[unit], 1)
+
+
+def to_bar(psi):
+    return None if psi is None else round(psi / PSI_PER_BAR, 2)
+
+
+def to_kpa(psi):
+    return None if psi is None else round(psi / PSI_PER_KPA)
+
+
+def pressure_units(psi):
+    """{'psi', 'bar', 'kpa'} for display, or None"""
+    if psi is None:
+        return None
+    return {'psi': psi, 'bar': to_bar(psi), 'kpa': to_kpa(psi)}
+
+
+def normalize_pressure_fields(obj, fields):
+    """Set `<field>_psi` from each text field of `obj`; returns obj"""
+    for field, psi in zip(fields, parse_pressures([getattr(obj, field) for field in fields])):
+        setattr(obj, f'{field}_psi', psi)
+    return obj
+
+
+def backfill_pressures(model, fields, batch_size=2000):
+    """
+    Fill the `<field>_psi` columns of every row of `model` (a model class or
+    a historical model in a migration), a batch of rows at a time with one
+    vectorized parse per column. Returns the number of rows updated.
+    """
+    targets = [f'{field}_psi' for field in fields]
+    updated = 0
+    batch = []
+
+    def flush():
+        columns = [parse_pressures([getattr(row, field) for row in batch]) for field in fields]
+        for i, row in enumerate(batch):
+            for target, column in zip(targets, columns):
+                setattr(row, target, column[i])
+        model.objects.bulk_update(batch, targets)
+        return len(batch)
+
+    for row in model.objects.only('id', *fields).order_by('id').iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            updated += flush()
+            batch = []
+    if batch:
+        updated += flush()
+    return updated
@@ -0,0 +1,140 @@
+# tyres/replica.py
+"""
+Read replica for the production SQLite profile (see settings). The replica
+is a read-only copy of the database file made by `manage.py refresh_replica`.
+ReplicaMiddleware marks safe requests outside the admin as read-only, and
+ReplicaRouter sends their catalogue reads to the replica; sessions and auth,
+everything else, and every write use the primary.
+
+Replica reads lag the primary until the next refresh: an edit shows on the
+site only once `refresh_replica` has run after it. Pages, ETags, facet
+counts and the suggest and alternative-size indexes rebuilt in between are
+rebuilt from the replica too, so a refresh drops them all (the GLOBAL page
+generation and the shared index versions) and makes every process reopen
+its replica connection. Vehicle counts are cached for a few minutes more.
+Run it from cron as often as edits need to show, e.g. every five minutes.
+"""
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.urls import reverse
+
+from . import alternatives, facets, page_cache, suggest
+
+REPLICA = 'replica'
+# Bumped by every refresh; a connection opened on an older file is closed
+VERSION_KEY = 'replica:version'
+
+_read_only = ContextVar('tyres_replica_read_only', default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Route reads in the block to the replica"""
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if _read_only.get() and model._meta.app_label == 'tyres':
+            return REPLICA
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data either side
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    """
+    Serve GET/HEAD requests from the replica, except the admin (which has to
+    see its own writes straight away). Streamed response bodies are produced
+    after the middleware returns and so read from the primary.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.admin_prefix = None
+
+    def __call__(self, request):
+        if self.admin_prefix is None:
+            self.admin_prefix = reverse('admin:index')
+        if request.method in self.SAFE_METHODS and not request.path.startswith(self.admin_prefix):
+            reconnect_if_refreshed()
+            with replica_reads():
+                return self.get_response(request)
+        return self.get_response(request)
+
+
+def reconnect_if_refreshed():
+    """
+    Close this thread's replica connection if the replica was refreshed
+    since it was opened: an open connection keeps reading the old file.
+    """
+    if REPLICA not in connections.settings:
+        return
+    version = cache.get(VERSION_KEY)
+    connection = connections[REPLICA]
+    if getattr(connection, 'replica_version', None) != version:
+        connection.close()
+        connection.replica_version = version
+
+
+def replica_refreshed():
+    """Drop everything built from the previous replica, everywhere"""
+    # Connections first, so what gets rebuilt is read from the new file
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+    page_cache.bump(page_cache.GLOBAL)
+    facets.bump_version()
+    suggest.bump_version()
+    alternatives.sizes_changed()
+
+
+def refresh_replica(path, using=DEFAULT_DB_ALIAS):
+    """
+    Copy the `using` database to `path` with SQLite's online backup (a
+    consistent snapshot, taken without blocking writers for long), rename
+    it into place, and invalidate the caches filled from the old copy (see
+    replica_refreshed()). Returns the size in bytes.
+    """
+    path = os.fspath(path)
+    temp = f'{path}.tmp'
+    if os.path.exists(temp):
+        os.remove(temp)
+
+    connection = connections[using]
+    if connection.in_atomic_block:
+        # The backup would wait forever on our own uncommitted write
+        raise RuntimeError("refresh_replica() can't run inside a transaction")
+    connection.ensure_connection()
+    target = sqlite3.connect(temp)
+    try:
+        connection.connection.backup(target)
+        # Readers open the replica read-only; a rollback journal needs no -wal/-shm files
+        target.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        target.close()
+    os.replace(temp, path)
+    replica_refreshed()
+    return os.path.getsize(path)
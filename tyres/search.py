@@ -0,0 +1,208 @@
+# tyres/search.py
+import re
+
+from django.db import OperationalError, connection, connections, router
+from django.db.models import Q
+
+from .tyre_sizes import parse_tyre_size
+
+FTS_TABLE = 'tyres_vehicle_fts'
+TRIGRAM_TABLE = 'tyres_vehicle_trigram'
+
+# bm25 column weights for brand, model, year, sizes
+BM25_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+CREATE_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"brand, model, year, sizes, tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TRIGRAM_TABLE} USING fts5(body, tokenize='trigram')",
+]
+DROP_SQL = [
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    f"DROP TABLE IF EXISTS {TRIGRAM_TABLE}",
+]
+
+# Aliases where the FTS tables turned out to be missing (e.g. SQLite built without FTS5)
+_missing = set()
+
+
+def fts_available(using=connection):
+    """True unless the database is not SQLite or the FTS tables were found missing"""
+    return using.vendor == 'sqlite' and using.alias not in _missing
+
+
+def mark_missing(using=connection):
+    _missing.add(using.alias)
+
+
+def create_tables(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+    _missing.discard(schema_editor.connection.alias)
+
+
+def drop_tables(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+def document_rows(vehicles):
+    """
+    (id, brand, model, year, sizes) rows to index, from a Vehicle queryset
+    (historical models work too, for migrations).
+    """
+    rows = vehicles.values_list(
+        'id', 'brand', 'model', 'year',
+        'tyres__front_size', 'tyres__rear_size', 'tyres__tyre_size',
+        'tyres__front_size_key', 'tyres__rear_size_key',
+    ).iterator(chunk_size=2000)
+    for vehicle_id, brand, model, year, *sizes in rows:
+        yield vehicle_id, brand, model, str(year), ' '.join(sorted({s for s in sizes if s}))
+
+
+def write_documents(rows, cursor):
+    rows = list(rows)
+    if not rows:
+        return
+    ids = [(row[0],) for row in rows]
+    cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", ids)
+    cursor.executemany(f"DELETE FROM {TRIGRAM_TABLE} WHERE rowid = %s", ids)
+    cursor.executemany(
+        f"INSERT INTO {FTS_TABLE} (rowid, brand, model, year, sizes) VALUES (%s, %s, %s, %s, %s)", rows
+    )
+    cursor.executemany(
+        f"INSERT INTO {TRIGRAM_TABLE} (rowid, body) VALUES (%s, %s)",
+        [(vehicle_id, f"{brand} {model} {year}") for vehicle_id, brand, model, year, _ in rows],
+    )
+
+
+def index_vehicles(vehicle_ids):
+    """(Re)index the given vehicles"""
+    from .models import Vehicle
+
+    if not vehicle_ids or not fts_available():
+        return
+    try:
+        with connection.cursor() as cursor:
+            write_documents(document_rows(Vehicle.objects.filter(id__in=vehicle_ids)), cursor)
+    except OperationalError:
+        mark_missing()
+
+
+def remove_vehicles(vehicle_ids):
+    if not vehicle_ids or not fts_available():
+        return
+    ids = [(vehicle_id,) for vehicle_id in vehicle_ids]
+    try:
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", ids)
+            cursor.executemany(f"DELETE FROM {TRIGRAM_TABLE} WHERE rowid = %s", ids)
+    except OperationalError:
+        mark_missing()
+
+
+def rebuild_index(vehicles=None, using=connection):
+    """Rebuild both FTS tables from scratch; returns the number of documents"""
+    from .models import Vehicle
+
+    if vehicles is None:
+        vehicles = Vehicle.objects.all()
+    count = 0
+    with using.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(f"DELETE FROM {TRIGRAM_TABLE}")
+        batch = []
+        for row in document_rows(vehicles):
+            batch.append(row)
+            if len(batch) >= 2000:
+                write_documents(batch, cursor)
+                count += len(batch)
+                batch = []
+        write_documents(batch, cursor)
+        count += len(batch)
+    return count
+
+
+def query_terms(query):
+    return re.findall(r'\w+', query.casefold())
+
+
+def match_expression(terms):
+    """Every term must match, each as a prefix: "honda"* AND "activa"*"""
+    return ' AND '.join(f'"{term}"*' for term in terms)
+
+
+def ranked_ids(query, category='', limit=20, using=connection):
+    """Vehicle ids for a search query, best BM25 match first"""
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    category_sql = "AND v.category = %s" if category else ""
+    params = [category] if category else []
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+
+    with using.cursor() as cursor:
+        cursor.execute(
+            f"SELECT v.id FROM {FTS_TABLE} JOIN tyres_vehicle v ON v.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s {category_sql} "
+            f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s",
+            [match_expression(terms), *params, limit],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+
+        # Nothing matched whole words: fall back to substring (trigram) matching,
+        # which also catches partial model names such as "ctiva"
+        trigram_terms = [term for term in terms if len(term) >= 3]
+        if not ids and trigram_terms:
+            expression = ' AND '.join(f'"{term}"' for term in trigram_terms)
+            cursor.execute(
+                f"SELECT v.id FROM {TRIGRAM_TABLE} JOIN tyres_vehicle v ON v.id = {TRIGRAM_TABLE}.rowid "
+                f"WHERE {TRIGRAM_TABLE} MATCH %s {category_sql} "
+                f"ORDER BY rank LIMIT %s",
+                [expression, *params, limit],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+    return ids
+
+
+def fallback_filter(query):
+    """Portable search for non-SQLite backends: every term must match a field"""
+    condition = Q()
+    for term in query_terms(query):
+        term_q = Q(brand__icontains=term) | Q(model__icontains=term)
+        if term.isdigit():
+            term_q |= Q(year=int(term))
+        condition &= term_q
+    return condition
+
+
+def search_vehicles(query, category='', limit=20):
+    """Vehicles matching a free-text query, most relevant first"""
+    from .models import Vehicle
+
+    vehicles = Vehicle.objects.select_related('tyres')
+    if category:
+        vehicles = vehicles.filter(category=category)
+
+    # A query that is a tyre size is answered from the indexed size keys
+    spec = parse_tyre_size(query)
+    if spec:
+        return list(vehicles.filter(Q(tyres__front_size_key=spec.key) | Q(tyres__rear_size_key=spec.key))[:limit])
+
+    # The raw FTS queries read where the router sends Vehicle reads (the replica, if any)
+    using = connections[router.db_for_read(Vehicle)]
+    if not fts_available(using):
+        return list(vehicles.filter(fallback_filter(query))[:limit])
+
+    try:
+        ids = ranked_ids(query, category, limit, using)
+    except OperationalError:
+        mark_missing(using)
+        return search_vehicles(query, category, limit)
+    found = vehicles.in_bulk(ids)
+    return [found[vehicle_id] for vehicle_id in ids if vehicle_id in found]
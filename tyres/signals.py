@@ -0,0 +1,203 @@
+# tyres/signals.py
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from . import alternatives, facets, page_cache, search, similarity, suggest
+from .models import Vehicle, TyreSize, TyrePressureData, AffiliateLink
+
+# Sent after a batch of vehicles has been written with bulk_create, which
+# bypasses the model save/post_save machinery. Receivers get `vehicles` and
+# `tyre_sizes` (lists of saved instances with primary keys).
+vehicles_bulk_created = Signal()
+
+FACET_SOURCES = {
+    Vehicle: facets.vehicle_facet_values,
+    TyreSize: facets.tyre_facet_values,
+}
+
+SUGGEST_SOURCES = {
+    Vehicle: lambda vehicle: suggest.vehicle_entries(vehicle.brand, vehicle.model),
+    TyreSize: suggest.tyre_entries,
+}
+
+
+@receiver(pre_save, sender=Vehicle)
+@receiver(pre_save, sender=TyreSize)
+def remember_previous_row(sender, instance, raw=False, **kwargs):
+    """Keep the row as it was before this save so post_save receivers can diff it"""
+    instance._previous = None
+    if raw or instance.pk is None:
+        return
+    instance._previous = sender.objects.filter(pk=instance.pk).first()
+
+
+def previous_values(sender, instance, sources):
+    previous = getattr(instance, '_previous', None)
+    return sources[sender](previous) if previous is not None else set()
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_save, sender=TyreSize)
+def update_facets_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    facets.apply_changes(
+        removed=previous_values(sender, instance, FACET_SOURCES),
+        added=FACET_SOURCES[sender](instance),
+    )
+
+
+@receiver(post_delete, sender=Vehicle)
+@receiver(post_delete, sender=TyreSize)
+def update_facets_on_delete(sender, instance, **kwargs):
+    facets.apply_changes(removed=FACET_SOURCES[sender](instance))
+
+
+@receiver(vehicles_bulk_created)
+def update_facets_on_bulk_create(sender, vehicles, tyre_sizes, **kwargs):
+    added = []
+    for vehicle in vehicles:
+        added.extend(facets.vehicle_facet_values(vehicle))
+    for tyres in tyre_sizes:
+        added.extend(facets.tyre_facet_values(tyres))
+    facets.apply_changes(added=added)
+
+
+@receiver(post_save, sender=Vehicle)
+def index_vehicle_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_vehicles([instance.pk])
+
+
+@receiver(post_save, sender=TyreSize)
+@receiver(post_delete, sender=TyreSize)
+def index_vehicle_on_tyre_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_vehicles([instance.vehicle_id])
+
+
+@receiver(post_delete, sender=Vehicle)
+def remove_vehicle_from_index(sender, instance, **kwargs):
+    search.remove_vehicles([instance.pk])
+
+
+@receiver(vehicles_bulk_created)
+def index_vehicles_on_bulk_create(sender, vehicles, tyre_sizes, **kwargs):
+    search.index_vehicles([vehicle.pk for vehicle in vehicles])
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_save, sender=TyreSize)
+def update_suggestions_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    removed = previous_values(sender, instance, SUGGEST_SOURCES)
+    added = SUGGEST_SOURCES[sender](instance)
+    suggest.apply_changes(removed=removed - added, added=added - removed)
+
+
+@receiver(post_delete, sender=Vehicle)
+@receiver(post_delete, sender=TyreSize)
+def update_suggestions_on_delete(sender, instance, **kwargs):
+    suggest.apply_changes(removed=SUGGEST_SOURCES[sender](instance))
+
+
+@receiver(vehicles_bulk_created)
+def update_suggestions_on_bulk_create(sender, vehicles, tyre_sizes, **kwargs):
+    added = []
+    for vehicle in vehicles:
+        added.extend(suggest.vehicle_entries(vehicle.brand, vehicle.model))
+    for tyres in tyre_sizes:
+        added.extend(suggest.tyre_entries(tyres))
+    suggest.apply_changes(added=added)
+
+
+@receiver(post_save, sender=TyreSize)
+def refresh_alternatives_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if previous_values(sender, instance, {TyreSize: alternatives.tyre_dimension_values}) != \
+            alternatives.tyre_dimension_values(instance):
+        alternatives.sizes_changed()
+
+
+@receiver(post_delete, sender=TyreSize)
+def refresh_alternatives_on_delete(sender, instance, **kwargs):
+    alternatives.sizes_changed()
+
+
+@receiver(vehicles_bulk_created)
+def refresh_alternatives_on_bulk_create(sender, vehicles, tyre_sizes, **kwargs):
+    if tyre_sizes:
+        alternatives.sizes_changed()
+
+
+@receiver(post_save, sender=Vehicle)
+def mark_similar_vehicles_stale(sender, instance, raw=False, created=False, **kwargs):
+    if raw or created:
+        return
+    previous = getattr(instance, '_previous', None)
+    if previous is not None and similarity.vehicle_feature_values(previous) != \
+            similarity.vehicle_feature_values(instance):
+        similarity.mark_stale(instance.pk)
+
+
+@receiver(post_save, sender=TyreSize)
+def mark_similar_vehicles_stale_on_tyre_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous', None)
+    if previous is None or similarity.tyre_feature_values(previous) != similarity.tyre_feature_values(instance):
+        similarity.mark_stale(instance.vehicle_id)
+
+
+def vehicle_slug(instance):
+    """Slug of the vehicle a TyreSize/TyrePressureData belongs to; no query when the vehicle is loaded"""
+    if type(instance).vehicle.is_cached(instance):
+        return instance.vehicle.slug
+    return Vehicle.objects.filter(pk=instance.vehicle_id).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def invalidate_vehicle_pages(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous', None)
+    page_cache.bump(
+        page_cache.CATALOGUE,
+        page_cache.vehicle_scope(instance.slug),
+        page_cache.vehicle_scope(previous.slug) if previous is not None and previous.slug != instance.slug else None,
+    )
+
+
+@receiver(post_save, sender=TyreSize)
+@receiver(post_delete, sender=TyreSize)
+def invalidate_pages_on_tyre_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    slug = vehicle_slug(instance)
+    page_cache.bump(page_cache.CATALOGUE, page_cache.vehicle_scope(slug) if slug else None)
+
+
+@receiver(post_save, sender=TyrePressureData)
+@receiver(post_delete, sender=TyrePressureData)
+def invalidate_pages_on_pressure_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    slug = vehicle_slug(instance)
+    if slug:
+        page_cache.bump(page_cache.vehicle_scope(slug))
+
+
+@receiver(post_save, sender=AffiliateLink)
+@receiver(post_delete, sender=AffiliateLink)
+def invalidate_pages_on_affiliate_change(sender, raw=False, **kwargs):
+    if not raw:
+        page_cache.bump(page_cache.AFFILIATES)
+
+
+@receiver(vehicles_bulk_created)
+def invalidate_pages_on_bulk_create(sender, vehicles, tyre_sizes, **kwargs):
+    # New vehicles have no cached pages of their own; only the listings change
+    page_cache.bump(page_cache.CATALOGUE)
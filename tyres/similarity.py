@@ -0,0 +1,205 @@
+# tyres/similarity.py
+import numpy as np
+from django.db import transaction
+
+from . import page_cache
+
+TOP_K = 5
+
+# Memory one block of the distance matrix (block x all vehicles) may use. Each
+# cell costs 16 bytes: the float64 distance and argpartition's int64 index.
+BLOCK_MEMORY = 256 * 1024 * 1024
+
+TYRE_FEATURES = [
+    'tyres__front_width', 'tyres__front_aspect_ratio', 'tyres__front_rim',
+    'tyres__rear_width', 'tyres__rear_aspect_ratio', 'tyres__rear_rim',
+]
+
+# Relative weight of each feature group once the numeric columns are standardized.
+# Category dominates so neighbours come from the same kind of vehicle first.
+TYRE_WEIGHT = 1.0
+YEAR_WEIGHT = 0.5
+CATEGORY_WEIGHT = 3.0
+
+
+def vehicle_feature_values(vehicle):
+    return (vehicle.year, vehicle.category)
+
+
+def tyre_feature_values(tyres):
+    return (
+        tyres.front_width, tyres.front_aspect_ratio, tyres.front_rim,
+        tyres.rear_width, tyres.rear_aspect_ratio, tyres.rear_rim,
+    )
+
+
+def mark_stale(vehicle_id):
+    """Flag a vehicle's neighbours for the next incremental run"""
+    from .models import SimilarVehicle
+
+    SimilarVehicle.objects.filter(vehicle_id=vehicle_id).update(stale=True)
+
+
+def _standardize(column):
+    """Fill gaps with the median and scale to unit variance"""
+    missing = np.isnan(column)
+    if missing.all():
+        return np.zeros_like(column)
+    column = np.where(missing, np.nanmedian(column), column)
+    std = column.std()
+    return (column - column.mean()) / std if std else column - column.mean()
+
+
+def load_features(vehicles):
+    """
+    (ids, feature matrix) for a Vehicle queryset in one query: standardized
+    tyre dimensions and year plus a one-hot category, each group weighted.
+    """
+    from .models import Vehicle
+
+    rows = list(vehicles.values_list('id', 'year', 'category', *TYRE_FEATURES).order_by('id'))
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, 0))
+
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    numbers = np.array([[np.nan if value is None else value for value in row[3:]] for row in rows], dtype=np.float64)
+    years = np.array([row[1] for row in rows], dtype=np.float64)
+    categories = [code for code, _ in Vehicle.CATEGORY_CHOICES]
+    one_hot = np.array([[row[2] == code for code in categories] for row in rows], dtype=np.float64)
+
+    columns = [_standardize(numbers[:, i]) * TYRE_WEIGHT for i in range(numbers.shape[1])]
+    columns.append(_standardize(years) * YEAR_WEIGHT)
+    features = np.column_stack(columns + [one_hot * CATEGORY_WEIGHT])
+    return ids, features
+
+
+def block_size(columns):
+    """Rows per block so a (rows x columns) block stays within BLOCK_MEMORY"""
+    return max(1, BLOCK_MEMORY // (max(columns, 1) * 16))
+
+
+def squared_distances(block, features):
+    """Squared Euclidean distances between every row of `block` and of `features`"""
+    # Built in place so the block's matrix is the only (rows x columns) array
+    distances = block @ features.T
+    distances *= -2
+    distances += (block ** 2).sum(axis=1)[:, None]
+    distances += (features ** 2).sum(axis=1)[None, :]
+    return np.maximum(distances, 0, out=distances)
+
+
+def nearest(rows, ids, features, k=TOP_K):
+    """
+    {vehicle id: [(similar id, score), ...]} for the vehicles at positions
+    `rows`, best first. Score is 1 / (1 + distance).
+    """
+    k = min(k, len(ids) - 1)
+    result = {}
+    if k <= 0:
+        return {int(ids[row]): [] for row in rows}
+
+    size = block_size(len(ids))
+    for start in range(0, len(rows), size):
+        block_rows = np.asarray(rows[start:start + size])
+        distances = squared_distances(features[block_rows], features)
+        distances[np.arange(len(block_rows)), block_rows] = np.inf  # never similar to itself
+
+        # Unordered top k per row, then sort just those (ties broken by id)
+        candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        for i, row in enumerate(block_rows):
+            picked = sorted(candidates[i], key=lambda col: (distances[i, col], ids[col]))
+            result[int(ids[row])] = [
+                (int(ids[col]), float(1 / (1 + np.sqrt(distances[i, col])))) for col in picked
+            ]
+    return result
+
+
+def affected_rows(changed, ids, features, current, k=TOP_K):
+    """
+    Positions of unchanged vehicles whose stored neighbours may be wrong
+    after the `changed` vehicles moved: a changed vehicle is in their list,
+    or now lies closer than their current k-th neighbour.
+    """
+    changed_set = set(changed)
+    changed_ids = {int(ids[row]) for row in changed}
+    others = np.array([row for row in range(len(ids)) if row not in changed_set], dtype=np.int64)
+    if not len(changed) or not len(others):
+        return []
+
+    # Squared distance each vehicle's k-th neighbour is allowed to have
+    kth = np.array([
+        (1 / current[int(ids[row])][-1][1] - 1) ** 2 if current.get(int(ids[row])) else np.inf
+        for row in others
+    ])
+
+    affected = []
+    size = block_size(len(changed))
+    for start in range(0, len(others), size):
+        block = others[start:start + size]
+        closest = squared_distances(features[block], features[np.asarray(changed)]).min(axis=1)
+        for i, row in enumerate(block):
+            neighbours = current.get(int(ids[row]), [])
+            if closest[i] < kth[start + i] - 1e-9 or any(similar in changed_ids for similar, _ in neighbours):
+                affected.append(int(row))
+    return affected
+
+
+def write_neighbours(neighbours, replace_all=False):
+    """Replace the stored neighbours of the vehicles in `neighbours`"""
+    from .models import SimilarVehicle
+
+    with transaction.atomic():
+        if replace_all:
+            SimilarVehicle.objects.all().delete()
+        else:
+            vehicle_ids = list(neighbours)
+            for start in range(0, len(vehicle_ids), 500):
+                SimilarVehicle.objects.filter(vehicle_id__in=vehicle_ids[start:start + 500]).delete()
+        SimilarVehicle.objects.bulk_create(
+            [
+                SimilarVehicle(vehicle_id=vehicle_id, similar_id=similar_id, rank=rank, score=score)
+                for vehicle_id, found in neighbours.items()
+                for rank, (similar_id, score) in enumerate(found, start=1)
+            ],
+            batch_size=2000,
+        )
+        page_cache.bump(page_cache.SIMILAR)
+
+
+def compute_similar_vehicles(incremental=False, k=TOP_K):
+    """
+    Recompute stored neighbours; returns the number of vehicles recomputed.
+
+    A full run recomputes every vehicle. An incremental run recomputes
+    vehicles that are new, flagged stale or lost a neighbour to a delete,
+    plus any other vehicle whose list those changes could alter. Features
+    are standardized over the current catalogue, so scores drift slightly
+    between full runs as the catalogue grows.
+    """
+    from .models import Vehicle, SimilarVehicle
+
+    ids, features = load_features(Vehicle.objects.all())
+    if not incremental:
+        neighbours = nearest(range(len(ids)), ids, features, k)
+        write_neighbours(neighbours, replace_all=True)
+        return len(neighbours)
+
+    current, stale = {}, set()
+    for vehicle_id, similar_id, score, is_stale in SimilarVehicle.objects.order_by('vehicle', 'rank').values_list(
+            'vehicle_id', 'similar_id', 'score', 'stale').iterator(chunk_size=5000):
+        current.setdefault(vehicle_id, []).append((similar_id, score))
+        if is_stale:
+            stale.add(vehicle_id)
+
+    expected = min(k, len(ids) - 1)
+    changed = [
+        row for row, vehicle_id in enumerate(ids.tolist())
+        if vehicle_id in stale or len(current.get(vehicle_id, ())) < expected
+    ]
+    if not changed:
+        return 0
+
+    rows = changed + affected_rows(changed, ids, features, current, k)
+    neighbours = nearest(rows, ids, features, k)
+    write_neighbours(neighbours)
+    return len(neighbours)
@@ -1,16 +1,247 @@
 # tyres/sitemap.py
-from django.contrib.sitemaps import Sitemap
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, ExpressionWrapper, F, IntegerField, Max, Sum
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+
 from .models import Vehicle
 
-class VehicleSitemap(Sitemap):
-    changefreq = "monthly"
-    priority = 0.8
-    
-    def items(self):
-        return Vehicle.objects.all()
-    
-    def lastmod(self, obj):
-        return obj.tyres.last_updated
-    
-    def location(self, obj):
-        return f'/vehicle/{obj.slug}/'
\ No newline at end of file
+# Sitemaps protocol limit per file
+MAX_URLS = 50000
+# Each vehicle is listed with its detail page and its pressure chart
+URLS_PER_VEHICLE = 2
+
+CACHE_SECONDS = 60 * 60
+
+STATIC_PAGES = [
+    'home', 'vehicle_list', 'search_by_tyre', 'search_by_size_range',
+    'tyre_calculator', 'compare_tyres', 'about', 'submit_vehicle',
+]
+
+MANIFEST = 'manifest.json'
+INDEX_FILE = 'sitemap.xml'
+PAGES_FILE = 'sitemap-pages.xml'
+SHARD_FILE = 'sitemap-vehicles-{}.xml'
+
+# URLs are written in chunks of this many entries when streaming
+CHUNK_SIZE = 500
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def vehicles_per_shard():
+    """Vehicles are sharded by fixed id ranges, so a shard's contents only change when its own vehicles do"""
+    return getattr(settings, 'SITEMAP_VEHICLES_PER_SHARD', MAX_URLS // URLS_PER_VEHICLE)
+
+
+def sitemap_root():
+    return Path(getattr(settings, 'SITEMAP_ROOT', settings.BASE_DIR / 'sitemaps'))
+
+
+def format_lastmod(value):
+    return value.date().isoformat() if value else ''
+
+
+def shard_summaries():
+    """
+    {shard: {'count', 'lastmod', 'checksum'}} for every non-empty shard, in
+    one grouped query. A shard needs regenerating when its summary changes:
+    adding or deleting a vehicle changes the count and id checksum, editing
+    its tyres moves the shard's latest update time.
+    """
+    per_shard = vehicles_per_shard()
+    rows = (
+        Vehicle.objects.order_by()
+        .annotate(shard=ExpressionWrapper((F('id') - 1) / per_shard, output_field=IntegerField()))
+        .values('shard')
+        .annotate(count=Count('id'), lastmod=Max('tyres__last_updated'), checksum=Sum('id'))
+    )
+    return {
+        row['shard']: {
+            'count': row['count'],
+            'lastmod': row['lastmod'].isoformat() if row['lastmod'] else '',
+            'checksum': row['checksum'],
+        }
+        for row in rows
+    }
+
+
+def slug_digests():
+    """
+    {shard: digest of its slugs} in one streamed query, so a changed slug
+    (which leaves the count, checksum and tyre times alone) is noticed too
+    """
+    per_shard = vehicles_per_shard()
+    digests = {}
+    rows = Vehicle.objects.order_by('id').values_list('id', 'slug').iterator(chunk_size=5000)
+    for vehicle_id, slug in rows:
+        digests.setdefault((vehicle_id - 1) // per_shard, hashlib.md5()).update(f"{slug}\n".encode())
+    return {shard: digest.hexdigest() for shard, digest in digests.items()}
+
+
+def url_element(loc, lastmod='', changefreq='', priority=''):
+    parts = [f"<url><loc>{escape(loc)}</loc>"]
+    if lastmod:
+        parts.append(f"<lastmod>{lastmod}</lastmod>")
+    if changefreq:
+        parts.append(f"<changefreq>{changefreq}</changefreq>")
+    if priority:
+        parts.append(f"<priority>{priority}</priority>")
+    parts.append("</url>\n")
+    return ''.join(parts)
+
+
+def chunked(elements):
+    """Join XML elements into larger strings so streaming does not write one tiny chunk per URL"""
+    chunk = []
+    for element in elements:
+        chunk.append(element)
+        if len(chunk) >= CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def urlset(elements):
+    yield XML_HEADER + f'<urlset xmlns="{XMLNS}">\n'
+    yield from chunked(elements)
+    yield '</urlset>\n'
+
+
+def page_urls(base_url):
+    for name in STATIC_PAGES:
+        yield url_element(base_url + reverse(name), changefreq='weekly', priority='0.6')
+
+
+def vehicle_urls(shard, base_url):
+    """Detail and pressure-chart URLs for one shard, streamed from a single query"""
+    # Reverse once and fill in slugs; reversing per row dominates for large shards
+    detail_prefix, detail_suffix = reverse('vehicle_detail', kwargs={'slug': 'SLUG'}).split('SLUG')
+    chart_prefix, chart_suffix = reverse('pressure_chart', kwargs={'slug': 'SLUG'}).split('SLUG')
+
+    per_shard = vehicles_per_shard()
+    rows = (
+        Vehicle.objects.filter(id__gt=shard * per_shard, id__lte=(shard + 1) * per_shard)
+        .order_by('id')
+        .values_list('slug', 'tyres__last_updated')
+        .iterator(chunk_size=2000)
+    )
+    for slug, last_updated in rows:
+        lastmod = format_lastmod(last_updated)
+        yield url_element(f"{base_url}{detail_prefix}{slug}{detail_suffix}", lastmod, 'monthly', '0.8')
+        yield url_element(f"{base_url}{chart_prefix}{slug}{chart_suffix}", lastmod, 'monthly', '0.5')
+
+
+def sitemap_index_xml(summaries, base_url):
+    yield XML_HEADER + f'<sitemapindex xmlns="{XMLNS}">\n'
+    yield f"<sitemap><loc>{escape(base_url + reverse('sitemap_pages'))}</loc></sitemap>\n"
+    for shard in sorted(summaries):
+        loc = base_url + reverse('sitemap_vehicles', kwargs={'shard': shard})
+        lastmod = summaries[shard]['lastmod'][:10]
+        lastmod = f"<lastmod>{lastmod}</lastmod>" if lastmod else ''
+        yield f"<sitemap><loc>{escape(loc)}</loc>{lastmod}</sitemap>\n"
+    yield '</sitemapindex>\n'
+
+
+def write_atomic(path, chunks):
+    """Write to a temporary file next to `path` and rename it into place"""
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix='.' + path.name)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def read_manifest(root):
+    try:
+        return json.loads((root / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def generate_sitemaps(base_url, force=False):
+    """
+    Pre-generate the index and every shard under SITEMAP_ROOT. Shards whose
+    vehicles are unchanged since the last run (same count, id checksum,
+    latest tyre update and slugs) are kept. Returns (shards written, shards kept).
+    """
+    root = sitemap_root()
+    root.mkdir(parents=True, exist_ok=True)
+    base_url = base_url.rstrip('/')
+
+    manifest = read_manifest(root)
+    previous = manifest.get('shards', {})
+    # Shards written for another base URL, or forced, are rewritten
+    reusable = previous if manifest.get('base_url') == base_url and not force else {}
+    summaries = shard_summaries()
+    for shard, digest in slug_digests().items():
+        if shard in summaries:  # not a vehicle added between the two queries
+            summaries[shard]['slugs'] = digest
+
+    written = kept = 0
+    for shard, summary in sorted(summaries.items()):
+        path = root / SHARD_FILE.format(shard)
+        if reusable.get(str(shard)) == summary and path.exists():
+            kept += 1
+            continue
+        write_atomic(path, urlset(vehicle_urls(shard, base_url)))
+        written += 1
+
+    # Whatever the last run wrote that no longer has vehicles
+    for shard in set(previous) - {str(shard) for shard in summaries}:
+        (root / SHARD_FILE.format(shard)).unlink(missing_ok=True)
+
+    write_atomic(root / PAGES_FILE, urlset(page_urls(base_url)))
+    write_atomic(root / INDEX_FILE, sitemap_index_xml(summaries, base_url))
+    write_atomic(root / MANIFEST, [json.dumps({
+        'base_url': base_url,
+        'shards': {str(shard): summary for shard, summary in summaries.items()},
+    }, indent=2)])
+    return written, kept
+
+
+def sitemap_response(request, filename, generate, exists=None):
+    """Serve the pre-generated file when there is one, otherwise stream it from the database"""
+    path = sitemap_root() / filename
+    if path.is_file():
+        response = FileResponse(open(path, 'rb'), content_type='application/xml')
+    else:
+        if exists is not None and not exists():
+            raise Http404("No such sitemap")
+        base_url = request.build_absolute_uri('/').rstrip('/')
+        response = StreamingHttpResponse(generate(base_url), content_type='application/xml')
+    patch_cache_control(response, public=True, max_age=CACHE_SECONDS)
+    return response
+
+
+def sitemap_index(request):
+    """Sitemap index listing the static pages sitemap and every vehicle shard"""
+    return sitemap_response(request, INDEX_FILE, lambda base_url: sitemap_index_xml(shard_summaries(), base_url))
+
+
+def sitemap_pages(request):
+    return sitemap_response(request, PAGES_FILE, lambda base_url: urlset(page_urls(base_url)))
+
+
+def sitemap_vehicles(request, shard):
+    per_shard = vehicles_per_shard()
+    return sitemap_response(
+        request, SHARD_FILE.format(shard),
+        lambda base_url: urlset(vehicle_urls(shard, base_url)),
+        exists=lambda: Vehicle.objects.filter(id__gt=shard * per_shard, id__lte=(shard + 1) * per_shard).exists(),
+    )
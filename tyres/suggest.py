@@ -0,0 +1,222 @@
+# tyres/suggest.py
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'suggest:version'
+
+# How long a process trusts its index before re-checking the shared version
+LOCAL_TTL = 5
+
+# Matches scanned per lookup before ranking; bounds the cost of short prefixes
+SCAN_LIMIT = 200
+
+_local = {'index': None, 'version': None, 'checked': 0.0}
+
+
+def normalize(text):
+    """Lookup form of a name: case-folded, single spaces"""
+    return ' '.join(str(text).casefold().split())
+
+
+def compact(text):
+    """Lookup form of a tyre size: case-folded, no spaces ('185/65 R15' -> '185/65r15')"""
+    return ''.join(str(text).casefold().split())
+
+
+def display_size(key, construction=''):
+    """Display a canonical size key with its construction letter, e.g. '185/65-15' + 'R' -> '185/65R15'"""
+    if '/' in key and construction and construction != '-':
+        size, rim = key.rsplit('-', 1)
+        return f"{size}{construction}{rim}"
+    return key
+
+
+def vehicle_entries(brand, model):
+    """(term, kind, text) index entries for a vehicle's brand and model"""
+    name = f"{brand} {model}"
+    return {
+        (normalize(brand), 'brand', brand),
+        (normalize(model), 'model', name),
+        (normalize(name), 'model', name),
+    }
+
+
+def size_entries(*sizes):
+    """Index entries for (size_key, construction) pairs; a size is found by its display form or its key"""
+    entries = set()
+    for key, construction in sizes:
+        if not key:
+            continue
+        text = display_size(key, construction)
+        entries.add((compact(text), 'size', text))
+        entries.add((compact(key), 'size', text))
+    return entries
+
+
+def tyre_entries(tyres):
+    return size_entries(
+        (tyres.front_size_key, tyres.front_construction),
+        (tyres.rear_size_key, tyres.rear_construction),
+    )
+
+
+class PrefixIndex:
+    """
+    Sorted array of (term, kind, text) entries searched with bisect.
+
+    Each entry carries the number of vehicles it came from, so the same
+    brand or size added by many vehicles is stored once and only leaves the
+    index when the last of them is removed. The count also ranks matches.
+
+    Commits update the index in place from on_commit callbacks while other
+    request threads search it, so changes and lookups hold `lock`.
+    """
+
+    def __init__(self, entries=()):
+        self.counts = Counter(entries)
+        self.entries = sorted(self.counts)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, entries):
+        with self.lock:
+            for entry in entries:
+                if self.counts[entry] == 0:
+                    self.entries.insert(bisect_left(self.entries, entry), entry)
+                self.counts[entry] += 1
+
+    def remove(self, entries):
+        with self.lock:
+            for entry in entries:
+                if self.counts[entry] <= 0:
+                    continue
+                self.counts[entry] -= 1
+                if self.counts[entry] == 0:
+                    del self.counts[entry]
+                    i = bisect_left(self.entries, entry)
+                    if i < len(self.entries) and self.entries[i] == entry:
+                        del self.entries[i]
+
+    def matches(self, prefix):
+        """Entries whose term starts with `prefix`, at most SCAN_LIMIT of them"""
+        with self.lock:
+            return self._matches(prefix)
+
+    def _matches(self, prefix):
+        found = []
+        i = bisect_left(self.entries, (prefix,))
+        while i < len(self.entries) and len(found) < SCAN_LIMIT:
+            entry = self.entries[i]
+            if not entry[0].startswith(prefix):
+                break
+            found.append(entry)
+            i += 1
+        return found
+
+    def search(self, query, limit=8):
+        """Suggestions for a typed prefix, most common first: [(text, kind), ...]"""
+        prefixes = {normalize(query), compact(query)} - {''}
+        best = {}
+        with self.lock:
+            for prefix in prefixes:
+                for entry in self._matches(prefix):
+                    _, kind, text = entry
+                    best[(text, kind)] = max(best.get((text, kind), 0), self.counts[entry])
+        ranked = sorted(best.items(), key=lambda item: (-item[1], len(item[0][0]), item[0][0]))
+        return [suggestion for suggestion, _ in ranked[:limit]]
+
+
+def build_index():
+    """Build the index from the catalogue in one streamed query"""
+    from .models import Vehicle
+
+    entries = []
+    rows = Vehicle.objects.values_list(
+        'brand', 'model',
+        'tyres__front_size_key', 'tyres__front_construction',
+        'tyres__rear_size_key', 'tyres__rear_construction',
+    ).iterator(chunk_size=5000)
+    for brand, model, front_key, front_construction, rear_key, rear_construction in rows:
+        entries.extend(vehicle_entries(brand, model))
+        entries.extend(size_entries((front_key, front_construction), (rear_key, rear_construction)))
+    return PrefixIndex(entries)
+
+
+def shared_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from a fresh value so a cleared cache never matches a stale index
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_index():
+    """
+    The process-local index, built on first use. Every LOCAL_TTL seconds the
+    shared cache version is checked and the index rebuilt if another process
+    changed the catalogue since it was built.
+    """
+    now = time.monotonic()
+    if _local['index'] is not None and now - _local['checked'] < LOCAL_TTL:
+        return _local['index']
+
+    version = shared_version()
+    if _local['index'] is None or version != _local['version']:
+        _local['index'] = build_index()
+        _local['version'] = version
+    _local['checked'] = now
+    return _local['index']
+
+
+def clear_local():
+    _local.update(index=None, version=None, checked=0.0)
+
+
+def apply_changes(removed=(), added=()):
+    """
+    Update this process's index once the surrounding transaction commits,
+    then bump the shared version so other processes rebuild theirs.
+    """
+    removed, added = list(removed), list(added)
+    if removed or added:
+        transaction.on_commit(lambda: _apply(removed, added))
+
+
+def _apply(removed, added):
+    index = _local['index']
+    if index is not None:
+        index.remove(removed)
+        index.add(added)
+
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = None
+
+    # Keep the local index only if no other process bumped the version in between
+    if index is not None and version is not None and version == (_local['version'] or 0) + 1:
+        _local['version'] = version
+    else:
+        _local['checked'] = 0.0
+
+
+def bump_version():
+    """Make every process rebuild its index from the database"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+    clear_local()
+
+
+def suggest(query, limit=8):
+    return get_index().search(query, limit)
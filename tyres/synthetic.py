@@ -0,0 +1,131 @@
+# tyres/synthetic.py
+"""
+Synthetic catalogues for benchmarking. Rows look like the import CSV and
+are consistent within a vehicle: a car has matching metric sizes on both
+axles and car pressures, a bike a narrow front and wider rear, and so on.
+The same seed always produces the same catalogue.
+"""
+import random
+
+from .importing import BulkVehicleImporter
+from .models import TyrePressureData
+
+BRANDS = {
+    'CAR': ['Maruti Suzuki', 'Hyundai', 'Tata', 'Mahindra', 'Toyota', 'Honda', 'Kia', 'Renault', 'Skoda',
+            'Volkswagen', 'MG', 'Nissan'],
+    'BIKE': ['Hero', 'Bajaj', 'TVS', 'Royal Enfield', 'Yamaha', 'Honda', 'Suzuki', 'KTM', 'Kawasaki'],
+    'SCOOTER': ['Honda', 'TVS', 'Suzuki', 'Hero', 'Yamaha', 'Ather', 'Ola', 'Bajaj'],
+}
+STEMS = {
+    'CAR': ['Swift', 'Verna', 'Nexon', 'Scorpio', 'Innova', 'City', 'Seltos', 'Kwid', 'Slavia', 'Virtus',
+            'Hector', 'Magnite', 'Baleno', 'Creta', 'Punch', 'Thar', 'Glanza', 'Amaze', 'Sonet', 'Kiger'],
+    'BIKE': ['Splendor', 'Pulsar', 'Apache', 'Classic', 'FZ', 'Shine', 'Gixxer', 'Duke', 'Ninja', 'Platina',
+             'Raider', 'Hunter', 'R15', 'Unicorn', 'Dominar', 'Xpulse'],
+    'SCOOTER': ['Activa', 'Jupiter', 'Access', 'Pleasure', 'Fascino', 'Rizta', 'S1', 'Chetak', 'Ntorq',
+                'Dio', 'Burgman', 'Destini'],
+}
+TRIMS = ['', ' S', ' X', ' Pro', ' Sport', ' Plus', ' Neo', ' Max']
+# (first year, newest year) of the model years a synthetic model spans
+YEARS = (2000, 2025)
+MAX_MODEL_YEARS = 8
+
+# Tyre options per category: (front, rear, recommended front/rear PSI)
+CAR_WIDTHS = [145, 155, 165, 175, 185, 195, 205, 215, 225, 235, 255]
+BIKE_TYRES = [
+    ('2.75-18', '3.00-18', 26, 30),
+    ('80/100-18', '90/90-18', 25, 32),
+    ('80/100-17', '100/90-17', 25, 33),
+    ('90/90-17', '110/80-17', 26, 32),
+    ('100/80-17', '140/70-17', 28, 32),
+    ('110/70-17', '150/60-17', 29, 33),
+    ('90/90-19', '120/80-18', 26, 33),
+]
+SCOOTER_TYRES = [
+    ('90/90-12', '90/100-10', 22, 29),
+    ('90/100-10', '90/100-10', 22, 29),
+    ('3.50-10', '3.50-10', 22, 32),
+    ('100/80-12', '110/80-12', 25, 29),
+    ('110/70-12', '120/70-12', 26, 30),
+]
+CATEGORY_WEIGHTS = {'CAR': 0.4, 'BIKE': 0.35, 'SCOOTER': 0.25}
+
+
+def _model_name(category, index):
+    """Unique model name for the index-th model of a category"""
+    stems = STEMS[category]
+    stem = stems[index % len(stems)]
+    variant = index // len(stems)
+    trim = TRIMS[variant % len(TRIMS)]
+    # First round: plain names; after that a displacement/series number
+    number = variant // len(TRIMS)
+    return f"{stem}{'' if not number else f' {100 + number * 5}'}{trim}"
+
+
+def _tyres(category, rng):
+    if category == 'CAR':
+        width = rng.choice(CAR_WIDTHS)
+        aspect_ratio = max(40, min(80, 5 * round((95 - width / 5) / 5) + rng.choice([-5, 0, 5])))
+        rim = max(12, min(20, width // 13 + rng.choice([-1, 0, 0, 1])))
+        size = f"{width}/{aspect_ratio}R{rim}"
+        front_psi = rear_psi = rng.choice([30, 32, 33, 35, 36])
+        return {'tyre_size': size, 'front_size': size, 'rear_size': size}, front_psi, rear_psi
+    front, rear, front_psi, rear_psi = rng.choice(BIKE_TYRES if category == 'BIKE' else SCOOTER_TYRES)
+    return {'front_size': front, 'rear_size': rear, 'tyre_size': ''}, front_psi, rear_psi
+
+
+def pressure_chart(front_psi, rear_psi):
+    """TyrePressureData field values around a recommended pressure"""
+    values = {}
+    for prefix, offset in (('standard', 0), ('cold', 0), ('hot', 3), ('light_load', 0), ('full_load', 2),
+                           ('max', 8)):
+        values[f'{prefix}_front'] = f'{front_psi + offset} PSI'
+        values[f'{prefix}_rear'] = f'{rear_psi + offset} PSI'
+    return values
+
+
+def synthetic_rows(count, seed=0, pressure_fraction=0.3):
+    """
+    `count` import rows. Each model gets a run of consecutive model years
+    with the same tyres; a `pressure_fraction` of rows also carry a
+    'pressure_data' dict for a TyrePressureData record.
+    """
+    rng = random.Random(seed)
+    model_counts = dict.fromkeys(CATEGORY_WEIGHTS, 0)
+    categories, weights = zip(*CATEGORY_WEIGHTS.items())
+    produced = 0
+    while produced < count:
+        category = rng.choices(categories, weights)[0]
+        model = _model_name(category, model_counts[category])
+        model_counts[category] += 1
+        brand = rng.choice(BRANDS[category])
+        tyres, front_psi, rear_psi = _tyres(category, rng)
+        # Same model name under another brand is another vehicle; years keep slugs apart
+        first_year = rng.randint(*YEARS)
+        for year in range(first_year, min(first_year + rng.randint(1, MAX_MODEL_YEARS), YEARS[1] + 1)):
+            row = {
+                'brand': brand, 'model': model, 'year': year, 'category': category, **tyres,
+                'front_pressure': f'{front_psi} PSI', 'rear_pressure': f'{rear_psi} PSI',
+            }
+            if rng.random() < pressure_fraction:
+                row['pressure_data'] = pressure_chart(front_psi, rear_psi)
+            yield row
+            produced += 1
+            if produced >= count:
+                return
+
+
+class SyntheticCatalogueImporter(BulkVehicleImporter):
+    """BulkVehicleImporter that also writes the rows' TyrePressureData"""
+
+    def build(self, row):
+        vehicle, tyres = super().build(row)
+        vehicle._pressure_data = row.get('pressure_data')
+        return vehicle, tyres
+
+    def _write(self, batch):
+        saved = super()._write(batch)
+        TyrePressureData.objects.bulk_create([
+            TyrePressureData(vehicle=vehicle, **vehicle._pressure_data).normalize_pressures()
+            for vehicle, _ in saved if vehicle._pressure_data
+        ])
+        return saved
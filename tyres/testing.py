@@ -0,0 +1,223 @@
+# tyres/testing.py
+import email
+import re
+import socketserver
+import threading
+from contextlib import ContextDecorator, contextmanager
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+from . import alternatives, facets, suggest
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def format_queries(queries):
+    return '\n'.join(f"  {i}. {query['sql']}" for i, query in enumerate(queries, start=1))
+
+
+class query_budget(ContextDecorator):
+    """
+    Fail when the wrapped block runs more than `max_queries` SQL queries.
+
+    Works as a context manager (`with query_budget(2) as ctx:`; `ctx` is the
+    underlying CaptureQueriesContext) or as a decorator on a test method.
+    """
+
+    def __init__(self, max_queries, using=DEFAULT_DB_ALIAS):
+        self.max_queries = max_queries
+        self.using = using
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connections[self.using])
+        return self.context.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None and len(self.context) > self.max_queries:
+            raise QueryBudgetExceeded(
+                f"{len(self.context)} queries executed, budget is {self.max_queries}:\n"
+                f"{format_queries(self.context.captured_queries)}"
+            )
+        return False
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin for checking that a request's query count stays within a
+    budget and does not grow with the amount of data it returns.
+    """
+
+    def clear_caches(self):
+        for cache in caches.all():
+            cache.clear()
+        alternatives.clear_local()
+        facets.clear_local()
+        suggest.clear_local()
+
+    def capture_queries(self, func, using=DEFAULT_DB_ALIAS):
+        """Run `func` with cold caches and return (result, captured queries)"""
+        self.clear_caches()
+        with CaptureQueriesContext(connections[using]) as context:
+            result = func()
+        return result, context.captured_queries
+
+    def assertConstantQueries(self, func, grow, budget):
+        """
+        Call `func`, let `grow` add more matching data, call `func` again:
+        both runs must stay within `budget` and issue the same number of queries.
+        """
+        _, before = self.capture_queries(func)
+        grow()
+        _, after = self.capture_queries(func)
+
+        self.assertLessEqual(
+            len(after), budget,
+            f"{len(after)} queries executed, budget is {budget}:\n{format_queries(after)}"
+        )
+        self.assertEqual(
+            len(before), len(after),
+            f"query count grew with result size ({len(before)} -> {len(after)}):\n{format_queries(after)}"
+        )
+
+
+# Statements that read rows; inserts, savepoints and the like have no plan worth checking
+EXPLAINED_STATEMENTS = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+# `FROM "tyres_vehicle" U0` / `JOIN "tyres_tyresize" T3`: the aliases Django gives subquery and join tables
+TABLE_ALIAS = re.compile(r'(?:FROM|JOIN)\s+"(\w+)"(?:\s+(?:AS\s+)?"?([A-Z]\d+)\b)?')
+# `SCAN tyres_vehicle`, `SCAN U0`, `SCAN tyres_vehicle USING INDEX ...`: the plan steps through a whole table
+TABLE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?(?: USING (COVERING )?INDEX \w+)?$')
+
+
+class QueryPlan:
+    """A captured query and the detail lines of its EXPLAIN QUERY PLAN"""
+
+    def __init__(self, sql, details):
+        self.sql = sql
+        self.details = details
+
+    def full_scans(self, prefix='tyres_'):
+        """
+        Tables with `prefix` that the query reads in full. A scan along an
+        index counts too, unless the index gives a LIMITed query its order
+        (a keyset page stops after a page of rows); a scan of a covering
+        index reads only the index.
+        """
+        aliases = {alias: table for table, alias in TABLE_ALIAS.findall(self.sql) if alias}
+        sorted_afterwards = any(
+            detail.startswith('USE TEMP B-TREE') and 'ORDER BY' in detail for detail in self.details
+        )
+        ordered_page = ' LIMIT ' in self.sql and not sorted_afterwards
+        tables = set()
+        for detail in self.details:
+            match = TABLE_SCAN.match(detail)
+            if match is None or match.group(3) or (ordered_page and 'USING INDEX' in detail):
+                continue
+            name = match.group(2) or match.group(1)
+            table = aliases.get(name, match.group(1))
+            if table.startswith(prefix):
+                tables.add(table)
+        return tables
+
+    def __str__(self):
+        return '\n'.join([self.sql, *(f'    {detail}' for detail in self.details)])
+
+
+def explain(sql, params, using=DEFAULT_DB_ALIAS):
+    """SQLite's EXPLAIN QUERY PLAN detail lines for a query"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@contextmanager
+def capture_query_plans(using=DEFAULT_DB_ALIAS):
+    """
+    Collect the plan of every reading query run in the block:
+
+        with capture_query_plans() as plans:
+            self.client.get(...)
+        [plan.full_scans() for plan in plans]
+
+    The plans are filled in when the block exits.
+    """
+    queries, plans = [], []
+
+    def collect(execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+            queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connections[using].execute_wrapper(collect):
+        yield plans
+    plans.extend(QueryPlan(sql, explain(sql, params, using)) for sql, params in queries)
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: accepts every message and keeps it"""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.reply('220 localhost ready')
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                sender, recipients = command[10:].strip(' <>').split('>')[0], []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command[8:].strip(' <>').split('>')[0])
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                for data in iter(self.rfile.readline, b''):
+                    if data in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(data[1:] if data.startswith(b'..') else data)
+                message = email.message_from_bytes(b''.join(lines))
+                self.server.messages.append((sender, recipients, message))
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:  # RSET, NOOP, ...
+                self.reply('250 OK')
+
+
+class local_smtp_server:
+    """
+    In-process SMTP server on a free localhost port, for exercising the real
+    SMTP email backend in tests:
+
+        with local_smtp_server() as server:
+            with self.settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                               EMAIL_HOST='localhost', EMAIL_PORT=server.port):
+                ...
+            server.messages  # [(sender, recipients, email.message.Message)]
+    """
+
+    def __enter__(self):
+        self.server = socketserver.ThreadingTCPServer(('localhost', 0), _SMTPHandler)
+        self.server.daemon_threads = True
+        self.server.messages = self.messages = []
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
@@ -1,3 +1,1438 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.db import connections
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from . import alternatives, benchmark, calculator, facets, intake, page_cache, prerender, pressures, replica, similarity, sitemap, suggest, tyre_sizes, urls
+from .cache_backends import LocalRedisCache
+from .search import search_vehicles
+from .forms import TyreCalculatorForm
+from .importing import BulkVehicleImporter
+from .approvals import approve_submissions
+from .pagination import KeysetPaginator, encode_cursor
+from .models import Vehicle, TyreSize, TyrePressureData, FacetCount, SimilarVehicle, AffiliateLink, VehicleSubmission
+from .synthetic import synthetic_rows
+from .testing import QueryBudgetMixin, capture_query_plans, local_smtp_server, query_budget
+
+
+def make_vehicles(count, start=0, brand='Honda', category='SCOOTER', front='90/90-12', rear='90/100-10'):
+    """Create `count` vehicles with tyre sizes; returns the vehicles"""
+    vehicles = []
+    for i in range(start, start + count):
+        vehicle = Vehicle.objects.create(brand=brand, model=f'Model {i}', year=2000 + i % 25, category=category)
+        TyreSize.objects.create(vehicle=vehicle, front_size=front, rear_size=rear,
+                                front_pressure='29 PSI', rear_pressure='33 PSI')
+        vehicles.append(vehicle)
+    return vehicles
+
+
+# Query budget per URL name in tyres/urls.py: (budget, method, url kwargs, request data).
+# 'slug' as the url kwargs means the slug of a test vehicle.
+URL_BUDGETS = {
+    'home': (2, 'get', None, {'q': 'Honda'}),
+    'vehicle_list': (3, 'get', None, {}),
+    # Vehicle pages: + 1 for the conditional-GET timestamp when caches are cold;
+    # + 1 for the fallback similar vehicles, as none are precomputed here
+    'vehicle_detail': (4, 'get', 'slug', {}),
+    'search_by_tyre': (1, 'get', None, {'front': '90/90-12'}),
+    'about': (0, 'get', None, {}),
+    'submit_vehicle': (0, 'get', None, {}),
+    'submission_success': (0, 'get', None, {}),
+    'tyre_calculator': (0, 'get', None, {}),
+    'compare_tyres': (0, 'get', None, {}),
+    'calculate_tyre_size': (1, 'post', None, {'width': 185, 'aspect_ratio': 65, 'rim_diameter': 15}),
+    'calculate_tyre_size_batch': (1, 'post', None, json.dumps(['185/65R15', '90/90-12'])),
+    'search_by_size_range': (2, 'get', None, {'min_width': 80, 'max_width': 100}),
+    'pressure_chart': (2, 'get', 'slug', {}),
+    'suggest': (1, 'get', None, {'q': 'hon'}),
+    'api_vehicles': (2, 'get', None, {'fields': 'slug,tyres,pressure_data', 'limit': 500}),
+    'api_vehicle': (2, 'get', 'slug', {'fields': 'slug,tyres,pressure_data'}),
+    'api_vehicle_lookup': (2, 'get', None, {'slugs': 'honda-model-0-2000,honda-model-100-2000',
+                                            'fields': 'slug,pressure_data'}),
+    'export_catalogue': (2, 'get', {'format': 'ndjson'}, {}),
+    'search_by_pressure': (2, 'get', None, {'min_pressure': 25, 'max_pressure': 35}),
+}
+
+
+# More inputs for QueryPlanTests, on top of URL_BUDGETS: every filter and sort
+# order the catalogue views take. (url name, GET data)
+PLAN_INPUTS = [
+    ('home', {'category': 'SCOOTER'}),
+    ('vehicle_list', {'category': 'SCOOTER'}),
+    ('vehicle_list', {'brand': 'Honda'}),
+    ('vehicle_list', {'category': 'SCOOTER', 'brand': 'Honda'}),
+    ('vehicle_list', {'year_from': 2001, 'year_to': 2010}),
+    ('vehicle_list', {'tyre_width': 90}),
+    ('vehicle_list', {'rim_size': 12}),
+    ('vehicle_list', {'tyre_width': 90, 'rim_size': 12}),
+    ('vehicle_list', {'sort_by': 'model'}),
+    ('vehicle_list', {'sort_by': 'year_asc'}),
+    ('vehicle_list', {'sort_by': 'year_desc', 'category': 'SCOOTER'}),
+    ('search_by_tyre', {'rear': '90/100-10'}),
+    ('search_by_tyre', {'front': '90/90-12', 'rear': '90/100-10'}),
+    ('search_by_size_range', {'min_rim': 10, 'max_rim': 12}),
+    ('search_by_size_range', {'min_width': 80, 'max_width': 100, 'min_rim': 10, 'max_rim': 12}),
+    ('search_by_pressure', {'min_pressure': 25, 'max_pressure': 35, 'axle': 'rear'}),
+    ('api_vehicles', {'category': 'SCOOTER'}),
+    ('api_vehicles', {'brand': 'Honda'}),
+]
+
+# Full-table scans that are the point of the query: (url name, table) -> why
+SCAN_ALLOWED = {
+    ('vehicle_list', 'tyres_facetcount'): "get_facets() loads every count once into the local cache",
+    ('calculate_tyre_size', 'tyres_tyresize'): "the alternatives index is built from every distinct size, once",
+    ('calculate_tyre_size_batch', 'tyres_tyresize'): "the alternatives index is built from every distinct size, once",
+    ('search_by_size_range', 'tyres_tyresize'): "min_rim OR max_rim (either axle) matches nearly every tyre",
+    ('export_catalogue', 'tyres_vehicle'): "the export is the whole catalogue",
+    ('export_catalogue', 'tyres_tyrepressuredata'): "the export is the whole catalogue",
+}
+
+
+@override_settings(EXPORT_TOKEN='test-token')
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Every view must run a constant number of queries regardless of result size"""
+
+    def setUp(self):
+        self.vehicle = make_vehicles(3)[0]
+
+    def grow(self):
+        self.grown = make_vehicles(30, start=100)
+
+    def request(self, name):
+        _, method, kwarg, data = URL_BUDGETS[name]
+        kwargs = {'slug': self.vehicle.slug} if kwarg == 'slug' else kwarg
+        url = reverse(name, kwargs=kwargs)
+        # String data is sent as a JSON body
+        extra = {'content_type': 'application/json'} if isinstance(data, str) else {}
+        response = getattr(self.client, method)(url, data, HTTP_AUTHORIZATION='Bearer test-token', **extra)
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def test_every_url_has_a_budget(self):
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names - set(URL_BUDGETS), set())
+
+    def test_url_query_budgets(self):
+        for name, (budget, *_) in URL_BUDGETS.items():
+            with self.subTest(url=name):
+                try:
+                    self.assertConstantQueries(lambda: self.request(name), self.grow, budget)
+                finally:
+                    # Leave the catalogue as it was for the next URL
+                    Vehicle.objects.filter(pk__in=[v.pk for v in self.grown]).delete()
+
+    def test_search_by_tyre_returns_all_matches(self):
+        make_vehicles(5, start=10, front='185/65R15', rear='185/65R15', category='CAR')
+        with query_budget(1):
+            response = self.client.get(reverse('search_by_tyre'), {'front': '185/65 R15'})
+        self.assertEqual(len(response.context['results']), 5)
+
+    def test_search_by_tyre_falls_back_to_substrings(self):
+        make_vehicles(2, start=10, front='90/90-12 Tubeless', rear='3.00-10', category='SCOOTER')
+        # Text the parser can't read is matched as a substring, as before
+        response = self.client.get(reverse('search_by_tyre'), {'front': 'tubeless'})
+        self.assertEqual(len(response.context['results']), 2)
+        response = self.client.get(reverse('search_by_tyre'), {'front': 'TUBELESS', 'rear': '3.00 10'})
+        self.assertEqual(len(response.context['results']), 2)
+        response = self.client.get(reverse('search_by_tyre'), {'front': 'tube type'})
+        self.assertEqual(response.context['results'], [])
+
+    def test_query_budget_fails_when_exceeded(self):
+        with self.assertRaises(AssertionError):
+            with query_budget(0):
+                list(Vehicle.objects.all())
+
+
+@override_settings(EXPORT_TOKEN='test-token')
+class QueryPlanTests(QueryBudgetMixin, TestCase):
+    """No view may read a whole tyres_* table unless SCAN_ALLOWED says why"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vehicle = make_vehicles(3)[0]
+        make_vehicles(2, start=10, brand='Maruti', category='CAR', front='185/65R15', rear='185/65R15')
+        TyrePressureData.objects.create(vehicle=cls.vehicle, standard_front='29 PSI', standard_rear='33 PSI')
+
+    def cases(self):
+        """(url name, method, url kwargs, data) for every request the suite makes"""
+        for name, (_, method, kwarg, data) in URL_BUDGETS.items():
+            yield name, method, {'slug': self.vehicle.slug} if kwarg == 'slug' else kwarg, data
+        for name, data in PLAN_INPUTS:
+            yield name, 'get', None, data
+
+    def plans(self, name, method, kwargs, data):
+        self.clear_caches()
+        extra = {'content_type': 'application/json'} if isinstance(data, str) else {}
+        with capture_query_plans() as plans:
+            response = getattr(self.client, method)(
+                reverse(name, kwargs=kwargs), data, HTTP_AUTHORIZATION='Bearer test-token', **extra
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return plans
+
+    def test_no_unexpected_full_scans(self):
+        seen = set()
+        for name, method, kwargs, data in self.cases():
+            with self.subTest(url=name, data=data):
+                plans = self.plans(name, method, kwargs, data)
+                scans = {(name, table): plan for plan in plans for table in plan.full_scans()}
+                seen.update(scans)
+                unexpected = [str(plan) for key, plan in scans.items() if key not in SCAN_ALLOWED]
+                self.assertEqual(unexpected, [], '\n'.join(unexpected))
+        # An entry nothing needs any more should go
+        self.assertEqual(set(SCAN_ALLOWED) - seen, set())
+
+    def test_every_url_is_covered(self):
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names - {name for name, *_ in self.cases()}, set())
+
+    def test_full_scans_are_detected(self):
+        with capture_query_plans() as plans:
+            list(Vehicle.objects.filter(slug__contains='model'))
+            list(Vehicle.objects.filter(id__in=TyreSize.objects.filter(notes='x').values('vehicle_id')))
+            list(Vehicle.objects.filter(brand='Honda')[:5])
+            list(Vehicle.objects.order_by('brand', 'model', 'year')[:5])
+        self.assertEqual([plan.full_scans() for plan in plans], [{'tyres_vehicle'}, {'tyres_tyresize'}, set(), set()])
+
+
+class FacetTests(QueryBudgetMixin, TestCase):
+
+    def counts(self):
+        return {(f.facet, f.value): f.count for f in FacetCount.objects.all()}
+
+    def test_incremental_updates_match_rebuild(self):
+        vehicles = make_vehicles(3)
+        make_vehicles(2, start=10, brand='Bajaj', category='BIKE', front='80/100-17', rear='100/90-17')
+        tyres = vehicles[0].tyres
+        tyres.front_size = '100/80-12'
+        tyres.save()
+        vehicles[1].delete()
+        BulkVehicleImporter().run([
+            {'brand': 'Tata', 'model': 'Nexon', 'year': '2023', 'category': 'CAR', 'tyre_size': '215/60R16'},
+        ])
+
+        incremental = self.counts()
+        self.assertEqual(incremental[('brand', 'Honda')], 2)
+        self.assertEqual(incremental[('width', '100')], 3)
+        self.assertEqual(incremental[('rim', '16')], 1)
+        self.assertEqual(incremental, dict(facets.rebuild_facets()))
+
+    def test_vehicle_list_facets_cost_no_queries_when_warm(self):
+        make_vehicles(3)
+        self.clear_caches()
+        facets.get_facets()
+        with query_budget(0):
+            data = facets.get_facets()
+        self.assertEqual(data['brand'], [('Honda', 3)])
+        self.assertEqual(data['width'], [(90, 3)])
+
+
+class TyreSizeTests(TestCase):
+
+    # (input, (key, width, aspect ratio, construction, rim)); None when not a full size
+    SIZES = [
+        ('90/90-12', ('90/90-12', 90, 90, '-', 12)),
+        ('90/90 12', ('90/90-12', 90, 90, '-', 12)),
+        ('90/90R12', ('90/90-12', 90, 90, 'R', 12)),
+        ('90/90ZR12', ('90/90-12', 90, 90, 'ZR', 12)),
+        ('130/70B18', ('130/70-18', 130, 70, 'B', 18)),
+        ('P215/60 R16 91H', ('215/60-16', 215, 60, 'R', 16)),
+        ('295/65R22.5', ('295/65-22.5', 295, 65, 'R', 22.5)),
+        ('  185 / 65  r 15 ', ('185/65-15', 185, 65, 'R', 15)),
+        ('2.75-18', ('2.75-18', None, None, '-', 18)),
+        ('3.00 r10', ('3.00-10', None, None, 'R', 10)),
+        ('35x12.5R18', ('35X12.5-18', None, None, 'R', 18)),
+        ('31X10.50 R15', ('31X10.5-15', None, None, 'R', 15)),
+        ('90/90', None),
+        ('abc', None),
+        ('90', None),
+        ('12-90/90', None),
+        ('', None),
+        (None, None),
+    ]
+
+    # (input, prefix, lookup)
+    LOOKUPS = [
+        ('90/90 12', 'front', {'front_size_key': '90/90-12'}),
+        ('2.75-18', 'rear', {'rear_size_key': '2.75-18'}),
+        (' 185/65 ', 'rear', {'rear_width': 185, 'rear_aspect_ratio': 65}),
+        ('p185/65', 'front', {'front_width': 185, 'front_aspect_ratio': 65}),
+        ('abc', 'front', None),
+        ('', 'rear', None),
+    ]
+
+    def test_parse_tyre_size(self):
+        for text, expected in self.SIZES:
+            with self.subTest(text=text):
+                spec = tyre_sizes.parse_tyre_size(text)
+                self.assertEqual(tuple(spec) if spec else None, expected)
+
+    def test_size_lookup(self):
+        for text, prefix, expected in self.LOOKUPS:
+            with self.subTest(text=text, prefix=prefix):
+                self.assertEqual(tyre_sizes.size_lookup(text, prefix), expected)
+
+    def test_normalize_tyre_fields(self):
+        tyres = tyre_sizes.normalize_tyre_fields(TyreSize(tyre_size='90/90 12', rear_size='3.00-10'))
+        self.assertEqual((tyres.front_size_key, tyres.front_width, tyres.front_aspect_ratio, tyres.front_rim),
+                         ('90/90-12', 90, 90, 12))
+        self.assertEqual((tyres.rear_size_key, tyres.rear_width, tyres.rear_rim), ('3.00-10', None, 10))
+
+        # Unparseable sizes keep dimensions entered directly
+        tyres = tyre_sizes.normalize_tyre_fields(TyreSize(front_size='tubeless', front_width=100,
+                                                          front_aspect_ratio=80, front_rim=17))
+        self.assertEqual((tyres.front_size_key, tyres.rear_size_key), ('100/80-17', ''))
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        make_vehicles(3)
+        self.activa = Vehicle.objects.create(brand='Honda', model='Activa 6G', year=2023, category='SCOOTER')
+        Vehicle.objects.create(brand='Hero', model='Pleasure Plus', year=2023, category='SCOOTER')
+
+    def test_multi_word_query_is_ranked(self):
+        results = search_vehicles('honda activa 2023')
+        self.assertEqual(results, [self.activa])
+
+    def test_prefix_and_substring_matches(self):
+        self.assertIn(self.activa, search_vehicles('act'))
+        self.assertEqual(search_vehicles('ctiva'), [self.activa])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.activa.model = 'Dio'
+        self.activa.save()
+        self.assertEqual(search_vehicles('activa'), [])
+        self.assertEqual(search_vehicles('honda dio'), [self.activa])
+        self.activa.delete()
+        self.assertEqual(search_vehicles('dio'), [])
+
+    def test_tyre_size_query_uses_size_keys(self):
+        self.assertEqual(len(search_vehicles('90/90 12')), 3)
+
+
+class SuggestTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        make_vehicles(3)
+        make_vehicles(1, start=10, brand='Maruti Suzuki', category='CAR', front='165/80 R14', rear='165/80R14')
+        self.clear_caches()
+
+    def texts(self, query):
+        return [text for text, _ in suggest.suggest(query)]
+
+    def test_brand_model_and_size_prefixes(self):
+        self.assertEqual(self.texts('hon')[0], 'Honda')
+        self.assertIn('Honda Model 1', self.texts('model 1'))
+        self.assertEqual(self.texts('suz'), [])
+        self.assertEqual(self.texts('maruti s'), ['Maruti Suzuki', 'Maruti Suzuki Model 10'])
+        self.assertEqual(self.texts('90/9'), ['90/90-12'])
+        self.assertEqual(self.texts('165/80 r'), ['165/80R14'])
+        self.assertEqual(self.texts('165/80-1'), ['165/80R14'])
+
+    def test_warm_index_costs_no_queries(self):
+        suggest.get_index()
+        with query_budget(0):
+            response = self.client.get(reverse('suggest'), {'q': 'ho'})
+        self.assertEqual(response.json()['suggestions'][0], {'text': 'Honda', 'type': 'brand'})
+
+    def test_index_follows_catalogue_changes(self):
+        suggest.get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle = Vehicle.objects.create(brand='Hero', model='Pleasure', year=2023, category='SCOOTER')
+        with query_budget(0):
+            self.assertEqual(self.texts('plea'), ['Hero Pleasure'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle.model = 'Maestro'
+            vehicle.save()
+        self.assertEqual(self.texts('plea'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Vehicle.objects.filter(brand='Honda').first().delete()
+            vehicle.delete()
+        self.assertEqual(self.texts('he'), [])
+        self.assertEqual(suggest.get_index().counts[('honda', 'brand', 'Honda')], 2)
+
+    def test_searches_see_a_consistent_index_while_it_changes(self):
+        index = suggest.PrefixIndex([('honda', 'brand', 'Honda'), ('honda zz', 'model', 'Honda ZZ')])
+        churn = [(f'honda {i:03}', 'model', f'Honda {i:03}') for i in range(200)]
+        stop, seen = threading.Event(), []
+
+        # Without the lock, lookups racing the inserts miss or misread entries
+        def writer():
+            while not stop.is_set():
+                index.add(churn)
+                index.remove(churn)
+
+        thread = threading.Thread(target=writer)
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        thread.start()
+        try:
+            started = time.monotonic()
+            while time.monotonic() - started < 0.5:
+                seen.append(index.matches('honda z') == [('honda zz', 'model', 'Honda ZZ')])
+        finally:
+            stop.set()
+            thread.join()
+            sys.setswitchinterval(interval)
+        self.assertTrue(all(seen))
+        self.assertEqual(len(index), 2)
+
+
+class BatchCalculatorTests(TestCase):
+
+    def post(self, data, content_type='application/json', **params):
+        url = reverse('calculate_tyre_size_batch')
+        if params:
+            url += '?' + '&'.join(f'{key}={value}' for key, value in params.items())
+        return self.client.post(url, data, content_type=content_type)
+
+    def test_batch_matches_single_size_responses(self):
+        response = self.post(json.dumps([
+            '185/65R15', {'width': 90, 'aspect_ratio': 90, 'rim_diameter': 12}, {'size': '215/60 R16'},
+        ]))
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+
+        for result, (width, aspect_ratio, rim) in zip(results, [(185, 65, 15), (90, 90, 12), (215, 60, 16)]):
+            single = self.client.post(reverse('calculate_tyre_size'),
+                                      {'width': width, 'aspect_ratio': aspect_ratio, 'rim_diameter': rim})
+            self.assertEqual(result, single.json())
+
+    def test_csv_batch_with_reference(self):
+        response = self.post('width,aspect_ratio,rim_diameter\n185,65,15\n195,60,15\n', 'text/csv',
+                             reference='185/65R15')
+        results = response.json()['results']
+        self.assertEqual([r['metric_size'] for r in results], ['185/65R15', '195/60R15'])
+        self.assertEqual(results[0]['speedo_error'], '0.0%')
+        self.assertEqual(results[1]['speedo_error'], '-1.0%')
+
+    def test_invalid_rows_are_reported(self):
+        response = self.post(json.dumps(['185/65R15', 'abc', {'width': -1, 'aspect_ratio': 65, 'rim_diameter': 15}]))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.json()['invalid']], [1, 2])
+        self.assertEqual(self.post('not json').status_code, 400)
+
+    def test_sizes_outside_the_calculator_ranges_are_invalid_rows(self):
+        response = self.post('[' + ', '.join([
+            '{"width": 1e20, "aspect_ratio": 65, "rim_diameter": 15}',
+            '{"width": 185, "aspect_ratio": 65, "rim_diameter": "1e400"}',
+            '{"width": 185, "aspect_ratio": 65, "rim_diameter": 1e400}',
+            '{"width": 185, "aspect_ratio": 65, "rim_diameter": NaN}',
+            '{"width": 185.5, "aspect_ratio": 65, "rim_diameter": 15}',
+            '"185/65R99"',
+            '{"width": 400, "aspect_ratio": 20, "rim_diameter": 15.5}',
+            '{"width": 400, "aspect_ratio": 20, "rim_diameter": 7}',
+        ]) + ']')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.json()['invalid']], [0, 1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(response.json()['invalid'][7]['error'],
+                         'rim_diameter: Ensure this value is greater than or equal to 8.')
+
+    def test_rows_are_validated_like_the_single_size_form(self):
+        for width, aspect_ratio, rim in [(185, 65, 15), ('185', '65.0', ' 15 '), (185, 65, 15.5), (185, 65, 'x'),
+                                         (49, 65, 15), (400, 120, 30), (185, 65, None), (True, 65, 15)]:
+            data = {'width': width, 'aspect_ratio': aspect_ratio, 'rim_diameter': rim}
+            with self.subTest(**data):
+                form = TyreCalculatorForm(data)
+                try:
+                    size = calculator.checked_size(width, aspect_ratio, rim)
+                except ValueError:
+                    size = None
+                self.assertEqual(size, tuple(form.cleaned_data.values()) if form.is_valid() else None)
+
+    def test_batches_need_no_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.post(reverse('calculate_tyre_size_batch'), '["185/65R15"]', content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(TYRE_REFERENCE_SIZES=['185/65R15', '195/60R15'])
+class AlternativeSizeTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        make_vehicles(2, category='CAR', front='185/65R15', rear='185/65R15')
+        make_vehicles(1, start=10, category='CAR', front='175/70R15', rear='175/70R15')
+        make_vehicles(1, start=20, category='CAR', front='205/55R16', rear='205/55R16')
+        self.clear_caches()
+
+    def sizes(self, width, aspect_ratio, rim):
+        return [(a.size, a.source) for a in alternatives.find_alternatives(width, aspect_ratio, rim)]
+
+    def test_only_real_sizes_on_the_same_rim_within_tolerance(self):
+        # 185/65R15 is 621.5 mm; 175/70R15 is +0.7%, 195/60R15 -1.0%; 205/55R16 is on another rim
+        self.assertEqual(self.sizes(185, 65, 15), [('175/70R15', 'catalogue'), ('195/60R15', 'reference')])
+        self.assertEqual([a.size for a in alternatives.find_alternatives(185, 65, 15, tolerance=0.8)], ['175/70R15'])
+
+    def test_index_is_refreshed_when_sizes_change(self):
+        self.assertEqual(len(self.sizes(185, 65, 15)), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_vehicles(1, start=30, category='CAR', front='195/65R15', rear='195/65R15')
+        self.assertEqual(len(self.sizes(175, 70, 15)), 3)
+
+    def test_calculator_and_alt_size_population_use_the_index(self):
+        response = self.client.post(reverse('calculate_tyre_size'), {'width': 185, 'aspect_ratio': 65, 'rim_diameter': 15})
+        self.assertEqual([alt['size'] for alt in response.json()['alternative_sizes']], ['175/70R15', '195/60R15'])
+
+        call_command('populate_alt_sizes', stdout=open(os.devnull, 'w'))
+        tyres = TyreSize.objects.get(vehicle__model='Model 10')
+        self.assertEqual((tyres.alt_size_1, tyres.alt_size_2, tyres.alt_size_3), ('185/65R15', '195/60R15', ''))
+
+
+class CalculatorCacheTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.clear_caches()
+        calculator.clear_memo()
+        self.url = reverse('calculate_tyre_size')
+
+    def test_get_is_cacheable_and_memoized(self):
+        response = self.client.get(self.url + '?width=185&aspect_ratio=65&rim_diameter=15')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=604800', response['Cache-Control'])
+        self.assertEqual(response.json()['metric_size'], '185/65R15')
+
+        with query_budget(0):
+            repeat = self.client.get(self.url + '?width=185&aspect_ratio=65&rim_diameter=15',
+                                     HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat['ETag'], response['ETag'])
+        self.assertEqual(calculator.memo_stats()['hits'], 1)
+        self.assertEqual(calculator.memo_stats()['misses'], 1)
+
+    def test_non_canonical_query_redirects(self):
+        response = self.client.get(self.url, {'rim_diameter': '15', 'width': '185.0', 'aspect_ratio': '65'})
+        self.assertRedirects(response, self.url + '?width=185&aspect_ratio=65&rim_diameter=15',
+                             status_code=301, fetch_redirect_response=False)
+
+    def test_invalid_input_is_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'width': 'abc', 'aspect_ratio': 65, 'rim_diameter': 15}).status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'width': 185}).status_code, 400)
+        self.assertEqual(calculator.memo_stats()['misses'], 0)
+
+
+class SimilarVehicleTests(TestCase):
+
+    def setUp(self):
+        self.scooters = make_vehicles(4)
+        self.bikes = make_vehicles(3, start=10, brand='Bajaj', category='BIKE', front='80/100-17', rear='100/90-17')
+        self.cars = make_vehicles(3, start=20, brand='Tata', category='CAR', front='185/65R15', rear='185/65R15')
+
+    def stored(self):
+        return {
+            vehicle_id: [similar_id for similar_id, _ in found]
+            for vehicle_id, found in self.neighbours().items()
+        }
+
+    def neighbours(self):
+        found = {}
+        for link in SimilarVehicle.objects.all():
+            found.setdefault(link.vehicle_id, []).append((link.similar_id, link.score))
+        return found
+
+    def test_neighbours_share_category_and_sizes(self):
+        self.assertEqual(similarity.compute_similar_vehicles(k=2), 10)
+        stored = self.stored()
+        for group in (self.scooters, self.bikes, self.cars):
+            ids = {vehicle.pk for vehicle in group}
+            for vehicle in group:
+                self.assertEqual(len(stored[vehicle.pk]), 2)
+                self.assertTrue(set(stored[vehicle.pk]) <= ids - {vehicle.pk})
+
+        with query_budget(3):
+            response = self.client.get(reverse('vehicle_detail', kwargs={'slug': self.cars[0].slug}))
+        self.assertEqual([v.pk for v in response.context['similar_vehicles']], stored[self.cars[0].pk])
+
+    def test_incremental_run_matches_full_run(self):
+        similarity.compute_similar_vehicles(k=2)
+        self.assertEqual(similarity.compute_similar_vehicles(incremental=True, k=2), 0)
+
+        # A scooter gets bike tyres, a car is removed and a bike is added
+        tyres = self.scooters[0].tyres
+        tyres.front_size, tyres.rear_size = '80/100-17', '100/90-17'
+        tyres.save()
+        self.scooters[0].category = 'BIKE'
+        self.scooters[0].save()
+        self.cars[0].delete()
+        make_vehicles(1, start=30, brand='Bajaj', category='BIKE', front='80/100-17', rear='100/90-17')
+
+        self.assertGreater(similarity.compute_similar_vehicles(incremental=True, k=2), 0)
+        incremental = self.neighbours()
+        similarity.compute_similar_vehicles(k=2)
+        full = self.neighbours()
+        # Compared as sets: equidistant neighbours may swap ranks as the scaling shifts
+        self.assertEqual({v: {s for s, _ in found} for v, found in incremental.items()},
+                         {v: {s for s, _ in found} for v, found in full.items()})
+
+    def test_blocks_shrink_as_the_catalogue_grows(self):
+        self.assertEqual(similarity.block_size(1_000_000), similarity.BLOCK_MEMORY // 16_000_000)
+        self.assertEqual(similarity.block_size(10 ** 9), 1)
+        with mock.patch.object(similarity, 'BLOCK_MEMORY', 1):
+            blocked = similarity.compute_similar_vehicles(k=2) and self.stored()
+        similarity.compute_similar_vehicles(k=2)
+        self.assertEqual(blocked, self.stored())
+
+    def test_detail_falls_back_before_neighbours_are_computed(self):
+        response = self.client.get(reverse('vehicle_detail', kwargs={'slug': self.cars[0].slug}))
+        self.assertEqual({v.pk for v in response.context['similar_vehicles']},
+                         {v.pk for v in self.cars[1:]})
+
+
+class SitemapTests(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = self.settings(SITEMAP_ROOT=self.root, SITEMAP_VEHICLES_PER_SHARD=2)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.vehicles = make_vehicles(5)
+        self.shards = sorted({(vehicle.pk - 1) // 2 for vehicle in self.vehicles})
+
+    def content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_index_and_shards_are_streamed_in_one_query(self):
+        with query_budget(1):
+            index = self.content(self.client.get('/sitemap.xml'))
+        self.assertIn('/sitemap-pages.xml', index)
+        for shard in self.shards:
+            self.assertIn(f'/sitemap-vehicles-{shard}.xml', index)
+
+        urls = ''
+        for shard in self.shards:
+            with query_budget(2):
+                urls += self.content(self.client.get(f'/sitemap-vehicles-{shard}.xml'))
+        for vehicle in self.vehicles:
+            self.assertIn(f'/vehicle/{vehicle.slug}/</loc>', urls)
+            self.assertIn(f'/vehicle/{vehicle.slug}/pressure-chart/</loc>', urls)
+        self.assertEqual(self.client.get('/sitemap-vehicles-999.xml').status_code, 404)
+
+    def test_pregenerated_shards_are_only_rewritten_when_changed(self):
+        self.assertEqual(sitemap.generate_sitemaps('https://example.com'), (len(self.shards), 0))
+        self.assertEqual(sitemap.generate_sitemaps('https://example.com'), (0, len(self.shards)))
+
+        tyres = self.vehicles[-1].tyres
+        tyres.front_size = '100/80-12'
+        tyres.save()
+        self.assertEqual(sitemap.generate_sitemaps('https://example.com'), (1, len(self.shards) - 1))
+
+        with query_budget(0):
+            response = self.client.get(f'/sitemap-vehicles-{self.shards[0]}.xml')
+        self.assertIn(f'https://example.com/vehicle/{self.vehicles[0].slug}/', self.content(response))
+
+    def test_renamed_slug_rewrites_its_shard(self):
+        sitemap.generate_sitemaps('https://example.com')
+        Vehicle.objects.filter(pk=self.vehicles[0].pk).update(slug='honda-renamed-2000')
+        self.assertEqual(sitemap.generate_sitemaps('https://example.com'), (1, len(self.shards) - 1))
+        content = (Path(self.root) / sitemap.SHARD_FILE.format(self.shards[0])).read_text()
+        self.assertIn('/vehicle/honda-renamed-2000/', content)
+        self.assertNotIn(f'/vehicle/{self.vehicles[0].slug}/', content)
+
+    def test_emptied_shards_are_removed_on_a_forced_run(self):
+        sitemap.generate_sitemaps('https://example.com')
+        last = Path(self.root) / sitemap.SHARD_FILE.format(self.shards[-1])
+        self.assertTrue(last.exists())
+
+        self.vehicles[-1].delete()
+        self.assertEqual(sitemap.generate_sitemaps('https://example.com', force=True), (len(self.shards) - 1, 0))
+        self.assertFalse(last.exists())
+
+
+class PrerenderTests(TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = self.settings(PRERENDER_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.vehicles = make_vehicles(3) + make_vehicles(1, start=3, brand='Royal Enfield', category='BIKE')
+
+    def run_prerender(self):
+        written, unchanged, failed = prerender.prerender('http://testserver')
+        self.assertEqual(failed, {})
+        return written, unchanged
+
+    def test_pages_are_written_incrementally(self):
+        # Two pages per vehicle, plus 2 category and 2 brand listings
+        self.assertEqual(self.run_prerender(), (4 * 2 + 4, 0))
+        detail = (self.root / 'vehicle' / self.vehicles[0].slug / 'index.html').read_text()
+        self.assertIn('Model 0', detail)
+        self.assertTrue((self.root / 'vehicle' / self.vehicles[0].slug / 'pressure-chart' / 'index.html').exists())
+        self.assertIn('Royal Enfield', (self.root / 'vehicles' / 'brand' / 'royal-enfield' / 'index.html').read_text())
+        self.assertTrue((self.root / 'vehicles' / 'category' / 'BIKE' / 'index.html').exists())
+
+        self.assertEqual(self.run_prerender(), (0, 4))
+
+        tyres = self.vehicles[1].tyres
+        tyres.front_pressure = '31 PSI'
+        tyres.save()
+        self.assertEqual(self.run_prerender(), (2 + 4, 3))
+
+    def test_everything_a_page_shows_is_stamped(self):
+        self.run_prerender()
+        vehicle = self.vehicles[0]
+        vehicle.category = 'BIKE'
+        vehicle.save()
+        self.assertEqual(self.run_prerender(), (2 + 4, 3))
+
+        pressure = TyrePressureData.objects.create(vehicle=vehicle, standard_front='29', standard_rear='33')
+        self.assertEqual(self.run_prerender(), (2 + 4, 3))
+        pressure.delete()
+        self.assertEqual(self.run_prerender(), (2 + 4, 3))
+
+        SimilarVehicle.objects.create(vehicle=vehicle, similar=self.vehicles[1], rank=1, score=1.0)
+        self.assertEqual(self.run_prerender(), (2 + 4, 3))
+
+        AffiliateLink.objects.create(name='Shop', link_type='TYRE', url='https://shop.example.com')
+        self.assertEqual(self.run_prerender(), (4 * 2 + 4, 0))
+
+    def test_site_host_need_not_be_allowed(self):
+        with self.settings(ALLOWED_HOSTS=[]):
+            written, _, failed = prerender.prerender('https://yourdomain.com')
+        self.assertEqual((written, failed), (4 * 2 + 4, {}))
+        detail = (self.root / 'vehicle' / self.vehicles[0].slug / 'index.html').read_text()
+        self.assertIn('https://yourdomain.com/', detail)
+
+    def test_command_fails_when_every_page_fails(self):
+        with self.assertRaisesMessage(CommandError, 'All 12 pages failed'):
+            call_command('prerender_static', base_url='http://bad_host!', workers=1, stdout=io.StringIO())
+
+    def test_pages_of_deleted_vehicles_are_removed(self):
+        self.run_prerender()
+        gone = self.vehicles[-1]
+        gone.delete()
+        self.run_prerender()
+        self.assertFalse((self.root / 'vehicle' / gone.slug).exists())
+        self.assertFalse((self.root / 'vehicles' / 'brand' / 'royal-enfield').exists())
+        self.assertTrue((self.root / 'vehicle' / self.vehicles[0].slug / 'index.html').exists())
+
+
+class PageCacheTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.clear_caches()
+        self.first, self.second = make_vehicles(2)
+
+    def get(self, name, vehicle=None):
+        url = reverse(name, kwargs={'slug': vehicle.slug}) if vehicle else reverse(name)
+        return self.client.get(url)
+
+    def test_repeat_requests_are_served_from_cache(self):
+        first = self.get('vehicle_detail', self.first)
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        with query_budget(0):
+            second = self.get('vehicle_detail', self.first)
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertEqual(first.content, second.content)
+
+    def test_tyre_change_only_invalidates_that_vehicles_pages(self):
+        for vehicle in (self.first, self.second):
+            self.get('vehicle_detail', vehicle)
+            self.get('pressure_chart', vehicle)
+        self.get('vehicle_list')
+
+        tyres = self.first.tyres
+        tyres.front_pressure = '31 PSI'
+        tyres.save()
+
+        self.assertEqual(self.get('vehicle_detail', self.first)['X-Page-Cache'], 'miss')
+        self.assertContains(self.get('pressure_chart', self.first), '31')
+        self.assertEqual(self.get('vehicle_detail', self.second)['X-Page-Cache'], 'hit')
+        self.assertEqual(self.get('pressure_chart', self.second)['X-Page-Cache'], 'hit')
+        self.assertEqual(self.get('vehicle_list')['X-Page-Cache'], 'miss')
+
+    def test_affiliate_change_invalidates_pages_with_affiliate_slots(self):
+        self.get('vehicle_detail', self.first)
+        self.get('about')
+        AffiliateLink.objects.create(name='Tyre Shop', link_type='TYRE', url='https://example.com')
+        self.assertEqual(self.get('vehicle_detail', self.first)['X-Page-Cache'], 'miss')
+        self.assertEqual(self.get('about')['X-Page-Cache'], 'hit')
+
+    @override_settings(ALLOWED_HOSTS=['example.com', 'www.example.com'])
+    def test_pages_are_cached_per_scheme_and_host(self):
+        url = reverse('vehicle_detail', kwargs={'slug': self.first.slug})
+        self.client.get(url, HTTP_HOST='example.com')
+        for host, secure in (('www.example.com', False), ('example.com', True)):
+            response = self.client.get(url, HTTP_HOST=host, secure=secure)
+            self.assertEqual(response['X-Page-Cache'], 'miss')
+            self.assertContains(response, f"{'https' if secure else 'http'}://{host}{url}")
+        self.assertEqual(self.client.get(url, HTTP_HOST='example.com')['X-Page-Cache'], 'hit')
+
+    def test_hits_keep_the_headers_the_view_set(self):
+        @page_cache.cached_page()
+        def view(request):
+            response = HttpResponse('<p>page</p>', content_type='text/html; charset=utf-8')
+            response['Content-Language'] = 'en'
+            response['Cache-Control'] = 'public, max-age=60'
+            return response
+
+        miss = view(RequestFactory().get('/page/'))
+        hit = view(RequestFactory().get('/page/'))
+        self.assertEqual((miss['X-Page-Cache'], hit['X-Page-Cache']), ('miss', 'hit'))
+        del miss['X-Page-Cache'], hit['X-Page-Cache']
+        self.assertEqual(dict(hit.items()), dict(miss.items()))
+        self.assertEqual(hit.content, miss.content)
+
+    def test_local_redis_backend(self):
+        cache = LocalRedisCache('redis://local/test', {})
+        cache.clear()
+        cache.set('page', (b'<html>', 'text/html'))
+        self.assertEqual(cache.get('page'), (b'<html>', 'text/html'))
+        cache.add(page_cache.GENERATION_KEY.format('x'), 1, None)
+        self.assertEqual(cache.incr(page_cache.GENERATION_KEY.format('x')), 2)
+        self.assertEqual(cache.get_many(['page', 'missing']), {'page': (b'<html>', 'text/html')})
+        cache.set('short', 1, 0.01)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('short'))
+
+
+class ConditionalGetTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.clear_caches()
+        self.vehicle = make_vehicles(1)[0]
+        self.url = reverse('vehicle_detail', kwargs={'slug': self.vehicle.slug})
+
+    def test_matching_etag_gets_304_without_rendering(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+
+        # The timestamp is cached with the page; a cold lookup is a single query
+        with query_budget(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response.templates, [])
+
+    def test_if_modified_since_and_changes(self):
+        first = self.client.get(reverse('pressure_chart', kwargs={'slug': self.vehicle.slug}))
+        response = self.client.get(first.wsgi_request.path, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        AffiliateLink.objects.create(name='Tyre Shop', link_type='TYRE', url='https://example.com')
+        response = self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        AffiliateLink.objects.create(name='Other Shop', link_type='TYRE', url='https://example.org')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_last_modified_moves_with_every_scope(self):
+        first = self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+
+        # A second later, so the change shows at Last-Modified's resolution
+        with mock.patch.object(page_cache.time, 'time', return_value=time.time() + 1):
+            AffiliateLink.objects.create(name='Tyre Shop', link_type='TYRE', url='https://example.com')
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['Last-Modified'], first['Last-Modified'])
+
+    def test_unknown_vehicle_is_404(self):
+        self.assertEqual(self.client.get(reverse('vehicle_detail', kwargs={'slug': 'missing'})).status_code, 404)
+
+
+class ApiTests(TestCase):
+
+    def setUp(self):
+        self.vehicles = make_vehicles(5)
+        TyrePressureData.objects.create(vehicle=self.vehicles[0], standard_front='29', standard_rear='33')
+
+    def get(self, name, data=None, **kwargs):
+        response = self.client.get(reverse(name, kwargs=kwargs or None), data or {})
+        return response.status_code, response.json()
+
+    def test_cursor_pagination_walks_every_vehicle(self):
+        seen, cursor = [], None
+        while True:
+            status, data = self.get('api_vehicles', {'limit': 2, 'fields': 'slug', **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(status, 200)
+            seen += [item['slug'] for item in data['results']]
+            cursor = data['next']
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), sorted(vehicle.slug for vehicle in self.vehicles))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_sparse_fieldsets(self):
+        slug = self.vehicles[0].slug
+        _, data = self.get('api_vehicle', {'fields': 'brand,tyres.front_size,pressure_data.standard_front'}, slug=slug)
+        self.assertEqual(data, {
+            'brand': 'Honda',
+            'tyres': {'front_size': '90/90-12'},
+            'pressure_data': [{'standard_front': '29'}],
+        })
+        status, data = self.get('api_vehicle', {'fields': 'password'}, slug=slug)
+        self.assertEqual(status, 400)
+        self.assertEqual(self.get('api_vehicle', slug='missing')[0], 404)
+
+    def test_bulk_lookup(self):
+        slugs = [self.vehicles[3].slug, 'missing', self.vehicles[1].slug]
+        response = self.client.post(reverse('api_vehicle_lookup') + '?fields=model',
+                                    json.dumps({'slugs': slugs}), content_type='application/json')
+        data = response.json()
+        self.assertEqual(list(data['results']), [slugs[0], slugs[2]])
+        self.assertEqual(data['results'][slugs[0]], {'model': 'Model 3'})
+        self.assertEqual(data['missing'], ['missing'])
+
+        status, data = self.get('api_vehicle_lookup', {'slugs': ','.join(f's{i}' for i in range(501))})
+        self.assertEqual(status, 400)
+
+
+class KeysetPaginatorTests(TestCase):
+
+    def setUp(self):
+        make_vehicles(5)
+
+    def test_cursors_that_do_not_fit_the_ordering_mean_page_one(self):
+        first_page = [vehicle.pk for vehicle in KeysetPaginator(Vehicle.objects.all(), ['year'], per_page=2).page()]
+        brand_cursor = KeysetPaginator(Vehicle.objects.all(), ['brand', 'model', 'year'], per_page=2).page().next_cursor
+        for cursor in [brand_cursor, encode_cursor('n', ['notanumber', 'x']), encode_cursor('p', [None, 1]),
+                       encode_cursor('n', [[2001], 1]), 'garbled']:
+            with self.subTest(cursor=cursor):
+                page = KeysetPaginator(Vehicle.objects.all(), ['year'], per_page=2).page(cursor)
+                self.assertEqual([vehicle.pk for vehicle in page], first_page)
+                self.assertFalse(page.has_previous)
+
+    def test_edited_cursor_in_a_view_is_page_one(self):
+        cursor = encode_cursor('n', ['notanumber', 'x'])
+        response = self.client.get(reverse('vehicle_list'), {'sort_by': 'year_asc', 'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('search_by_pressure'), {'min_pressure': 20, 'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('api_vehicles'), {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+
+    def test_cursor_values_are_converted_across_relations(self):
+        paginator = KeysetPaginator(Vehicle.objects.all(), ['tyres__front_pressure_psi'], per_page=2)
+        seen, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            seen += [vehicle.pk for vehicle in page]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(sorted(seen), sorted(Vehicle.objects.values_list('pk', flat=True)))
+
+    def test_totals_stop_counting_at_the_cap(self):
+        paginator = KeysetPaginator(Vehicle.objects.all(), ['year'])
+        with self.assertNumQueries(1) as queries:
+            self.assertEqual(str(paginator.capped_count(cap=3)), '3+')
+        self.assertIn('LIMIT 4', queries.captured_queries[0]['sql'])
+        self.assertEqual(str(paginator.capped_count(cap=5)), '5')
+
+        # Below the cap the count is exact, and shown as such
+        self.assertContains(self.client.get(reverse('vehicle_list')), '<strong>5</strong> vehicles found')
+
+
+@override_settings(EXPORT_TOKEN='secret')
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.vehicles = make_vehicles(3)
+        TyrePressureData.objects.create(vehicle=self.vehicles[1], standard_front='29', standard_rear='33')
+        TyrePressureData.objects.create(vehicle=self.vehicles[1], standard_front='30', standard_rear='34')
+
+    def export(self, format, **headers):
+        return self.client.get(reverse('export_catalogue', kwargs={'format': format}), **headers)
+
+    def test_requires_staff_or_token(self):
+        self.assertEqual(self.export('csv').status_code, 401)
+        self.assertEqual(self.export('csv', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.assertEqual(self.export('csv', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    def test_ndjson_is_gzipped_on_the_fly(self):
+        response = self.export('ndjson', HTTP_AUTHORIZATION='Bearer secret', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        items = {item['slug']: item for item in map(json.loads, lines)}
+        self.assertEqual(set(items), {vehicle.slug for vehicle in self.vehicles})
+        self.assertEqual([p['standard_front'] for p in items[self.vehicles[1].slug]['pressure_data']], ['29', '30'])
+        self.assertEqual(items[self.vehicles[0].slug]['pressure_data'], [])
+        self.assertEqual(items[self.vehicles[0].slug]['tyres']['front_size'], '90/90-12')
+
+    def test_command_writes_csv(self):
+        path = os.path.join(tempfile.mkdtemp(), 'catalogue.csv')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        call_command('export_catalogue', output=path, stderr=io.StringIO())
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        # One row per pressure record, one for each vehicle without any
+        self.assertEqual(len(rows), 4)
+        self.assertEqual([row['pressure_standard_rear'] for row in rows if row['slug'] == self.vehicles[1].slug],
+                         ['33', '34'])
+
+
+class BulkImportTests(TestCase):
+
+    def test_bulk_import_command(self):
+        listed = make_vehicles(1)[0]
+        path = os.path.join(tempfile.mkdtemp(), 'vehicles.csv')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w', newline='') as f:
+            f.write('brand,model,year,category,front_size,rear_size\n'
+                    'TVS,Jupiter,2015,SCOOTER,90/90-12,90/90-12\n'
+                    'TVS,Ntorq,soon,SCOOTER,90/90-12,90/90-12\n'
+                    'TVS,Apache,2018,TRUCK,90/90-17,110/80-17\n'
+                    'TVS,,2018,BIKE,90/90-17,110/80-17\n'
+                    f'{listed.brand},{listed.model},{listed.year},SCOOTER,90/90-12,90/100-10\n'
+                    'Bajaj,Pulsar 150,2020,BIKE,80/100-17,100/90-17\n'
+                    'tvs,JUPITER,2015,SCOOTER,90/90-12,90/90-12\n'
+                    'Hero,Splendor+,2021,BIKE,2.75-18,2.75-18\n')
+        out = io.StringIO()
+        call_command('import_100_vehicles', path, bulk=True, batch_size=2, stdout=out)
+        output = out.getvalue()
+
+        self.assertIn('Successfully imported 3 vehicles', output)
+        self.assertIn('Skipped 2 existing vehicles', output)
+        self.assertIn('3 rows had errors', output)
+        self.assertIn("Line 3: invalid year 'soon'", output)
+        self.assertIn("Line 4: invalid category 'TRUCK'", output)
+        self.assertIn('Line 5: brand and model are required', output)
+        # Progress after each batch of two new vehicles, then the remainder
+        self.assertEqual(output.count('rows processed'), 2)
+        self.assertEqual(set(Vehicle.objects.exclude(pk=listed.pk).values_list('slug', 'tyres__front_size_key')),
+                         {('tvs-jupiter-2015', '90/90-12'), ('bajaj-pulsar-150-2020', '80/100-17'),
+                          ('hero-splendor-2021', '2.75-18')})
+
+    def test_both_import_paths_give_the_same_slug(self):
+        path = os.path.join(tempfile.mkdtemp(), 'vehicles.csv')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w', newline='') as f:
+            f.write('brand,model,year,category,front_size,rear_size\n'
+                    'Hero,Splendor+ (i3S),2020,BIKE,2.75-18,2.75-18\n')
+        call_command('import_100_vehicles', path, stdout=io.StringIO())
+        self.assertEqual(Vehicle.objects.get().slug, 'hero-splendor-i3s-2020')
+        out = io.StringIO()
+        call_command('import_100_vehicles', path, bulk=True, stdout=out)
+        self.assertIn('Skipped 1 existing vehicles', out.getvalue())
+
+
+class CheckDuplicatesTests(TestCase):
+
+    def test_rows_are_checked_against_the_catalogue_and_each_other(self):
+        make_vehicles(1)
+        path = os.path.join(tempfile.mkdtemp(), 'vehicles.csv')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w', newline='') as f:
+            f.write('brand,model,year,front_size,rear_size\n'
+                    ' honda ,MODEL  0,2000,90/90-12,90/100-10\n'
+                    'TVS,Jupiter,2015,90/90-12,90/90-12\n'
+                    'tvs,jupiter,2015,90/90-12,90/90-12\n'
+                    ',Jupiter,2015,90/90-12,90/90-12\n'
+                    'TVS,,2015,90/90-12,90/90-12\n'
+                    'TVS,Ntorq,soon,90/90-12,90/90-12\n')
+        out = io.StringIO()
+        call_command('check_duplicates', path, format='json', stdout=out)
+        found = [(finding['type'], finding['line']) for finding in json.loads(out.getvalue())]
+        self.assertEqual(found, [('existing', 2), ('duplicate', 4), ('invalid', 5), ('invalid', 6), ('invalid', 7)])
+
+    def test_conflicts_across_files(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        paths = [os.path.join(folder, name) for name in ('first.csv', 'second.csv')]
+        for path, rear in zip(paths, ['90/100-10', '100/90-10']):
+            with open(path, 'w', newline='') as f:
+                f.write('brand,model,year,front_size,rear_size\n'
+                        f'TVS,Jupiter,2015,90/90-12,{rear}\n')
+        conflict = {
+            'type': 'conflict', 'file': paths[1], 'line': '2', 'brand': 'TVS', 'model': 'Jupiter', 'year': '2015',
+            'detail': f'tyre sizes differ from {paths[0]} line 2: 90/90-12 / 90/100-10 vs 90/90-12 / 100/90-10',
+        }
+
+        out = io.StringIO()
+        call_command('check_duplicates', *paths, format='json', stdout=out)
+        found = json.loads(out.getvalue())
+        self.assertEqual([finding['type'] for finding in found], ['duplicate', 'conflict'])
+        self.assertEqual(found[1], {**conflict, 'line': 2})
+
+        out = io.StringIO()
+        call_command('check_duplicates', *paths, format='csv', stdout=out)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual([row['type'] for row in rows], ['duplicate', 'conflict'])
+        self.assertEqual(rows[1], conflict)
+
+
+class PressureTests(TestCase):
+
+    def setUp(self):
+        self.scooter = make_vehicles(1)[0]
+        self.car = make_vehicles(1, start=1, brand='Maruti', category='CAR')[0]
+        self.car.tyres.front_pressure = '2.4 bar'
+        self.car.tyres.rear_pressure = '240 kPa'
+        self.car.tyres.save()
+
+    def test_parse_pressures(self):
+        self.assertEqual(
+            pressures.parse_pressures(['29', '29 PSI', '2.2 bar', '220 kPa', '2,1 bar', '', None, 'n/a', '2000']),
+            [29.0, 29.0, 31.9, 31.9, 30.5, None, None, None, None],
+        )
+        self.assertEqual((self.car.tyres.front_pressure_psi, self.car.tyres.rear_pressure_psi), (34.8, 34.8))
+
+    def test_backfill_fills_numeric_columns(self):
+        TyreSize.objects.update(front_pressure_psi=None, rear_pressure_psi=None)
+        self.assertEqual(pressures.backfill_pressures(TyreSize, pressures.TYRE_SIZE_FIELDS, batch_size=1), 2)
+        self.assertEqual(
+            sorted(TyreSize.objects.values_list('front_pressure_psi', 'rear_pressure_psi')),
+            [(29.0, 33.0), (34.8, 34.8)],
+        )
+
+    def test_chart_reads_pressure_data(self):
+        url = reverse('pressure_chart', kwargs={'slug': self.scooter.slug})
+        self.assertContains(self.client.get(url), 'estimated from the recommended pressure')
+
+        TyrePressureData.objects.create(vehicle=self.scooter, standard_front='28', standard_rear='31',
+                                        hot_front='31', hot_rear='34', max_front='2.5 bar', max_rear='40 PSI')
+        response = self.client.get(url)
+        self.assertEqual(response.context['chart_data']['front'], [None, 31.0, None, None, 36.3])
+        self.assertEqual(response.context['recommended']['rear'], {'psi': 31.0, 'bar': 2.14, 'kpa': 214})
+        self.assertNotContains(response, 'estimated from the recommended pressure')
+
+    def test_chart_without_pressures(self):
+        vehicle = Vehicle.objects.create(brand='Bajaj', model='Chetak', year=2022, category='SCOOTER')
+        response = self.client.get(reverse('pressure_chart', kwargs={'slug': vehicle.slug}))
+        self.assertTemplateUsed(response, 'tyres/no_pressure_data.html')
+
+    def test_pressure_range_search(self):
+        def found(**params):
+            response = self.client.get(reverse('search_by_pressure'), params)
+            return [vehicle.pk for vehicle in response.context['vehicles'] or []]
+
+        self.assertEqual(found(min_pressure=28, max_pressure=30), [self.scooter.pk])
+        self.assertEqual(found(min_pressure=2.3, max_pressure=2.5, unit='bar'), [self.car.pk])
+        self.assertEqual(found(min_pressure=33, axle='rear'), [self.scooter.pk, self.car.pk])
+        self.assertEqual(found(min_pressure=40, max_pressure=30), [])
+
+
+class ApprovalTests(TestCase):
+
+    def submit(self, model, brand='TVS', category='SCOOTER', year=2022):
+        return VehicleSubmission.objects.create(
+            user_name='Rider', user_email='rider@example.com', brand=brand, model=model, year=year,
+            category=category, front_size='90/90-12', rear_size='90/100-10', front_pressure='25',
+        )
+
+    def test_batch_approval_dedups_against_catalogue_and_itself(self):
+        listed = make_vehicles(1, brand='TVS')[0]
+        first = self.submit('Jupiter')
+        second = self.submit('Jupiter')
+        existing = self.submit(listed.model, year=listed.year)
+        invalid = self.submit('Ntorq', category='TRUCK')
+
+        stats = approve_submissions(VehicleSubmission.objects.all())
+        self.assertEqual((stats.approved, stats.duplicates, stats.already_listed), (1, 1, 1))
+        self.assertEqual([submission_id for submission_id, _ in stats.invalid], [invalid.pk])
+
+        statuses = dict(VehicleSubmission.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {first.pk: 'APPROVED', second.pk: 'REJECTED',
+                                    existing.pk: 'REJECTED', invalid.pk: 'PENDING'})
+        vehicle = Vehicle.objects.select_related('tyres').get(slug='tvs-jupiter-2022')
+        self.assertEqual(vehicle.tyres.front_pressure_psi, 25.0)
+
+        # Approving again adds nothing
+        self.assertEqual(approve_submissions(VehicleSubmission.objects.all()).approved, 0)
+        self.assertEqual(Vehicle.objects.filter(brand='TVS').count(), 2)
+
+    def test_vehicles_saved_one_by_one_are_recognised(self):
+        listed = Vehicle.objects.create(brand='Hero', model='Splendor+ (i3S)', year=2020, category='BIKE')
+        self.assertEqual(listed.slug, 'hero-splendor-i3s-2020')
+        self.submit('Splendor+ (i3S)', brand='Hero', category='BIKE', year=2020)
+        self.assertEqual(approve_submissions(VehicleSubmission.objects.all()).already_listed, 1)
+
+    def test_colliding_row_does_not_abort_the_batch(self):
+        clash, other = self.submit('Jupiter'), self.submit('Ntorq')
+        insert = BulkVehicleImporter.insert
+
+        def racing_insert(importer, batch):
+            # Listed by someone else between the catalogue check and the insert
+            Vehicle.objects.create(brand='TVS', model='Jupiter', year=2022, category='SCOOTER')
+            return insert(importer, batch)
+
+        with mock.patch.object(BulkVehicleImporter, 'insert', racing_insert):
+            stats = approve_submissions(VehicleSubmission.objects.all())
+        self.assertEqual(stats.approved, 1)
+        self.assertEqual([submission_id for submission_id, _ in stats.invalid], [clash.pk])
+        statuses = dict(VehicleSubmission.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {clash.pk: 'PENDING', other.pk: 'APPROVED'})
+        self.assertTrue(Vehicle.objects.filter(slug='tvs-ntorq-2022', tyres__isnull=False).exists())
+
+    def test_approval_is_set_based(self):
+        for i in range(60):
+            self.submit(f'Model {i}')
+        # A handful of queries per batch (the insert runs in a savepoint) plus one facet upsert
+        # per distinct value, not several per submission
+        with query_budget(32):
+            stats = approve_submissions(VehicleSubmission.objects.all())
+        self.assertEqual(stats.approved, 60)
+
+
+SUBMISSION = {
+    'user_name': 'Rider', 'user_email': 'rider@example.com', 'brand': 'TVS', 'model': 'Jupiter',
+    'year': 2022, 'category': 'SCOOTER', 'front_size': '90/90-12', 'rear_size': '90/100-10',
+}
+
+
+@override_settings(SUBMISSION_WORKERS=0, MANAGERS=[('Moderators', 'mod@example.com')])
+class IntakeTests(TestCase):
+
+    def post(self, follow=False, **changes):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('submit_vehicle'), {**SUBMISSION, **changes}, follow=follow)
+
+    def test_repeat_submissions_fold_into_one_with_votes(self):
+        self.assertRedirects(self.post(), reverse('submission_success'))
+        response = self.post(brand='tvs', model=' JUPITER ', front_pressure='2.2 bar', follow=True)
+        self.assertContains(response, '2 requests so far')
+
+        submission = VehicleSubmission.objects.get()
+        self.assertEqual((submission.dedup_key, submission.vote_count), ('tvs-jupiter-2022', 2))
+        # The repeat filled in the pressure the first submission left out
+        self.assertEqual(submission.front_pressure, '2.2 bar')
+        # Moderators are emailed once, for the first submission
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('TVS Jupiter (2022)', mail.outbox[0].subject)
+
+    def test_vehicle_already_listed(self):
+        vehicle = make_vehicles(1, brand='TVS')[0]
+        response = self.post(model=vehicle.model, year=vehicle.year)
+        self.assertRedirects(response, reverse('vehicle_detail', args=[vehicle.slug]))
+        self.assertFalse(VehicleSubmission.objects.exists())
+        self.assertEqual(mail.outbox, [])
+
+    def test_enrichment_notes(self):
+        make_vehicles(1, brand='TVS')
+        self.post(model='Model 0', year=2021, rear_size='ninety', front_pressure='lots')
+        notes = VehicleSubmission.objects.get().admin_notes
+        self.assertIn("Unrecognised rear size 'ninety'", notes)
+        self.assertIn("Unrecognised front pressure 'lots'", notes)
+        self.assertIn('Listed for 2000', notes)
+
+
+@override_settings(SUBMISSION_WORKERS=2, MANAGERS=[('Moderators', 'mod@example.com')])
+class BackgroundIntakeTests(TransactionTestCase):
+
+    def test_notification_sent_from_worker_over_smtp(self):
+        with local_smtp_server() as server, self.settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='localhost', EMAIL_PORT=server.port,
+        ):
+            response = self.client.post(reverse('submit_vehicle'), SUBMISSION)
+            self.assertRedirects(response, reverse('submission_success'))
+            intake.shutdown()
+
+        [(sender, recipients, message)] = server.messages
+        self.assertEqual(recipients, ['mod@example.com'])
+        self.assertIn('TVS Jupiter (2022)', message['Subject'])
+        self.assertIn('90/90-12', message.get_payload())
+
+
+class ReplicaTests(TestCase):
+
+    def route(self, method, path, model=Vehicle):
+        """Where a read of `model` goes while ReplicaMiddleware handles the request"""
+        reads = []
+        middleware = replica.ReplicaMiddleware(lambda request: reads.append(replica.ReplicaRouter().db_for_read(model)))
+        middleware(getattr(RequestFactory(), method)(path))
+        return reads[0]
+
+    def test_read_only_requests_read_from_replica(self):
+        self.assertEqual(self.route('get', reverse('vehicle_list')), 'replica')
+        self.assertEqual(self.route('head', reverse('api_vehicles')), 'replica')
+        self.assertEqual(self.route('post', reverse('submit_vehicle')), 'default')
+        self.assertEqual(self.route('get', reverse('admin:index')), 'default')
+        self.assertEqual(self.route('get', reverse('vehicle_list'), model=Session), 'default')
+        # Outside a request
+        self.assertEqual(replica.ReplicaRouter().db_for_read(Vehicle), 'default')
+        self.assertEqual(replica.ReplicaRouter().db_for_write(Vehicle), 'default')
+
+
+class RefreshReplicaTests(TransactionTestCase):
+
+    def test_refresh_replica(self):
+        make_vehicles(3)
+        path = os.path.join(tempfile.mkdtemp(), 'replica.sqlite3')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+
+        replica.refresh_replica(path)
+        make_vehicles(2, start=3)
+        call_command('refresh_replica', output=path, stdout=io.StringIO())
+
+        copy = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        self.addCleanup(copy.close)
+        self.assertEqual(copy.execute('SELECT COUNT(*) FROM tyres_vehicle').fetchone(), (5,))
+        self.assertEqual(copy.execute('PRAGMA journal_mode').fetchone(), ('delete',))
+        self.assertFalse(os.path.exists(f'{path}.tmp'))
+
+    def serve_from_replica(self):
+        """Refresh a replica of the test database and route requests' reads to it; returns its path"""
+        path = os.path.join(tempfile.mkdtemp(), 'replica.sqlite3')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        replica.refresh_replica(path)
+
+        connections.settings[replica.REPLICA] = {**connections['default'].settings_dict, 'NAME': f'file:{path}?mode=ro'}
+        self.addCleanup(connections.settings.pop, replica.REPLICA)
+        # Closed and forgotten, so the next test's replica isn't opened with this one's path
+        self.addCleanup(connections.__delitem__, replica.REPLICA)
+        self.addCleanup(lambda: connections[replica.REPLICA].close())
+        # Async views read on a worker thread, which Django only lets reach listed databases
+        self.addCleanup(setattr, type(self), 'databases', self.databases)
+        type(self).databases = {*self.databases, replica.REPLICA}
+        serve_from_replica = self.settings(
+            DATABASE_ROUTERS=['tyres.replica.ReplicaRouter'],
+            MIDDLEWARE=['tyres.replica.ReplicaMiddleware', *settings.MIDDLEWARE],
+        )
+        serve_from_replica.enable()
+        self.addCleanup(serve_from_replica.disable)
+        return path
+
+    def test_edits_show_after_the_next_refresh(self):
+        make_vehicles(3)
+        path = self.serve_from_replica()
+
+        def listed():
+            response = self.client.get(reverse('vehicle_list'))
+            self.assertIsNotNone(response.context, "served a page cached from the old replica")
+            return len(response.context['vehicles'])
+
+        self.assertEqual(listed(), 3)
+        make_vehicles(2, start=3)
+        # The listing is re-rendered, but from the replica as it was
+        self.assertEqual(listed(), 3)
+        call_command('refresh_replica', output=path, stdout=io.StringIO())
+        self.assertEqual(listed(), 5)
+
+    def test_search_reads_the_replica(self):
+        make_vehicles(3)
+        path = self.serve_from_replica()
+
+        def found(query):
+            return [vehicle.model for vehicle in self.client.get(reverse('home'), {'q': query}).context['vehicles']]
+
+        # Until the next refresh, search agrees with the listing: both read the replica
+        Vehicle.objects.filter(model='Model 1').delete()
+        self.assertEqual(found('honda model'), ['Model 0', 'Model 1', 'Model 2'])
+        call_command('refresh_replica', output=path, stdout=io.StringIO())
+        self.assertEqual(found('honda model'), ['Model 0', 'Model 2'])
+
+
+class AsyncViewTests(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vehicles = make_vehicles(6)
+        similarity.compute_similar_vehicles(k=3)
+
+    def setUp(self):
+        self.clear_caches()
+
+    async def test_read_views_under_asgi(self):
+        vehicle = self.vehicles[0]
+        urls = [
+            (reverse('home'), {'q': 'Honda'}),
+            (reverse('home'), {'category': 'SCOOTER'}),
+            (reverse('vehicle_list'), {'brand': 'Honda'}),
+            (reverse('vehicle_detail', args=[vehicle.slug]), {}),
+            (reverse('search_by_tyre'), {'front': '90/90-12'}),
+            (reverse('search_by_size_range'), {'min_width': 80}),
+            (reverse('tyre_calculator'), {}),
+            (reverse('calculate_tyre_size'), {'width': 185, 'aspect_ratio': 65, 'rim_diameter': 15}),
+        ]
+        # Served concurrently by one event loop
+        responses = await asyncio.gather(*(self.async_client.get(url, data) for url, data in urls))
+        for (url, _), response in zip(urls, responses):
+            self.assertEqual(response.status_code, 200, url)
+
+        detail = responses[3]
+        self.assertContains(detail, vehicle.model)
+        self.assertContains(detail, self.vehicles[1].model)  # a similar vehicle
+        self.assertIn('ETag', detail)
+        self.assertContains(responses[4], self.vehicles[5].model)
+
+        response = await self.async_client.get(reverse('vehicle_detail', args=['no-such-vehicle']))
+        self.assertEqual(response.status_code, 404)
+
+
+class SyntheticCatalogueTests(TestCase):
+
+    def test_rows_are_deterministic_and_unique(self):
+        rows = list(synthetic_rows(2000, seed=7))
+        self.assertEqual(rows, list(synthetic_rows(2000, seed=7)))
+        self.assertEqual(len({(row['brand'], row['model'], row['year']) for row in rows}), 2000)
+        cars = [row for row in rows if row['category'] == 'CAR']
+        self.assertTrue(all(row['front_size'] == row['rear_size'] for row in cars))
+
+    def test_generate_catalogue(self):
+        call_command('generate_catalogue', 300, seed=3, batch_size=100, stdout=io.StringIO())
+        self.assertEqual(Vehicle.objects.count(), 300)
+        # Every size parses, and pressures are stored numerically
+        self.assertFalse(TyreSize.objects.filter(front_size_key='').exists())
+        self.assertFalse(TyreSize.objects.filter(front_pressure_psi__isnull=True).exists())
+        charts = TyrePressureData.objects.count()
+        self.assertTrue(50 < charts < 150, charts)
+        self.assertFalse(TyrePressureData.objects.filter(standard_front_psi__isnull=True).exists())
+
+        # Same seed again adds nothing
+        call_command('generate_catalogue', 300, seed=3, stdout=io.StringIO())
+        self.assertEqual(Vehicle.objects.count(), 300)
+
+
+class BenchmarkTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_catalogue', 200, stdout=io.StringIO())
+
+    def test_every_url_is_covered(self):
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(set(benchmark.REQUESTS), names)
+        self.assertEqual(set(benchmark.DEFAULT_MIX), names)
+
+    def test_run(self):
+        mix = dict.fromkeys(benchmark.REQUESTS, 1)
+        results = benchmark.run_benchmark(requests=200, warmup=20, mix=mix)
+        self.assertEqual(results['meta']['vehicles'], 200)
+        self.assertEqual(results['overall']['requests'], 200)
+        self.assertEqual(results['overall']['errors'], 0, results['urls'])
+        detail = results['urls']['vehicle_detail']
+        self.assertLessEqual(detail['p50_ms'], detail['p95_ms'])
+        self.assertIn('queries_mean', detail)
+        json.dumps(results)
+
+    def test_command_and_compare(self):
+        path = os.path.join(tempfile.mkdtemp(), 'results.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        call_command('benchmark', requests=30, warmup=0, output=path, stdout=io.StringIO())
+        out = io.StringIO()
+        call_command('benchmark', requests=30, warmup=0, compare=path, mix='about=0', stdout=out)
+        self.assertIn('p95 before', out.getvalue())
+
+    def test_mix(self):
+        self.assertNotIn('export_catalogue', benchmark.parse_mix('export_catalogue=0, home=5'))
+        self.assertEqual(benchmark.parse_mix('home=5')['home'], 5)
+        with self.assertRaises(ValueError):
+            benchmark.parse_mix('nope=1')
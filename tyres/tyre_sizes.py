@@ -0,0 +1,143 @@
+# tyres/tyre_sizes.py
+import re
+from collections import namedtuple
+
+# Parsed tyre size. `key` is the canonical, spelling-independent form used for
+# indexed lookups ("185/65 R15", "185/65R15" and "185/65-15" share one key).
+TyreSpec = namedtuple('TyreSpec', ['key', 'width', 'aspect_ratio', 'construction', 'rim'])
+
+CONSTRUCTIONS = ('ZR', 'R', 'B', 'D', '-')
+
+MM_PER_INCH = 25.4
+
+# 185/65R15, 90/90-12, 90/90 12, P215/60 R16 91H, 130/70B18, 295/65R22.5
+METRIC_RE = re.compile(
+    r'^(?:P|LT|T)?(\d{2,3})\s*/\s*(\d{2,3})'
+    r'(?:\s*(ZR|R|B|D|-)\s*|\s+)'
+    r'(\d{1,2}(?:\.\d)?)\b'
+)
+# 2.75-18, 3.00 R10, 4.10-18
+IMPERIAL_RE = re.compile(
+    r'^(\d{1,2}\.\d{1,2})(?:\s*(R|B|D|-)\s*|\s+)(\d{1,2}(?:\.\d)?)\b'
+)
+# 35X12.5R18, 31x10.50 R15
+FLOTATION_RE = re.compile(
+    r'^(\d{2})\s*X\s*(\d{1,2}(?:\.\d{1,2})?)(?:\s*(R|B|D|-)\s*|\s+)(\d{2}(?:\.\d)?)\b'
+)
+# Partial metric size such as "90/90" or "185/65"
+PARTIAL_RE = re.compile(r'^(?:P|LT|T)?(\d{2,3})\s*/\s*(\d{2,3})$')
+
+
+def _number(text):
+    """Return an int for whole numbers, otherwise a float"""
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def _format_number(value):
+    return str(value) if isinstance(value, int) else f"{value:g}"
+
+
+def _construction(text):
+    return text if text in CONSTRUCTIONS else '-'
+
+
+def make_key(width, aspect_ratio, rim):
+    """Canonical key for a metric size, e.g. make_key(185, 65, 15) -> '185/65-15'"""
+    return f"{width}/{aspect_ratio}-{_format_number(rim)}"
+
+
+def parse_tyre_size(text):
+    """Parse a tyre size string into a TyreSpec, or None if it is not recognised"""
+    if not text:
+        return None
+    text = text.strip().upper()
+
+    match = METRIC_RE.match(text)
+    if match:
+        width, aspect_ratio, construction, rim = match.groups()
+        width, aspect_ratio, rim = int(width), int(aspect_ratio), _number(rim)
+        return TyreSpec(make_key(width, aspect_ratio, rim), width, aspect_ratio,
+                        _construction(construction), rim)
+
+    match = IMPERIAL_RE.match(text)
+    if match:
+        width, construction, rim = match.groups()
+        key = f"{float(width):.2f}-{_format_number(_number(rim))}"
+        return TyreSpec(key, None, None, _construction(construction), _number(rim))
+
+    match = FLOTATION_RE.match(text)
+    if match:
+        diameter, width, construction, rim = match.groups()
+        key = f"{diameter}X{_format_number(_number(width))}-{_format_number(_number(rim))}"
+        return TyreSpec(key, None, None, _construction(construction), _number(rim))
+
+    return None
+
+
+def format_tyre_size(spec):
+    """Display form of a TyreSpec, e.g. '185/65R15' or '90/90-12'"""
+    if spec.width is None:
+        return spec.key
+    return f"{spec.width}/{spec.aspect_ratio}{spec.construction}{_format_number(spec.rim)}"
+
+
+def tyre_dimensions(width, aspect_ratio, rim_diameter):
+    """Sidewall height and overall diameter in mm; works on scalars and NumPy arrays"""
+    sidewall = width * (aspect_ratio / 100)
+    diameter = (rim_diameter * MM_PER_INCH) + (2 * sidewall)
+    return sidewall, diameter
+
+
+def normalize_tyre_size(text):
+    """Return the canonical key for a size string, or '' if it cannot be parsed"""
+    spec = parse_tyre_size(text)
+    return spec.key if spec else ''
+
+
+def size_lookup(text, prefix):
+    """
+    Build indexed equality lookups for a user-entered size on the
+    `<prefix>_*` columns of TyreSize. Full sizes match on the canonical key,
+    partial metric sizes ("90/90") on width and aspect ratio.
+    Returns None when the input is not a recognisable size.
+    """
+    spec = parse_tyre_size(text)
+    if spec:
+        return {f'{prefix}_size_key': spec.key}
+
+    match = PARTIAL_RE.match((text or '').strip().upper())
+    if match:
+        return {
+            f'{prefix}_width': int(match.group(1)),
+            f'{prefix}_aspect_ratio': int(match.group(2)),
+        }
+    return None
+
+
+def normalize_tyre_fields(tyres):
+    """
+    Fill the canonical key, construction and dimension columns of a TyreSize
+    (or a historical TyreSize in migrations) from its free-text sizes.
+    `tyre_size` is used for both ends when front/rear are blank.
+    """
+    for prefix in ('front', 'rear'):
+        spec = parse_tyre_size(getattr(tyres, f'{prefix}_size') or tyres.tyre_size)
+
+        if spec is None:
+            # Fall back to dimensions entered directly (e.g. in the admin)
+            width = getattr(tyres, f'{prefix}_width')
+            aspect_ratio = getattr(tyres, f'{prefix}_aspect_ratio')
+            rim = getattr(tyres, f'{prefix}_rim')
+            key = make_key(width, aspect_ratio, rim) if width and aspect_ratio and rim else ''
+            setattr(tyres, f'{prefix}_size_key', key)
+            continue
+
+        setattr(tyres, f'{prefix}_size_key', spec.key)
+        setattr(tyres, f'{prefix}_construction', spec.construction)
+        if spec.width is not None:
+            setattr(tyres, f'{prefix}_width', spec.width)
+            setattr(tyres, f'{prefix}_aspect_ratio', spec.aspect_ratio)
+        if isinstance(spec.rim, int):
+            setattr(tyres, f'{prefix}_rim', spec.rim)
+    return tyres
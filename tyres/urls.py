@@ -1,6 +1,6 @@
 # tyres/urls.py
 from django.urls import path
-from . import views
+from . import api, export, views
 
 urlpatterns = [
     path('', views.home, name='home'),
@@ -13,6 +13,13 @@ urlpatterns = [
     path('tyre-calculator/', views.tyre_calculator, name='tyre_calculator'),
     path('compare-tyres/', views.compare_tyres, name='compare_tyres'),
     path('calculate-tyre-size/', views.calculate_tyre_size, name='calculate_tyre_size'),
+    path('calculate-tyre-size/batch/', views.calculate_tyre_size_batch, name='calculate_tyre_size_batch'),
     path('search-size-range/', views.search_by_size_range, name='search_by_size_range'),
+    path('search-by-pressure/', views.search_by_pressure, name='search_by_pressure'),
     path('vehicle/<slug:slug>/pressure-chart/', views.pressure_chart, name='pressure_chart'),
+    path('api/suggest/', views.suggest, name='suggest'),
+    path('api/v1/vehicles/', api.vehicles, name='api_vehicles'),
+    path('api/v1/vehicles/lookup/', api.vehicle_lookup, name='api_vehicle_lookup'),
+    path('api/v1/vehicles/<slug:slug>/', api.vehicle, name='api_vehicle'),
+    path('export/catalogue.<str:format>', export.export_catalogue, name='export_catalogue'),
 ]
\ No newline at end of file
@@ -1,44 +1,80 @@
 # tyres/views.py
-from django.shortcuts import render, get_object_or_404
-from django.db.models import Q
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, aget_object_or_404
+from django.db.models import F, Q
+from django.http import Http404, HttpResponse, HttpResponsePermanentRedirect, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.csrf import csrf_exempt
 from .models import Vehicle, TyreSize , VehicleSubmission
-from .forms import VehicleSubmissionForm
+from .forms import VehicleSubmissionForm, TyreCalculatorForm, PressureSearchForm
+from .tyre_sizes import size_lookup
+from .calculator import (
+    BatchError, calculate_sizes, calculated_response, parse_csv_batch, parse_json_batch, read_size, read_sizes,
+)
+from .pressures import pressure_units
+from .pagination import KeysetPaginator, page_links
+from .facets import get_facets
+from .search import search_vehicles
+from .suggest import suggest as suggest_terms
+from .page_cache import cached_page, vehicle_condition, AFFILIATES, CATALOGUE, SIMILAR
+from .approvals import approve_submissions
+from .intake import receive_submission, LISTED, VOTED
 from django.contrib import messages
-from django.shortcuts import render, redirect 
 from django.contrib import admin
-from django.utils import timezone
 
-def home(request):
+# Keyset orderings for the listing views; each ends in a unique column
+VEHICLE_ORDERINGS = {
+    'brand': ('brand', 'model', 'year', 'id'),
+    'model': ('model', 'id'),
+    'year_asc': ('year', 'id'),
+    'year_desc': ('-year', '-id'),
+}
+VEHICLES_PER_PAGE = 24
+
+CALCULATOR_CACHE_SECONDS = 7 * 24 * 60 * 60
+
+# The read-path views are async: under ASGI a request waiting on the
+# database holds no worker thread, and independent queries are started
+# together. Querysets are evaluated before rendering (templates can't query
+# from async code).
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+async def gather(*awaitables):
+    """asyncio.gather, but every query finishes before the first error is raised"""
+    results = await asyncio.gather(*awaitables, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+@cached_page(CATALOGUE)
+async def home(request):
     """Homepage with search"""
     query = request.GET.get('q', '')
     category = request.GET.get('category', '')
     
-    vehicles = Vehicle.objects.all()
-    
-    # Apply filters if provided
+    # Results are only listed for a search or a category
+    vehicles = []
     if query:
-        vehicles = vehicles.filter(
-            Q(brand__icontains=query) | 
-            Q(model__icontains=query) |
-            Q(year__icontains=query)
-        )
-    
-    if category:
-        vehicles = vehicles.filter(category=category)
-    
-    # Get distinct brands for filter
-    brands = Vehicle.objects.values_list('brand', flat=True).distinct().order_by('brand')
+        # Full-text search (FTS5 + BM25 on SQLite), ranked best match first
+        vehicles = await sync_to_async(search_vehicles)(query, category=category, limit=20)
+    elif category:
+        vehicles = await alist(Vehicle.objects.select_related('tyres').filter(category=category)[:20])
     
     context = {
-        'vehicles': vehicles[:20],  # Limit to 20 results
+        'vehicles': vehicles,
         'query': query,
         'category': category,
-        'brands': brands,
         'categories': Vehicle.CATEGORY_CHOICES,
     }
     return render(request, 'tyres/home.html', context)
 
-def vehicle_list(request):
+@cached_page(CATALOGUE)
+async def vehicle_list(request):
     """List all vehicles with advanced filters"""
     # Get filter parameters
     category = request.GET.get('category', '')
@@ -49,7 +85,7 @@ def vehicle_list(request):
     rim_size = request.GET.get('rim_size', '')
     sort_by = request.GET.get('sort_by', 'brand')
     
-    vehicles = Vehicle.objects.all()
+    vehicles = Vehicle.objects.select_related('tyres')
     
     # Apply filters
     if category:
@@ -89,47 +125,28 @@ def vehicle_list(request):
         vehicle_ids = matching_tyres.values_list('vehicle_id', flat=True)
         vehicles = vehicles.filter(id__in=vehicle_ids)
     
-    # Apply sorting
-    if sort_by == 'year_asc':
-        vehicles = vehicles.order_by('year')
-    elif sort_by == 'year_desc':
-        vehicles = vehicles.order_by('-year')
-    elif sort_by == 'model':
-        vehicles = vehicles.order_by('model')
-    else:  # brand (default)
-        vehicles = vehicles.order_by('brand', 'model')
-    
-    # Get distinct values for filter dropdowns
-    brands = Vehicle.objects.values_list('brand', flat=True).distinct().order_by('brand')
-    years = Vehicle.objects.values_list('year', flat=True).distinct().order_by('-year')
-    
-    # Get tyre width and rim size ranges
-    tyre_widths = TyreSize.objects.exclude(
-        Q(front_width__isnull=True) & Q(rear_width__isnull=True)
-    ).values_list('front_width', 'rear_width').distinct()
-    
-    rim_sizes = TyreSize.objects.exclude(
-        Q(front_rim__isnull=True) & Q(rear_rim__isnull=True)
-    ).values_list('front_rim', 'rear_rim').distinct()
-    
-    # Flatten and get unique values
-    width_list = set()
-    for fw, rw in tyre_widths:
-        if fw: width_list.add(fw)
-        if rw: width_list.add(rw)
-    
-    rim_list = set()
-    for fr, rr in rim_sizes:
-        if fr: rim_list.add(fr)
-        if rr: rim_list.add(rr)
+    # Apply sorting - keyset pagination seeks on the sort columns, so deep
+    # pages cost the same as the first one
+    ordering = VEHICLE_ORDERINGS.get(sort_by, VEHICLE_ORDERINGS['brand'])
+    paginator = KeysetPaginator(vehicles, ordering, per_page=VEHICLES_PER_PAGE)
+    
+    # The page, the count and the filter dropdowns (precomputed facets) are independent
+    page, total_count, facet_counts = await gather(
+        paginator.apage(request.GET.get('cursor')),
+        paginator.acapped_count(),
+        sync_to_async(get_facets)(),
+    )
+    category_counts = dict(facet_counts['category'])
     
     context = {
-        'vehicles': vehicles,
-        'brands': brands,
-        'categories': Vehicle.CATEGORY_CHOICES,
-        'years': years,
-        'tyre_widths': sorted(width_list),
-        'rim_sizes': sorted(rim_list),
+        'vehicles': page,
+        'page': page,
+        'total_count': total_count,
+        'brands': facet_counts['brand'],
+        'categories': [(code, name, category_counts.get(code, 0)) for code, name in Vehicle.CATEGORY_CHOICES],
+        'years': facet_counts['year'],
+        'tyre_widths': facet_counts['width'],
+        'rim_sizes': facet_counts['rim'],
         'selected_category': category,
         'selected_brand': brand,
         'selected_year_from': year_from,
@@ -137,29 +154,41 @@ def vehicle_list(request):
         'selected_tyre_width': tyre_width,
         'selected_rim_size': rim_size,
         'selected_sort': sort_by,
+        **page_links(request, page),
     }
     return render(request, 'tyres/vehicle_list.html', context)
 
-def vehicle_detail(request, slug):
+@vehicle_condition(AFFILIATES, SIMILAR)
+@cached_page(AFFILIATES, SIMILAR, vehicle=True)
+async def vehicle_detail(request, slug):
     """Vehicle detail page"""
-    vehicle = get_object_or_404(Vehicle, slug=slug)
-    
-    # Get similar vehicles (same brand or category)
-    similar_vehicles = Vehicle.objects.filter(
-        Q(brand=vehicle.brand) | Q(category=vehicle.category)
-    ).exclude(id=vehicle.id)[:5]
-    
+    # The vehicle and its nearest neighbours (precomputed by
+    # compute_similar_vehicles) are both looked up by slug, together
+    vehicle, similar_vehicles = await gather(
+        aget_object_or_404(Vehicle.objects.select_related('tyres'), slug=slug),
+        alist(Vehicle.objects.select_related('tyres').filter(
+            similar_to_links__vehicle__slug=slug
+        ).order_by('similar_to_links__rank')[:5]),
+    )
+    if not similar_vehicles:
+        # Not computed yet (a new vehicle or a fresh install): same brand and
+        # category, a short seek along the category/brand index
+        similar_vehicles = await alist(Vehicle.objects.select_related('tyres').filter(
+            category=vehicle.category, brand=vehicle.brand
+        ).exclude(id=vehicle.id)[:5])
+
     context = {
         'vehicle': vehicle,
         'similar_vehicles': similar_vehicles,
     }
     return render(request, 'tyres/vehicle_detail.html', context)
 
+@cached_page()
 def about(request):
     """About page"""
     return render(request, 'tyres/about.html')
 
-def search_by_tyre(request):
+async def search_by_tyre(request):
     """Search vehicles by tyre size"""
     front_size = request.GET.get('front', '')
     rear_size = request.GET.get('rear', '')
@@ -167,21 +196,22 @@ def search_by_tyre(request):
     results = []
     
     if front_size or rear_size:
-        tyre_sizes = TyreSize.objects.all()
-        
-        if front_size:
-            tyre_sizes = tyre_sizes.filter(
-                Q(front_size__icontains=front_size) |
-                Q(tyre_size__icontains=front_size)
-            )
-        
-        if rear_size:
-            tyre_sizes = tyre_sizes.filter(
-                Q(rear_size__icontains=rear_size) |
-                Q(tyre_size__icontains=rear_size)
-            )
-        
-        results = [ts.vehicle for ts in tyre_sizes]
+        # Normalise input to canonical keys so lookups hit the size indexes
+        # ("90/90 12", "90/90-12" and "90/90R12" all match the same rows).
+        # `tyre_size` is folded into the front/rear keys when those are blank.
+        # Input the parser can't read falls back to a substring match (a scan).
+        condition = Q()
+        for size, prefix in ((front_size.strip(), 'front'), (rear_size.strip(), 'rear')):
+            if not size:
+                continue
+            lookup = size_lookup(size, prefix)
+            if lookup is None:
+                condition &= (Q(**{f'tyres__{prefix}_size__icontains': size})
+                              | Q(tyres__tyre_size__icontains=size))
+            else:
+                condition &= Q(**{f'tyres__{field}': value for field, value in lookup.items()})
+
+        results = await alist(Vehicle.objects.select_related('tyres').filter(condition))
     
     context = {
         'results': results,
@@ -195,14 +225,19 @@ def submit_vehicle(request):
     if request.method == 'POST':
         form = VehicleSubmissionForm(request.POST)
         if form.is_valid():
-            submission = form.save()
-            
-            # Send email notification (optional)
-            send_submission_email(submission)
+            # Dedup against the catalogue and pending submissions; emails go out in the background
+            outcome, obj = receive_submission(form)
             
-            messages.success(request, 
-                f'Thank you! Your submission for {submission.brand} {submission.model} has been received. '
-                'We will review it and add it to our database soon.')
+            if outcome == LISTED:
+                return redirect('vehicle_detail', slug=obj.slug)
+            if outcome == VOTED:
+                messages.success(request,
+                    f'Thank you! {obj.brand} {obj.model} ({obj.year}) has already been requested; '
+                    f'we have added your vote ({obj.vote_count} requests so far).')
+            else:
+                messages.success(request, 
+                    f'Thank you! Your submission for {obj.brand} {obj.model} has been received. '
+                    'We will review it and add it to our database soon.')
             return redirect('submission_success')
     else:
         form = VehicleSubmissionForm()
@@ -212,43 +247,22 @@ def submit_vehicle(request):
 def submission_success(request):
     return render(request, 'tyres/submission_success.html')
 
-def send_submission_email(submission):
-    """Send email notification about new submission"""
-    # This is a placeholder - configure email backend in settings.py
-    pass
-
 # Add admin view for submissions
 @admin.register(VehicleSubmission)
 class VehicleSubmissionAdmin(admin.ModelAdmin):
-    list_display = ['brand', 'model', 'year', 'status', 'user_name', 'created_at']
+    list_display = ['brand', 'model', 'year', 'status', 'vote_count', 'user_name', 'created_at']
     list_filter = ['status', 'category', 'created_at']
     search_fields = ['brand', 'model', 'user_name', 'user_email']
     actions = ['approve_submissions', 'reject_submissions']
     
     def approve_submissions(self, request, queryset):
-        for submission in queryset:
-            # Create actual vehicle from submission
-            vehicle = Vehicle.objects.create(
-                brand=submission.brand,
-                model=submission.model,
-                year=submission.year,
-                category=submission.category
-            )
-            
-            TyreSize.objects.create(
-                vehicle=vehicle,
-                front_size=submission.front_size,
-                rear_size=submission.rear_size,
-                tyre_size=submission.tyre_size,
-                front_pressure=submission.front_pressure,
-                rear_pressure=submission.rear_pressure
-            )
-            
-            submission.status = 'APPROVED'
-            submission.admin_notes = f'Approved and added to database on {timezone.now().date()}'
-            submission.save()
-        
-        self.message_user(request, f"{queryset.count()} submissions approved and added to database.")
+        # Set-based and transactional; see tyres.approvals
+        stats = approve_submissions(queryset)
+        self.message_user(
+            request,
+            f"{stats.approved} submissions approved and added to database, "
+            f"{stats.rejected} rejected as already listed or duplicated, {len(stats.invalid)} left pending as invalid."
+        )
     
     approve_submissions.short_description = "Approve selected submissions"
     
@@ -257,95 +271,108 @@ class VehicleSubmissionAdmin(admin.ModelAdmin):
         self.message_user(request, f"{queryset.count()} submissions rejected.")
 
 # tyres/views.py - Add calculator functions
-import math
-from django.http import JsonResponse
 
-def tyre_calculator(request):
+async def tyre_calculator(request):
     """Tyre calculator main page"""
     return render(request, 'tyres/tyre_calculator.html')
 
-def calculate_tyre_size(request):
-    """API endpoint for tyre calculations"""
+async def calculate_tyre_size(request):
+    """
+    API endpoint for tyre calculations. GET responses carry a strong ETag
+    and a long Cache-Control so browsers and proxies can serve repeats.
+    """
+    if request.method not in ('GET', 'POST'):
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    
+    form = TyreCalculatorForm(request.GET if request.method == 'GET' else request.POST)
+    if not form.is_valid():
+        return JsonResponse({'error': 'Invalid tyre size', 'errors': form.errors}, status=400)
+    
+    # Memoized, but a cold alternatives index is loaded from the database
     if request.method == 'POST':
-        data = request.POST
-        
-        # Get input values
-        width = int(data.get('width', 0))
-        aspect_ratio = int(data.get('aspect_ratio', 0))
-        rim_diameter = int(data.get('rim_diameter', 0))
-        
-        # Calculate tyre diameter in mm
-        sidewall_height = width * (aspect_ratio / 100)
-        tyre_diameter_mm = (rim_diameter * 25.4) + (2 * sidewall_height)
-        
-        # Calculate circumference
-        circumference_mm = math.pi * tyre_diameter_mm
-        circumference_in = circumference_mm / 25.4
-        
-        # Calculate revolutions per km/mile
-        revs_per_km = 1000000 / circumference_mm
-        revs_per_mile = 1609344 / circumference_mm
-        
-        # Alternative sizes (plus/minus 10mm width, 5% aspect ratio)
-        alt_sizes = []
-        width_variations = [-20, -10, 10, 20]
-        ratio_variations = [-10, -5, 5, 10]
-        
-        for w_var in width_variations:
-            for r_var in ratio_variations:
-                new_width = width + w_var
-                new_ratio = aspect_ratio + r_var
-                
-                if new_width > 0 and new_ratio > 0:
-                    new_sidewall = new_width * (new_ratio / 100)
-                    new_diameter = (rim_diameter * 25.4) + (2 * new_sidewall)
-                    diameter_diff = ((new_diameter - tyre_diameter_mm) / tyre_diameter_mm) * 100
-                    
-                    # Only include reasonable alternatives (±3% diameter difference)
-                    if abs(diameter_diff) <= 3:
-                        alt_sizes.append({
-                            'size': f"{new_width}/{new_ratio}R{rim_diameter}",
-                            'width': new_width,
-                            'aspect_ratio': new_ratio,
-                            'diameter_diff': round(diameter_diff, 1),
-                            'speedo_error': f"{'+' if diameter_diff > 0 else ''}{round(diameter_diff, 1)}%"
-                        })
-        
-        # Convert to imperial size
-        width_inches = width / 25.4
-        imperial_size = f"{round(width_inches, 1)}-{rim_diameter}"
-        
-        response_data = {
-            'metric_size': f"{width}/{aspect_ratio}R{rim_diameter}",
-            'imperial_size': imperial_size,
-            'diameter_mm': round(tyre_diameter_mm, 1),
-            'diameter_inches': round(tyre_diameter_mm / 25.4, 1),
-            'circumference_mm': round(circumference_mm, 1),
-            'circumference_inches': round(circumference_in, 1),
-            'sidewall_height': round(sidewall_height, 1),
-            'revolutions_per_km': round(revs_per_km, 1),
-            'revolutions_per_mile': round(revs_per_mile, 1),
-            'alternative_sizes': alt_sizes[:6],  # Limit to 6 alternatives
-        }
+        body, _ = await sync_to_async(calculated_response)(**form.cleaned_data)
+        return HttpResponse(body, content_type='application/json')
+    
+    # One URL per size, so every cache in front of us stores it only once
+    canonical_query = form.canonical_query()
+    if request.META.get('QUERY_STRING') != canonical_query:
+        return HttpResponsePermanentRedirect(f"{request.path}?{canonical_query}")
+    
+    body, etag = await sync_to_async(calculated_response)(**form.cleaned_data)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=CALCULATOR_CACHE_SECONDS)
+    return response
+
+@csrf_exempt
+async def calculate_tyre_size_batch(request):
+    """
+    Batch tyre calculations for a JSON array or CSV of sizes. A public API
+    for scripts and other sites, so exempt from CSRF like the API's lookup:
+    it only computes from the request body, reads no session and writes
+    nothing. Sizes are validated by TyreCalculatorForm's rules.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    
+    try:
+        if request.content_type == 'text/csv':
+            items, reference = parse_csv_batch(request.body.decode('utf-8-sig')), None
+        elif 'file' in request.FILES:
+            items, reference = parse_csv_batch(request.FILES['file'].read().decode('utf-8-sig')), None
+        else:
+            items, reference = parse_json_batch(request.body)
         
-        return JsonResponse(response_data)
-    
-    return JsonResponse({'error': 'Invalid request'}, status=400)
+        reference = reference or request.GET.get('reference')
+        sizes = read_sizes(items)
+        if reference:
+            try:
+                reference = read_size(reference)
+            except ValueError as e:
+                raise BatchError(f"Invalid reference: {e}")
+    except (BatchError, UnicodeDecodeError) as e:
+        return JsonResponse({'error': str(e), 'invalid': getattr(e, 'errors', [])}, status=400)
+    
+    # CPU-bound (and may load the alternatives index), so off the event loop
+    results = await sync_to_async(calculate_sizes)(sizes, reference=reference or None)
+    return JsonResponse({'count': len(results), 'results': results})
 
 def compare_tyres(request):
     """Compare two tyre sizes"""
     return render(request, 'tyres/compare_tyres.html')
 
+SUGGEST_LIMIT = 8
+SUGGEST_MAX_LIMIT = 20
+
+def suggest(request):
+    """Typeahead suggestions for brand, model and tyre size prefixes"""
+    query = request.GET.get('q', '').strip()[:50]
+    try:
+        limit = min(max(int(request.GET.get('limit', SUGGEST_LIMIT)), 1), SUGGEST_MAX_LIMIT)
+    except ValueError:
+        limit = SUGGEST_LIMIT
+
+    suggestions = suggest_terms(query, limit) if query else []
+    response = JsonResponse({
+        'query': query,
+        'suggestions': [{'text': text, 'type': kind} for text, kind in suggestions],
+    })
+    response['Cache-Control'] = 'public, max-age=60'
+    return response
+
 
 
-def search_by_size_range(request):
+async def search_by_size_range(request):
     """Search vehicles by tyre size range"""
     min_width = request.GET.get('min_width', '')
     max_width = request.GET.get('max_width', '')
     min_rim = request.GET.get('min_rim', '')
     max_rim = request.GET.get('max_rim', '')
     
-    vehicles = Vehicle.objects.all()
+    vehicles = Vehicle.objects.select_related('tyres')
+    
     tyre_filter = Q()
     
     if min_width or max_width:
@@ -390,40 +417,117 @@ def search_by_size_range(request):
         vehicle_ids = matching_tyres.values_list('vehicle_id', flat=True)
         vehicles = vehicles.filter(id__in=vehicle_ids)
     
+    paginator = KeysetPaginator(vehicles, VEHICLE_ORDERINGS['brand'], per_page=50)
+    page, total_count = await gather(paginator.apage(request.GET.get('cursor')), paginator.acapped_count())
+    
     context = {
-        'vehicles': vehicles,
+        'vehicles': page,
+        'page': page,
+        'total_count': total_count,
         'min_width': min_width,
         'max_width': max_width,
         'min_rim': min_rim,
         'max_rim': max_rim,
+        **page_links(request, page),
     }
     
     return render(request, 'tyres/size_range_search.html', context)
 
+def search_by_pressure(request):
+    """Search vehicles by recommended tyre pressure range"""
+    form = PressureSearchForm(request.GET or None)
+    page, total_count, links = None, 0, {}
+    
+    if form.is_valid() and (form.cleaned_data['min_psi'] is not None or form.cleaned_data['max_psi'] is not None):
+        # Range on the indexed PSI column, results in pressure order
+        column = f"tyres__{form.cleaned_data['axle']}_pressure_psi"
+        vehicles = Vehicle.objects.select_related('tyres').filter(**{f'{column}__isnull': False})
+        if form.cleaned_data['min_psi'] is not None:
+            vehicles = vehicles.filter(**{f'{column}__gte': form.cleaned_data['min_psi']})
+        if form.cleaned_data['max_psi'] is not None:
+            vehicles = vehicles.filter(**{f'{column}__lte': form.cleaned_data['max_psi']})
+        
+        paginator = KeysetPaginator(vehicles, (column, 'id'), per_page=50)
+        page = paginator.page(request.GET.get('cursor'))
+        total_count = paginator.capped_count()
+        links = page_links(request, page)
+    
+    context = {
+        'form': form,
+        'vehicles': page,
+        'page': page,
+        'total_count': total_count,
+        'searched': page is not None,
+        **links,
+    }
+    return render(request, 'tyres/search_by_pressure.html', context)
+
+# Rows of the pressure chart: (TyrePressureData field prefix, label, badge colour, note)
+PRESSURE_CONDITIONS = [
+    ('cold', 'Cold (Morning)', 'primary', 'Check before driving, when tyres are at ambient temperature'),
+    ('hot', 'Hot (After driving)', 'warning', 'Do NOT release air when tyres are hot'),
+    ('light_load', 'Light Load (1-2 persons)', 'success', 'For regular commuting without heavy luggage'),
+    ('full_load', 'Full Load (with luggage)', 'success', 'When carrying passengers or heavy items'),
+    ('max', 'Maximum Safe Pressure', 'danger', 'Do NOT exceed this pressure'),
+]
+# Typical change from the recommended pressure, used when a vehicle has no pressure data
+ESTIMATED_OFFSETS = {'cold': 0, 'hot': 3, 'light_load': 0, 'full_load': 2}
+
+@vehicle_condition(AFFILIATES)
+@cached_page(AFFILIATES, vehicle=True)
 def pressure_chart(request, slug):
     """Show tyre pressure chart for vehicle"""
-    vehicle = get_object_or_404(Vehicle, slug=slug)
-    
-    # Check if vehicle has tyre data
-    if not hasattr(vehicle, 'tyres'):
+    # Vehicle, tyres and its latest pressure data in one query
+    columns = [f'{condition}_{end}' for condition, *_ in PRESSURE_CONDITIONS for end in ('front', 'rear')]
+    columns += ['standard_front', 'standard_rear']
+    vehicle = (
+        Vehicle.objects.filter(slug=slug).select_related('tyres')
+        .annotate(
+            pressure_id=F('pressure_data__id'),
+            pressure_notes=F('pressure_data__notes'),
+            summer_adjustment=F('pressure_data__summer_adjustment'),
+            winter_adjustment=F('pressure_data__winter_adjustment'),
+            **{f'pressure_{column}': F(f'pressure_data__{column}_psi') for column in columns},
+        )
+        .order_by(F('pressure_data__last_updated').desc(nulls_last=True))
+        .first()
+    )
+    if vehicle is None:
+        raise Http404("No vehicle matches the given query.")
+    
+    tyres = getattr(vehicle, 'tyres', None)
+    has_data = vehicle.pressure_id is not None
+    if not has_data and not (tyres and (tyres.front_pressure_psi or tyres.rear_pressure_psi)):
         return render(request, 'tyres/no_pressure_data.html', {'vehicle': vehicle})
     
-    # Get pressure data (in real app, this would come from database)
-    # For now, we'll create sample data
-    pressure_data = {
-        'cold_front': vehicle.tyres.front_pressure or '29',
-        'cold_rear': vehicle.tyres.rear_pressure or '33',
-        'hot_front': '32',  # In real app, these would be in database
-        'hot_rear': '36',
-        'loaded_front': '31',
-        'loaded_rear': '35',
-        'max_front': '36',
-        'max_rear': '40',
-    }
+    if has_data:
+        recommended = {end: getattr(vehicle, f'pressure_standard_{end}') for end in ('front', 'rear')}
+    else:
+        recommended = {'front': tyres.front_pressure_psi, 'rear': tyres.rear_pressure_psi}
+    
+    rows = []
+    for condition, label, colour, note in PRESSURE_CONDITIONS:
+        values = {}
+        for end in ('front', 'rear'):
+            if has_data:
+                psi = getattr(vehicle, f'pressure_{condition}_{end}')
+            elif condition in ESTIMATED_OFFSETS and recommended[end] is not None:
+                psi = round(recommended[end] + ESTIMATED_OFFSETS[condition], 1)
+            else:
+                psi = None
+            values[end] = pressure_units(psi)
+        rows.append({'label': label, 'colour': colour, 'note': note, **values})
     
     context = {
         'vehicle': vehicle,
-        'pressure_data': pressure_data,
+        'recommended': {end: pressure_units(psi) for end, psi in recommended.items()},
+        'pressure_rows': rows,
+        'estimated': not has_data,
+        'chart_data': {
+            'labels': [row['label'].split(' (')[0] for row in rows],
+            'front': [row['front']['psi'] if row['front'] else None for row in rows],
+            'rear': [row['rear']['psi'] if row['rear'] else None for row in rows],
+        },
     }
     
     return render(request, 'tyres/pressure_chart.html', context)